@@ -0,0 +1,302 @@
+# OFFLINE MICROBENCHMARKS FOR THE PARSER, SEARCHER AND EXTRACTOR PROMPT BUILDING
+
+# DEPENDENCIES
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import itertools
+import statistics
+import subprocess
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config import config
+from qdrant_client import models
+from qdrant_client import QdrantClient
+from logger.logger import LoggerSetup
+from src.parser.parser import parser
+from src.extractor.extractor import extractor
+from src.searcher.searcher import FILTER_FIELDS
+from src.searcher.searcher import search_collection
+from src.searcher.searcher import ensure_payload_indexes
+from src.extractor.extractor import build_extractor_prompt
+from web.encoding import compress
+from web.encoding import JSON_ENCODERS
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+# LOGGER SETUP
+benchmark_logger = LoggerSetup(logger_name = "run_benchmarks.py", log_filename_prefix = "benchmarks").get_logger()
+
+# CANNED EXTRACTOR RESPONSE RETURNED BY THE FAKE LLM
+CANNED_RESPONSE    = ('Category: "Western"\n'
+                      'Individual_category: "jeans"\n'
+                      'category_by_Gender: "Women"\n'
+                      'colour: "Black"\n'
+                      'MOVE_ON: "true"\n'
+                      'FOLLOW_UP_MESSAGE: "Sure! Let me find black jeans for women."'
+                      )
+
+# CATALOG SIZES BENCHMARKED BY DEFAULT
+DEFAULT_SIZES      = [3_000, 100_000, 1_000_000]
+
+# VALUES USED WHEN A FILTER IS SWITCHED ON IN A COMBINATION
+FILTER_VALUES      = {"colour"               : "Black",
+                      "Individual_category"  : "jeans",
+                      "Category"             : "Western",
+                      "category_by_Gender"   : "Women"
+                      }
+
+
+def timeit(function : callable, repeat : int = 20, warmup : int = 2) -> dict:
+    """
+    Time `function()` over `repeat` runs after `warmup` untimed runs.
+
+    Returns
+
+        - `timings`                    {dict}           : min / median / p95 / mean in milliseconds and the run count.
+    """
+
+    for _ in range(warmup):
+        function()
+
+    samples = []
+
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started_at) * 1000)
+
+    samples.sort()
+
+    return {"min_ms"    : samples[0],
+            "median_ms" : statistics.median(samples),
+            "p95_ms"    : samples[min(len(samples) - 1, int(0.95 * len(samples)))],
+            "mean_ms"   : statistics.fmean(samples),
+            "runs"      : repeat
+            }
+
+
+def build_synthetic_catalog(size : int, collection_name : str = "benchmark", vector_size : int = 8, seed : int = 0) -> QdrantClient:
+    """
+    Create an in-memory Qdrant collection of `size` synthetic products drawn from the configured vocabularies.
+
+    Vectors are tiny and random: the filter path never compares them.
+    """
+
+    generator = random.Random(seed)
+    client    = QdrantClient(":memory:")
+
+    client.create_collection(collection_name  = collection_name,
+                             vectors_config   = models.VectorParams(size = vector_size, distance = models.Distance.COSINE)
+                             )
+    ensure_payload_indexes(client, collection_name)
+
+    batch     = []
+
+    for index in range(size):
+        batch.append(models.PointStruct(id       = index,
+                                        vector   = [generator.random() for _ in range(vector_size)],
+                                        payload  = {"name"                 : f"Product {index}",
+                                                    "img"                  : f"https://example.com/{index}.jpg",
+                                                    "price"                : generator.randint(199, 4999),
+                                                    "avg_rating"           : round(generator.uniform(1, 5), 1),
+                                                    "ratingCount"          : generator.randint(0, 5000),
+                                                    "colour"               : generator.choice(config.COLOURS),
+                                                    "Individual_category"  : generator.choice(config.INDIVIDUAL_CATEGORIES),
+                                                    "Category"             : generator.choice(config.CATEGORIES),
+                                                    "category_by_Gender"   : generator.choice(config.GENDERS)
+                                                    }
+                                        ))
+
+        if len(batch) == 10_000:
+            client.upsert(collection_name = collection_name, points = batch)
+            batch = []
+
+    if batch:
+        client.upsert(collection_name = collection_name, points = batch)
+
+    return client
+
+
+def filter_combinations() -> list:
+    """
+    Every on/off combination of the four filter attributes, as search_collection keyword arguments.
+    """
+
+    keywords     = {"colour"               : "colour",
+                    "Individual_category"  : "individual_category",
+                    "Category"             : "category",
+                    "category_by_Gender"   : "category_by_gender"
+                    }
+    combinations = []
+
+    for enabled in itertools.product([False, True], repeat = len(FILTER_FIELDS)):
+        combinations.append({keywords[field] : (FILTER_VALUES[field] if on else "NA") for field, on in zip(FILTER_FIELDS, enabled)})
+
+    return combinations
+
+
+def bench_parser(repeat : int) -> dict:
+    """
+    parser() on the canned extractor response.
+    """
+
+    return {"parser" : timeit(lambda: parser(CANNED_RESPONSE), repeat = repeat * 50)}
+
+
+def bench_prompt(repeat : int) -> dict:
+    """
+    Prompt construction for short, medium and long conversation histories, with and without the
+    token budget, plus the extractor round trip against a fake LLM.
+    """
+
+    turns   = ["Customer: I want black jeans", "Agent: For men or women?", "Customer: women, slim fit please"]
+    results = {}
+
+    for length in (1, 10, 100):
+        history                                    = "\n".join(itertools.islice(itertools.cycle(turns), length))
+        results[f"prompt_{length}_turns"]          = timeit(lambda: build_extractor_prompt(history), repeat = repeat)
+        results[f"prompt_{length}_turns_budget"]   = timeit(lambda: build_extractor_prompt(history, token_budget = config.EXTRACTOR_TOKEN_BUDGET), repeat = repeat)
+
+    llm                           = FakeListChatModel(responses = [CANNED_RESPONSE])
+    results["extractor_fake_llm"] = timeit(lambda: extractor(llm, turns[0]), repeat = repeat)
+
+    return results
+
+
+def bench_encoding(repeat : int) -> dict:
+    """
+    Serialization of a 100-product `/search` body with each available JSON encoder, and gzip
+    compression of it. The body sizes in bytes are recorded next to the timings.
+    """
+
+    body    = {"results"     : [{"name" : f"Product {index}", "img" : f"https://example.com/{index}.jpg", "price" : 999 + index,
+                                 "avg_rating" : 4.2, "ratingCount" : index * 7} for index in range(100)],
+               "next_cursor" : None,
+               "relaxed"     : [],
+               "message"     : "Search results for your query"
+               }
+    results = {}
+
+    for name, encode in JSON_ENCODERS.items():
+        results[f"encode_{name}"]     = timeit(lambda: encode(body), repeat = repeat)
+
+    data                              = JSON_ENCODERS["json"](body)
+    results["compress_gzip"]          = timeit(lambda: compress(data, "gzip"), repeat = repeat)
+    results["bytes_identity"]         = len(data)
+    results["bytes_gzip"]             = len(compress(data, "gzip"))
+
+    return results
+
+
+def bench_search(size : int, repeat : int) -> dict:
+    """
+    search_collection for each filter combination on a synthetic catalog of `size` products.
+    """
+
+    started_at = time.perf_counter()
+    client     = build_synthetic_catalog(size)
+    results    = {"build_seconds" : time.perf_counter() - started_at}
+
+    for combination in filter_combinations():
+        label          = "+".join(key for key, value in combination.items() if value != "NA") or "no_filter"
+        results[label] = timeit(lambda: search_collection(client, "benchmark", **combination), repeat = repeat, warmup = 1)
+
+    client.close()
+
+    return results
+
+
+def git_commit() -> str:
+    """
+    Short hash of the checked-out commit, so results can be compared across commits.
+    """
+
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd     = os.path.dirname(os.path.abspath(__file__)),
+                                       text    = True,
+                                       stderr  = subprocess.DEVNULL
+                                       ).strip()
+
+    except Exception:
+        return None
+
+
+def compare(results : dict, baseline : dict, threshold : float = 0.2) -> list:
+    """
+    List the benchmarks whose median is more than `threshold` slower than in `baseline`.
+    """
+
+    regressions = []
+
+    def walk(current : dict, previous : dict, path : str) -> None:
+        for key, value in current.items():
+            if key not in previous or not isinstance(value, dict):
+                continue
+
+            if "median_ms" in value:
+                before = previous[key]["median_ms"]
+
+                if before > 0 and value["median_ms"] > before * (1 + threshold):
+                    regressions.append({"benchmark" : f"{path}{key}", "before_ms" : before, "after_ms" : value["median_ms"]})
+
+            else:
+                walk(value, previous[key], f"{path}{key}/")
+
+    walk(results["benchmarks"], baseline.get("benchmarks", {}), "")
+
+    return regressions
+
+
+def main() -> None:
+    """
+    CLI: run the benchmarks and write the results as JSON.
+    """
+
+    argument_parser = argparse.ArgumentParser(description = "Offline microbenchmarks (no network needed).")
+    argument_parser.add_argument("--sizes", type = int, nargs = "+", default = DEFAULT_SIZES, help = "Synthetic catalog sizes.")
+    argument_parser.add_argument("--repeat", type = int, default = 20, help = "Timed runs per benchmark.")
+    argument_parser.add_argument("--output", default = "benchmark_results.json", help = "Where to write the JSON results.")
+    argument_parser.add_argument("--baseline", default = None, help = "Earlier results JSON to compare against.")
+    argument_parser.add_argument("--threshold", type = float, default = 0.2, help = "Relative slowdown reported as a regression.")
+    arguments       = argument_parser.parse_args()
+
+    benchmarks      = {}
+    benchmarks.update(bench_parser(arguments.repeat))
+    benchmarks.update(bench_prompt(arguments.repeat))
+    benchmarks.update(bench_encoding(arguments.repeat))
+
+    for size in arguments.sizes:
+        benchmark_logger.info(f"Benchmarking search_collection on {size} products")
+        benchmarks[f"search_collection_{size}"] = bench_search(size, arguments.repeat)
+
+    results         = {"commit"     : git_commit(),
+                       "timestamp"  : time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "python"     : platform.python_version(),
+                       "machine"    : platform.machine(),
+                       "benchmarks" : benchmarks
+                       }
+
+    with open(arguments.output, "w", encoding = "utf-8") as output_file:
+        json.dump(results, output_file, indent = 2)
+
+    benchmark_logger.info(f"Benchmark results written to {arguments.output}")
+
+    if arguments.baseline:
+        with open(arguments.baseline, encoding = "utf-8") as baseline_file:
+            regressions = compare(results, json.load(baseline_file), threshold = arguments.threshold)
+
+        for regression in regressions:
+            benchmark_logger.warning(f"Regression in {regression['benchmark']}: {regression['before_ms']:.2f}ms -> {regression['after_ms']:.2f}ms")
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# CONFIGURATION SETTINGS FOR API KEYS, MODEL NAMES AND CONSTANTS
+
+# DEPENDENCIES
+
+import os
+import tempfile
+from dotenv import load_dotenv
+
+# LOADING ENVIRONMENT VARIABLES
+load_dotenv()
+
+# ------------------------------
+# CREDENTIALS AND MODEL NAMES
+#-------------------------------
+
+GROQ_API_KEY                = os.environ.get('GROQ_API_KEY')
+LLM_MODEL_NAME              = os.environ.get('LLM_MODEL_NAME')
+QDRANT_API_KEY              = os.environ.get('QDRANT_API_KEY')
+QDRANT_CLUSTER_URL          = os.environ.get('QDRANT_CLUSTER_URL')
+QDRANT_COLLECTION_NAME      = os.environ.get('QDRANT_COLLECTION_NAME')
+HF_LLM_MODEL_NAME           = os.environ.get('HF_LLM_MODEL_NAME')
+HUGGINGFACE_LOGIN_TOKEN     = os.environ.get('HUGGINGFACE_LOGIN_TOKEN')
+
+# ------------------------------
+# CLIENT CONNECTION POOLING
+#-------------------------------
+
+LLM_TEMPERATURE             = float(os.environ.get('LLM_TEMPERATURE', 0.5))
+LLM_POOL_SIZE               = int(os.environ.get('LLM_POOL_SIZE', 10))
+LLM_REQUEST_TIMEOUT         = float(os.environ.get('LLM_REQUEST_TIMEOUT', 30))
+QDRANT_POOL_SIZE            = int(os.environ.get('QDRANT_POOL_SIZE', 10))
+QDRANT_REQUEST_TIMEOUT      = int(os.environ.get('QDRANT_REQUEST_TIMEOUT', 10))
+KEEPALIVE_EXPIRY            = float(os.environ.get('KEEPALIVE_EXPIRY', 60))
+
+# ------------------------------
+# EXTRACTION RESULT CACHE
+#-------------------------------
+
+EXTRACTION_CACHE_SIZE       = int(os.environ.get('EXTRACTION_CACHE_SIZE', 1024))
+EXTRACTION_CACHE_TTL        = float(os.environ.get('EXTRACTION_CACHE_TTL', 3600))
+EXTRACTION_CACHE_PATH       = os.environ.get('EXTRACTION_CACHE_PATH')
+
+# ------------------------------
+# CONVERSATION SESSIONS
+#-------------------------------
+
+# "memory" (PER WORKER PROCESS) OR "sqlite" (SESSION_STORE_PATH, SHARED BY ALL WORKERS OF THE HOST)
+SESSION_BACKEND             = os.environ.get('SESSION_BACKEND', 'memory')
+SESSION_TTL                 = float(os.environ.get('SESSION_TTL', 1800))
+SESSION_MAX_SIZE            = int(os.environ.get('SESSION_MAX_SIZE', 10000))
+SESSION_STORE_PATH          = os.environ.get('SESSION_STORE_PATH', 'sessions.sqlite3')
+
+# ------------------------------
+# CLOSED EXTRACTION VOCABULARIES
+#-------------------------------
+
+CATEGORIES                  = ["Indian Wear", "Plus Size", "Western", "Sports Wear", "Inner Wear & Sleep Wear", "Lingerie & Sleep Wear"]
+
+INDIVIDUAL_CATEGORIES       = ["kurta-sets", "kurtas", "tops", "thermal-tops", "jeans", "skirts", "shorts", "trousers", 
+                               "palazzos", "jumpsuit", "co-ords", "clothing-set", "kurtis", "tunics"
+                               ]
+
+GENDERS                     = ["Women", "Men"]
+
+COLOURS                     = ["Black", "Orange", "Navy Blue", "Red", "Beige", "Yellow", "Green", "Mustard", "Teal", "Peach", 
+                               "Blue", "Sea Green", "Pink", "Burgundy", "Maroon", "Lavender", "Purple", "White", "Grey", 
+                               "Lime Green", "Brown", "Cream", "Rust", "Off White", "Turquoise Blue", "Multi", "Mauve", 
+                               "Assorted", "Magenta", "Fuchsia", "Coral", "Olive", "Rose", "Gold", "Fluorescent Green", 
+                               "Silver", "Nude", "Violet", "Charcoal", "Grey Melange", "Khaki", "Coffee Brown", "Taupe", "Copper"
+                               ]
+
+# ANSWER UNAMBIGUOUS QUERIES WITH THE GAZETTEER MATCHER INSTEAD OF THE LLM
+GAZETTEER_FAST_PATH         = os.environ.get('GAZETTEER_FAST_PATH', 'true').lower() == 'true'
+
+# ------------------------------
+# ASYNC (ASGI) SERVING MODE
+#-------------------------------
+
+DISCONNECT_POLL_INTERVAL    = float(os.environ.get('DISCONNECT_POLL_INTERVAL', 0.1))
+
+# ------------------------------
+# STREAMING /search
+#-------------------------------
+
+SEARCH_EXECUTOR_WORKERS     = int(os.environ.get('SEARCH_EXECUTOR_WORKERS', 8))
+
+# ------------------------------
+# EXTRACTION OUTPUT MODE
+#-------------------------------
+
+# "text" FOR THE Key: "value" FORMAT + parser(), "structured" FOR TOOL-CALLING OUTPUT
+# (STREAMING ROUTES THEN SEND THE FOLLOW-UP MESSAGE IN ONE PIECE INSTEAD OF TOKEN BY TOKEN)
+EXTRACTION_MODE             = os.environ.get('EXTRACTION_MODE', 'text').lower()
+
+# ------------------------------
+# PROMPT TOKEN BUDGET
+#-------------------------------
+
+# MAXIMUM EXTRACTOR PROMPT SIZE IN TOKENS; OLDER CONVERSATION TURNS ARE SUMMARIZED TO FIT (0 DISABLES)
+EXTRACTOR_TOKEN_BUDGET      = int(os.environ.get('EXTRACTOR_TOKEN_BUDGET', 2048))
+
+# ------------------------------
+# SEARCH RESULT PAGINATION
+#-------------------------------
+
+SEARCH_PAGE_SIZE            = int(os.environ.get('SEARCH_PAGE_SIZE', 10))
+SEARCH_MAX_PAGE_SIZE        = int(os.environ.get('SEARCH_MAX_PAGE_SIZE', 100))
+
+# ------------------------------
+# SEARCH RESULT CACHE
+#-------------------------------
+
+# PAGES CACHED PER WORKER (0 DISABLES), SECONDS A PAGE STAYS VALID (ALSO THE Cache-Control max-age OF /search)
+SEARCH_CACHE_SIZE           = int(os.environ.get('SEARCH_CACHE_SIZE', 2048))
+SEARCH_CACHE_TTL            = float(os.environ.get('SEARCH_CACHE_TTL', 300))
+
+# HOW OFTEN A WORKER RE-READS THE CATALOG VERSION STAMP THAT INGESTION BUMPS
+CATALOG_VERSION_CHECK_INTERVAL = float(os.environ.get('CATALOG_VERSION_CHECK_INTERVAL', 5))
+
+# ------------------------------
+# RESPONSE ENCODING
+#-------------------------------
+
+# "orjson" (FALLS BACK TO "json" WHEN NOT INSTALLED) OR "json"
+RESPONSE_JSON_ENCODER       = os.environ.get('RESPONSE_JSON_ENCODER', 'orjson')
+
+# gzip / brotli (IF INSTALLED) BY Accept-Encoding, FOR BODIES OF AT LEAST RESPONSE_COMPRESS_MIN_BYTES
+RESPONSE_COMPRESSION        = os.environ.get('RESPONSE_COMPRESSION', 'true').lower() == 'true'
+RESPONSE_COMPRESS_MIN_BYTES = int(os.environ.get('RESPONSE_COMPRESS_MIN_BYTES', 1024))
+RESPONSE_GZIP_LEVEL         = int(os.environ.get('RESPONSE_GZIP_LEVEL', 5))
+RESPONSE_BROTLI_QUALITY     = int(os.environ.get('RESPONSE_BROTLI_QUALITY', 4))
+
+# /search/ndjson: POINTS PER SCROLL PAGE (ONE NDJSON LINE EACH) AND MAXIMUM RESULTS PER REQUEST
+NDJSON_PAGE_SIZE            = int(os.environ.get('NDJSON_PAGE_SIZE', 100))
+NDJSON_MAX_RESULTS          = int(os.environ.get('NDJSON_MAX_RESULTS', 1000))
+
+# ------------------------------
+# SEMANTIC RETRIEVAL
+#-------------------------------
+
+# "filter" FOR EXACT ATTRIBUTE MATCHING, "index" FOR THE SAME MATCHING SERVED FROM THE IN-PROCESS CATALOG INDEX
+# (FLASK SERVER ONLY), "semantic" FOR VECTOR SEARCH CONSTRAINED BY THE EXTRACTED ATTRIBUTES
+SEARCH_MODE                 = os.environ.get('SEARCH_MODE', 'filter').lower()
+
+# SECONDS AFTER WHICH THE CATALOG INDEX IS RELOADED IN THE BACKGROUND; A CATALOG VERSION BUMP RELOADS IT AT ONCE
+CATALOG_INDEX_REFRESH_INTERVAL = float(os.environ.get('CATALOG_INDEX_REFRESH_INTERVAL', 600))
+ENCODER_MODEL_NAME          = os.environ.get('ENCODER_MODEL_NAME', 'all-MiniLM-L6-v2')
+ENCODER_BACKEND             = os.environ.get('ENCODER_BACKEND', 'torch').lower()
+
+# ------------------------------
+# QUERY EMBEDDING CACHE AND MICRO-BATCHING
+#-------------------------------
+
+EMBEDDING_CACHE_BYTES       = int(os.environ.get('EMBEDDING_CACHE_BYTES', 16 * 1024 * 1024))
+EMBEDDING_CACHE_PATH        = os.environ.get('EMBEDDING_CACHE_PATH')
+# SECONDS BETWEEN WRITES OF NEW VECTORS TO EMBEDDING_CACHE_PATH (ALSO WRITTEN AT EXIT)
+EMBEDDING_CACHE_FLUSH_INTERVAL = float(os.environ.get('EMBEDDING_CACHE_FLUSH_INTERVAL', 60))
+EMBEDDING_BATCH_WINDOW_MS   = float(os.environ.get('EMBEDDING_BATCH_WINDOW_MS', 5))
+EMBEDDING_MAX_BATCH_SIZE    = int(os.environ.get('EMBEDDING_MAX_BATCH_SIZE', 32))
+
+# ------------------------------
+# LOGGING BACKEND
+#-------------------------------
+
+# "sync" WRITES FROM THE CALLING THREAD, "async" HANDS RECORDS TO A QueueListener THREAD
+LOG_MODE                    = os.environ.get('LOG_MODE', 'async')
+
+# "text" OR "json" (ONE JSON OBJECT PER LINE)
+LOG_FORMAT                  = os.environ.get('LOG_FORMAT', 'text')
+LOG_LEVEL                   = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_MAX_BYTES               = int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT            = int(os.environ.get('LOG_BACKUP_COUNT', 5))
+
+# FRACTION OF INFO/DEBUG RECORDS KEPT PER LOGGER, e.g. "searcher.py=0.1,app.py=0.5"; WARNINGS ARE ALWAYS KEPT
+LOG_SAMPLE_RATES            = {name.strip() : float(rate) for name, rate in (item.split('=') for item in os.environ.get('LOG_SAMPLE_RATES', '').split(',') if '=' in item)}
+
+# ------------------------------
+# SEARCH FALLBACKS
+#-------------------------------
+
+# FILTERS DROPPED ONE BY ONE (CUMULATIVELY) WHEN NOTHING MATCHES; FIELDS NOT LISTED ARE NEVER RELAXED
+FALLBACK_RELAX_ORDER        = [field.strip() for field in os.environ.get('FALLBACK_RELAX_ORDER', 'colour,Category,category_by_Gender').split(',') if field.strip()]
+
+# POPULAR ITEMS (BY ratingCount) SAMPLED FOR UNFILTERED QUERIES, AND HOW OFTEN THE POOL IS REFRESHED
+POPULAR_POOL_SIZE           = int(os.environ.get('POPULAR_POOL_SIZE', 200))
+POPULAR_REFRESH_INTERVAL    = float(os.environ.get('POPULAR_REFRESH_INTERVAL', 600))
+
+# ------------------------------
+# PRODUCTION SERVER (GUNICORN)
+#-------------------------------
+
+WEB_BIND                    = os.environ.get('WEB_BIND', '0.0.0.0:5000')
+WEB_WORKERS                 = int(os.environ.get('WEB_WORKERS', os.cpu_count() or 1))
+WEB_THREADS                 = int(os.environ.get('WEB_THREADS', 4))
+WEB_TIMEOUT                 = int(os.environ.get('WEB_TIMEOUT', 120))
+
+# SHARED DIRECTORY WHERE EVERY GUNICORN WORKER WRITES ITS prometheus_client METRICS, SO /metrics AGGREGATES ALL WORKERS
+PROMETHEUS_MULTIPROC_DIR    = os.environ.get('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'trendsetters_metrics'))
+
+# LOAD THE QUERY ENCODER DURING WARMUP EVEN WHEN SEARCH_MODE IS NOT "semantic"
+WARMUP_ENCODER              = os.environ.get('WARMUP_ENCODER', 'false').lower() == 'true'
+
+# ------------------------------
+# LLM BACKEND
+#-------------------------------
+
+# "groq" (HOSTED API), "hf-local" (HF_LLM_MODEL_NAME ON THIS MACHINE'S CPU) OR "fake" (NO NETWORK, REPLAYS LLM_REPLAY_PATH)
+LLM_BACKEND                 = os.environ.get('LLM_BACKEND', 'groq')
+LLM_REPLAY_PATH             = os.environ.get('LLM_REPLAY_PATH')
+LOCAL_LLM_LORA_ADAPTER      = os.environ.get('LOCAL_LLM_LORA_ADAPTER')
+LOCAL_LLM_QUANTIZE_INT8     = os.environ.get('LOCAL_LLM_QUANTIZE_INT8', 'true').lower() == 'true'
+LOCAL_LLM_MAX_NEW_TOKENS    = int(os.environ.get('LOCAL_LLM_MAX_NEW_TOKENS', 96))
+LOCAL_LLM_THREADS           = int(os.environ['LOCAL_LLM_THREADS']) if os.environ.get('LOCAL_LLM_THREADS') else None
+LOCAL_LLM_BATCH_WINDOW_MS   = float(os.environ.get('LOCAL_LLM_BATCH_WINDOW_MS', 10))
+LOCAL_LLM_MAX_BATCH_SIZE    = int(os.environ.get('LOCAL_LLM_MAX_BATCH_SIZE', 8))
@@ -0,0 +1,69 @@
+# GUNICORN CONFIGURATION FOR THE PRODUCTION FLASK SERVER
+#
+#   gunicorn -c gunicorn.conf.py web.wsgi:app
+
+# DEPENDENCIES
+
+import os
+import sys
+import shutil
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+# NOT IMPORTED AS `config`: GUNICORN READS EVERY MODULE-LEVEL NAME AS A SETTING
+from config import config as settings
+
+bind          = settings.WEB_BIND
+workers       = settings.WEB_WORKERS
+threads       = settings.WEB_THREADS
+worker_class  = "gthread"
+timeout       = settings.WEB_TIMEOUT
+
+# IMPORT THE APPLICATION ONCE IN THE MASTER, THEN FORK THE WORKERS
+preload_app   = True
+
+# SET BEFORE THE APPLICATION (AND prometheus_client) IS IMPORTED: EVERY WORKER THEN WRITES ITS METRICS
+# TO FILES IN THIS DIRECTORY AND /metrics AGGREGATES THEM. LEFTOVERS OF A PREVIOUS RUN ARE REMOVED.
+shutil.rmtree(settings.PROMETHEUS_MULTIPROC_DIR, ignore_errors = True)
+os.makedirs(settings.PROMETHEUS_MULTIPROC_DIR, exist_ok = True)
+os.environ["PROMETHEUS_MULTIPROC_DIR"] = settings.PROMETHEUS_MULTIPROC_DIR
+
+
+def on_starting(server : object) -> None:
+    """
+    Warn that /metrics is per worker when prometheus_client is missing.
+    """
+
+    try:
+        import prometheus_client
+
+    except ImportError:
+        if workers > 1:
+            server.log.warning("prometheus_client is not installed: /metrics only reports the worker that serves the scrape")
+
+
+def post_fork(server : object, worker : object) -> None:
+    """
+    Give every forked worker its own Qdrant/LLM connection pools, caches and threads, and warm
+    it up before it accepts requests.
+    """
+
+    from web.wsgi import app
+    from web.app import init_worker
+
+    init_worker(app)
+
+    server.log.info(f"Worker {worker.pid} initialized (ready: {app.extensions['ready'].is_set()})")
+
+
+def child_exit(server : object, worker : object) -> None:
+    """
+    Drop the live-process metric files of an exited worker; its counters and histograms stay in the totals.
+    """
+
+    try:
+        from prometheus_client import multiprocess
+
+    except ImportError:
+        return
+
+    multiprocess.mark_process_dead(worker.pid)
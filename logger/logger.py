@@ -1,11 +1,160 @@
 # DEPENDENCIES
 
+import os
 import sys
+import json
+import atexit
+import queue
+import random
 import logging
+import contextvars
+import logging.handlers
 from pathlib import Path
 from colorama import Fore
 from colorama import Style
 from datetime import datetime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config import config
+
+# ONE QUEUE AND ONE LISTENER THREAD PER PROCESS, SHARED BY EVERY LOGGER IN "async" LOG_MODE
+_log_queue     = queue.SimpleQueue()
+
+# LOGGER NAME -> HANDLERS THE LISTENER WRITES ITS RECORDS TO
+_routes        = {}
+
+# THE LISTENER THREAD DOES NOT SURVIVE fork(), SO EACH PROCESS STARTS ITS OWN
+_listener      = None
+
+
+class _RouteHandler(logging.Handler):
+    """
+    The listener's only handler: passes each record to the handlers of the logger that created it.
+    """
+
+    def handle(self, record : logging.LogRecord) -> bool:
+        for handler in _routes.get(record.name, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+        return True
+
+
+def _start_listener() -> None:
+    """
+    Start this process's listener thread, if any logger uses the queue and it is not running yet.
+    """
+
+    global _listener
+
+    if _routes and _listener is None:
+        _listener = logging.handlers.QueueListener(_log_queue, _RouteHandler())
+        _listener.start()
+
+
+def _stop_listener() -> None:
+    """
+    Write out the queued records and stop the listener thread.
+    """
+
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
+# THE LISTENER IS STOPPED AROUND fork(), SO NO THREAD HOLDS A HANDLER OR STREAM LOCK THE CHILD WOULD INHERIT,
+# AND EACH PROCESS (E.G. EVERY PRE-FORKED SERVER WORKER) THEN STARTS ITS OWN
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(before = _stop_listener, after_in_parent = _start_listener, after_in_child = _start_listener)
+
+
+class ProcessRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Size-rotated log file per process: `{prefix}_{timestamp}_{pid}.log`.
+
+    The file is only opened by the first record. A handler created in a pre-forking master
+    (gunicorn's preload_app) therefore writes to a file of the worker's own pid in every
+    worker, instead of all processes appending to, and rotating, one shared file.
+    """
+
+    def __init__(self, log_dir : Path, prefix : str, **kwargs) -> None:
+        self.log_dir   = log_dir
+        self.prefix    = prefix
+        self.started   = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self._pid      = os.getpid()
+
+        super().__init__(self._path(), delay = True, **kwargs)
+
+    def _path(self) -> str:
+        return str(self.log_dir / f"{self.prefix}_{self.started}_{os.getpid()}.log")
+
+    def emit(self, record : logging.LogRecord) -> None:
+        if self._pid != os.getpid():
+            self._pid         = os.getpid()
+
+            # THE STREAM INHERITED FROM THE PARENT STAYS THE PARENT'S; THIS PROCESS OPENS ITS OWN FILE
+            if self.stream is not None:
+                self.stream.close()
+                self.stream   = None
+
+            self.baseFilename = os.path.abspath(self._path())
+
+        super().emit(record)
+
+
+# ID OF THE REQUEST BEING HANDLED IN THE CURRENT THREAD / TASK, "-" OUTSIDE REQUESTS
+request_id_var = contextvars.ContextVar("request_id", default = "-")
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Adds the current request ID (from `request_id_var`) to every log record as `request_id`.
+    """
+
+    def filter(self, record : logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction `rate` of INFO and DEBUG records; WARNING and above always pass.
+    Runs before the record is queued or formatted, so dropped records cost almost nothing.
+    """
+
+    def __init__(self, rate : float) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record : logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats each record as one JSON object per line.
+    """
+
+    def format(self, record : logging.LogRecord) -> str:
+        entry = {"time"        : self.formatTime(record),
+                 "level"       : record.levelname,
+                 "logger"      : record.name,
+                 "function"    : record.funcName,
+                 "line"        : record.lineno,
+                 "request_id"  : getattr(record, "request_id", "-"),
+                 "message"     : record.getMessage()
+                 }
+
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default = str)
+
 
 class LoggerSetup:
     """
@@ -27,24 +176,47 @@ class LoggerSetup:
         self.log_dir       = Path('logs')
         self.log_dir.mkdir(exist_ok = True)
 
-        log_file           = self.log_dir / f"{log_filename_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-
-        FORMAT             = "[%(asctime)s %(filename)s->%(funcName)s()] | [line no.:%(lineno)d] %(levelname)s: %(message)s"
+        FORMAT             = "[%(asctime)s %(filename)s->%(funcName)s()] | [line no.:%(lineno)d] [req:%(request_id)s] %(levelname)s: %(message)s"
         
         self.logger        = logging.getLogger(logger_name)
-        self.logger.setLevel(logging.INFO)
+        self.logger.setLevel(config.LOG_LEVEL)
 
         if not self.logger.handlers:
-            file_handler   = logging.FileHandler(log_file)
+            # SIZE-BASED ROTATION INSTEAD OF AN EVER-GROWING FILE, ONE FILE PER PROCESS
+            file_handler   = ProcessRotatingFileHandler(self.log_dir,
+                                                        log_filename_prefix,
+                                                        maxBytes     = config.LOG_MAX_BYTES,
+                                                        backupCount  = config.LOG_BACKUP_COUNT
+                                                        )
             stream_handler = logging.StreamHandler(sys.stdout)
 
-            formatter      = logging.Formatter(FORMAT)
-            file_handler.setFormatter(formatter)
+            if config.LOG_FORMAT == "json":
+                file_handler.setFormatter(JsonFormatter())
+                stream_handler.setFormatter(JsonFormatter())
+
+            else:
+                file_handler.setFormatter(logging.Formatter(FORMAT))
+
+                # ANSI COLOURS ONLY ON AN INTERACTIVE TERMINAL
+                stream_handler.setFormatter(StyledFormatter(FORMAT) if sys.stdout.isatty() else logging.Formatter(FORMAT))
+
+            # FILTERS ON THE LOGGER RUN IN THE CALLING THREAD, WHERE THE REQUEST ID IS BOUND
+            self.logger.addFilter(RequestIdFilter())
+
+            if logger_name in config.LOG_SAMPLE_RATES:
+                self.logger.addFilter(SamplingFilter(config.LOG_SAMPLE_RATES[logger_name]))
+
+            if config.LOG_MODE == "async":
+                # THE CALLER ONLY ENQUEUES; FORMATTING AND FILE / STDOUT I/O HAPPEN ON THE PROCESS'S LISTENER THREAD
+                _routes[logger_name] = (file_handler, stream_handler)
+
+                self.logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+
+                _start_listener()
 
-            stream_handler.setFormatter(StyledFormatter(FORMAT))  
-            
-            self.logger.addHandler(file_handler)
-            self.logger.addHandler(stream_handler)
+            else:
+                self.logger.addHandler(file_handler)
+                self.logger.addHandler(stream_handler)
 
     def get_logger(self):
         """
@@ -0,0 +1,253 @@
+# LONG-LIVED, POOLED CLIENTS SHARED BY THE FLASK APP AND MAIN SCRIPT
+
+# DEPENDENCIES
+
+import os
+import sys
+import httpx
+from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from config import config
+from logger.logger import LoggerSetup
+from src.llm.registry import build_llm
+
+# LOGGER SETUP
+client_builder_logger = LoggerSetup(logger_name = "client_builder.py", log_filename_prefix = "client_builder").get_logger()
+
+
+def initialize_qdrant_client(url : str, api_key : str, pool_size : int = 10, keepalive_expiry : float = 60, timeout : int = 10) -> QdrantClient:
+    """
+    Initialize a Qdrant client with an explicit HTTP keep-alive connection pool.
+
+    Arguments:
+
+        - `url`                        {str}            : URL of the Qdrant cluster.
+
+        - `api_key`                    {str}            : API key for authenticating with Qdrant.
+
+        - `pool_size`             {int, default = 10}   : Maximum number of pooled (and kept-alive) connections.
+
+        - `keepalive_expiry`     {float, default = 60}  : Seconds an idle pooled connection is kept open.
+
+        - `timeout`               {int, default = 10}   : Request timeout in seconds.
+
+    Returns
+
+        - `client`              {QdrantClient}          : An initialized Qdrant client.
+    """
+
+    limits = httpx.Limits(max_connections            = pool_size,
+                          max_keepalive_connections  = pool_size,
+                          keepalive_expiry           = keepalive_expiry
+                          )
+
+    client = QdrantClient(url      = url,
+                          api_key  = api_key,
+                          timeout  = timeout,
+                          limits   = limits
+                          )
+
+    client_builder_logger.info(f"Qdrant client initialized successfully with pool size: {pool_size}")
+
+    return client
+
+
+class ServiceClients:
+    """
+    Holds the Qdrant client and the LLM for the lifetime of a process (one per worker).
+    """
+
+    def __init__(self, qdrant : QdrantClient, llm : object, collection_name : str) -> None:
+        """
+        Arguments:
+
+            - `qdrant`              {QdrantClient}      : The pooled Qdrant client.
+
+            - `llm`                    {object}         : The language model instance.
+
+            - `collection_name`          {str}          : Name of the product collection.
+        """
+
+        self.qdrant           = qdrant
+        self.llm              = llm
+        self.collection_name  = collection_name
+
+    def health_check(self) -> dict:
+        """
+        Check that the product collection is reachable and the LLM is configured.
+
+        The LLM is not invoked, so the check costs one lightweight Qdrant request.
+
+        Returns
+
+            - `status`                 {dict}           : {"healthy": bool, "qdrant": str, "llm": str}
+        """
+
+        status                = {"healthy" : False, "qdrant" : "unavailable", "llm" : "unavailable"}
+
+        try:
+            collection        = self.qdrant.get_collection(collection_name = self.collection_name)
+            status["qdrant"]  = str(collection.status.value if hasattr(collection.status, "value") else collection.status)
+
+        except Exception as e:
+            client_builder_logger.error(f"Qdrant health check failed: {repr(e)}")
+
+        if self.llm is not None:
+            status["llm"]     = "configured"
+
+        status["healthy"]     = status["qdrant"] != "unavailable" and status["llm"] == "configured"
+
+        return status
+
+    def close(self) -> None:
+        """
+        Close the pooled connections held by the clients.
+        """
+
+        try:
+            self.qdrant.close()
+
+        except Exception as e:
+            client_builder_logger.warning(f"Failed to close Qdrant client: {repr(e)}")
+
+        http_client = getattr(self.llm, "http_client", None)
+
+        if http_client is not None:
+            http_client.close()
+
+
+def build_service_clients(qdrant_pool_size : int = None, llm_pool_size : int = None) -> ServiceClients:
+    """
+    Build the Qdrant client and the LLM of the configured `LLM_BACKEND` ("groq", "hf-local" or
+    "fake") from the project configuration.
+
+    This is the single construction path used by both `main.py` and the Flask application
+    factory, so both get the same pooling and timeout settings.
+
+    Arguments:
+
+        - `qdrant_pool_size`      {int, optional}       : Overrides `QDRANT_POOL_SIZE` from the configuration.
+
+        - `llm_pool_size`         {int, optional}       : Overrides `LLM_POOL_SIZE` from the configuration.
+
+    Returns
+
+        - `clients`            {ServiceClients}         : The long-lived clients.
+    """
+
+    client_builder_logger.info(f"GROQ_API_KEY : {'Present' if config.GROQ_API_KEY else 'Not Present'}")
+    client_builder_logger.info(f"LLM_MODEL_NAME : {config.LLM_MODEL_NAME if config.LLM_MODEL_NAME else 'Not Present'}")
+
+    qdrant = initialize_qdrant_client(url               = config.QDRANT_CLUSTER_URL,
+                                      api_key           = config.QDRANT_API_KEY,
+                                      pool_size         = qdrant_pool_size or config.QDRANT_POOL_SIZE,
+                                      keepalive_expiry  = config.KEEPALIVE_EXPIRY,
+                                      timeout           = config.QDRANT_REQUEST_TIMEOUT
+                                      )
+
+    llm    = build_llm(backend = config.LLM_BACKEND, pool_size = llm_pool_size)
+
+    return ServiceClients(qdrant           = qdrant,
+                          llm              = llm,
+                          collection_name  = config.QDRANT_COLLECTION_NAME
+                          )
+
+
+def initialize_async_qdrant_client(url : str, api_key : str, pool_size : int = 10, keepalive_expiry : float = 60, timeout : int = 10) -> AsyncQdrantClient:
+    """
+    Asynchronous counterpart of `initialize_qdrant_client`, returning an `AsyncQdrantClient`
+    with the same keep-alive pool settings.
+    """
+
+    limits = httpx.Limits(max_connections            = pool_size,
+                          max_keepalive_connections  = pool_size,
+                          keepalive_expiry           = keepalive_expiry
+                          )
+
+    client = AsyncQdrantClient(url      = url,
+                               api_key  = api_key,
+                               timeout  = timeout,
+                               limits   = limits
+                               )
+
+    client_builder_logger.info(f"Async Qdrant client initialized successfully with pool size: {pool_size}")
+
+    return client
+
+
+class AsyncServiceClients(ServiceClients):
+    """
+    Long-lived clients for the ASGI server: an `AsyncQdrantClient` plus the LLM, whose
+    `ainvoke` uses its own pooled async HTTP client.
+    """
+
+    async def health_check(self) -> dict:
+        """
+        Asynchronous counterpart of `ServiceClients.health_check`.
+        """
+
+        status                = {"healthy" : False, "qdrant" : "unavailable", "llm" : "unavailable"}
+
+        try:
+            collection        = await self.qdrant.get_collection(collection_name = self.collection_name)
+            status["qdrant"]  = str(collection.status.value if hasattr(collection.status, "value") else collection.status)
+
+        except Exception as e:
+            client_builder_logger.error(f"Qdrant health check failed: {repr(e)}")
+
+        if self.llm is not None:
+            status["llm"]     = "configured"
+
+        status["healthy"]     = status["qdrant"] != "unavailable" and status["llm"] == "configured"
+
+        return status
+
+    async def close(self) -> None:
+        """
+        Close the pooled connections held by the clients.
+        """
+
+        try:
+            await self.qdrant.close()
+
+        except Exception as e:
+            client_builder_logger.warning(f"Failed to close async Qdrant client: {repr(e)}")
+
+        http_async_client = getattr(self.llm, "http_async_client", None)
+
+        if http_async_client is not None:
+            await http_async_client.aclose()
+
+
+def build_async_service_clients(qdrant_pool_size : int = None, llm_pool_size : int = None) -> AsyncServiceClients:
+    """
+    Build the `AsyncQdrantClient` and the LLM of the configured `LLM_BACKEND` from the
+    project configuration for the ASGI server.
+
+    Arguments:
+
+        - `qdrant_pool_size`      {int, optional}       : Overrides `QDRANT_POOL_SIZE` from the configuration.
+
+        - `llm_pool_size`         {int, optional}       : Overrides `LLM_POOL_SIZE` from the configuration.
+
+    Returns
+
+        - `clients`          {AsyncServiceClients}      : The long-lived asynchronous clients.
+    """
+
+    qdrant = initialize_async_qdrant_client(url               = config.QDRANT_CLUSTER_URL,
+                                            api_key           = config.QDRANT_API_KEY,
+                                            pool_size         = qdrant_pool_size or config.QDRANT_POOL_SIZE,
+                                            keepalive_expiry  = config.KEEPALIVE_EXPIRY,
+                                            timeout           = config.QDRANT_REQUEST_TIMEOUT
+                                            )
+
+    llm    = build_llm(backend = config.LLM_BACKEND, pool_size = llm_pool_size)
+
+    return AsyncServiceClients(qdrant           = qdrant,
+                               llm              = llm,
+                               collection_name  = config.QDRANT_COLLECTION_NAME
+                               )
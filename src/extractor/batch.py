@@ -0,0 +1,217 @@
+# BATCH EXTRACTION FOR OFFLINE REPLAY OF CONVERSATION LOGS
+
+# DEPENDENCIES
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from config import config
+from logger.logger import LoggerSetup
+from src.parser.parser import parser
+from src.extractor.extractor import aextractor
+
+# LOGGER SETUP
+batch_logger = LoggerSetup(logger_name = "batch.py", log_filename_prefix = "batch").get_logger()
+
+
+def is_rate_limited(error : Exception) -> bool:
+    """
+    Return True if `error` is an HTTP 429 / rate-limit error from the LLM provider.
+    """
+
+    status_code = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+
+    return status_code == 429 or "rate limit" in str(error).lower() or type(error).__name__ == "RateLimitError"
+
+
+def _retry_after(error : Exception) -> float:
+    """
+    Seconds requested by the provider's `retry-after` header, if any.
+    """
+
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+
+    try:
+        return float(headers.get("retry-after"))
+
+    except (TypeError, ValueError):
+        return None
+
+
+async def _extract_one(llm : object, index : int, conversation : str, max_retries : int, base_delay : float, cache : object) -> dict:
+    """
+    Extract and parse one conversation, backing off on rate-limit errors.
+    """
+
+    started_at  = time.perf_counter()
+    attempts    = 0
+
+    while True:
+        attempts += 1
+
+        try:
+            response = await aextractor(llm = llm, conversation_history = conversation, cache = cache)
+
+            return {"index"        : index,
+                    "conversation" : conversation,
+                    "response"     : response,
+                    "parsed"       : parser(response = response),
+                    "latency"      : time.perf_counter() - started_at,
+                    "attempts"     : attempts,
+                    "error"        : None
+                    }
+
+        except Exception as e:
+            if not is_rate_limited(e) or attempts > max_retries:
+                return {"index"        : index,
+                        "conversation" : conversation,
+                        "response"     : None,
+                        "parsed"       : None,
+                        "latency"      : time.perf_counter() - started_at,
+                        "attempts"     : attempts,
+                        "error"        : repr(e)
+                        }
+
+            delay = _retry_after(e) or base_delay * (2 ** (attempts - 1)) * (1 + random.random())
+
+            batch_logger.warning(f"Rate limited on item {index}, retrying in {delay:.2f}s (attempt {attempts}/{max_retries})")
+
+            await asyncio.sleep(delay)
+
+
+async def abatch_extract(llm              : object,
+                         conversations    : object,
+                         max_concurrency  : int = 8,
+                         max_retries      : int = 5,
+                         base_delay       : float = 1.0,
+                         cache            : object = None
+                         ):
+    """
+    Run many conversations through `extractor` + `parser` concurrently, yielding results
+    as they complete.
+
+    At most `max_concurrency` LLM requests are in flight at once and the input iterable is
+    consumed lazily, so arbitrarily large logs can be replayed. Rate-limited requests are
+    retried with exponential backoff and jitter, honouring `retry-after` when present.
+
+    Arguments:
+
+        - `llm`                              {object}       : The language model instance (must support `.ainvoke(prompt)`).
+
+        - `conversations`                   {iterable}      : Conversation texts to extract.
+
+        - `max_concurrency`           {int, default = 8}    : Maximum number of concurrent LLM requests.
+
+        - `max_retries`               {int, default = 5}    : Retries per item after a rate-limit error.
+
+        - `base_delay`             {float, default = 1.0}   : Initial backoff delay in seconds.
+
+        - `cache`              {ExtractionCache, optional}  : Cache consulted before each LLM call.
+
+    Yields:
+
+        - dict
+            One result per conversation, in completion order, with the keys "index",
+            "conversation", "response", "parsed", "latency" (seconds), "attempts" and "error".
+    """
+
+    iterator  = iter(enumerate(conversations))
+    pending   = set()
+
+    def _schedule() -> bool:
+        try:
+            index, conversation = next(iterator)
+
+        except StopIteration:
+            return False
+
+        pending.add(asyncio.ensure_future(_extract_one(llm, index, conversation, max_retries, base_delay, cache)))
+
+        return True
+
+    while len(pending) < max_concurrency and _schedule():
+        pass
+
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when = asyncio.FIRST_COMPLETED)
+
+        for task in done:
+            yield task.result()
+            _schedule()
+
+
+def batch_extract(llm : object, conversations : object, **kwargs):
+    """
+    Synchronous wrapper around `abatch_extract`; yields the same results as they complete.
+    """
+
+    loop       = asyncio.new_event_loop()
+    generator  = abatch_extract(llm, conversations, **kwargs)
+
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(generator.__anext__())
+
+            except StopAsyncIteration:
+                break
+
+    finally:
+        loop.run_until_complete(generator.aclose())
+        loop.close()
+
+
+def _read_conversations(path : str):
+    with open(path, encoding = "utf-8") as input_file:
+        for line in input_file:
+            if line.strip():
+                record = json.loads(line)
+
+                yield record.get("conversation", record.get("query", ""))
+
+
+def main() -> None:
+    """
+    CLI: replay a JSONL file of conversations and write parsed results as JSONL.
+
+    Each input line is a JSON object with a "conversation" (or "query") field. Each output
+    line carries the input index, the raw response, the parsed slots, latency and errors.
+    """
+
+    argument_parser = argparse.ArgumentParser(description = "Batch extraction over a JSONL file of conversations.")
+    argument_parser.add_argument("--input", required = True, help = "Input JSONL file of conversations.")
+    argument_parser.add_argument("--output", required = True, help = "Output JSONL file for parsed results.")
+    argument_parser.add_argument("--concurrency", type = int, default = 8, help = "Maximum concurrent LLM requests.")
+    argument_parser.add_argument("--max-retries", type = int, default = 5, help = "Retries per item after a rate-limit error.")
+    arguments       = argument_parser.parse_args()
+
+    from src.llm.llm_builder import initialize_chatgroq_llm
+
+    llm             = initialize_chatgroq_llm(temperature      = config.LLM_TEMPERATURE,
+                                              groq_api_key     = config.GROQ_API_KEY,
+                                              model_name       = config.LLM_MODEL_NAME,
+                                              pool_size        = arguments.concurrency,
+                                              request_timeout  = config.LLM_REQUEST_TIMEOUT
+                                              )
+
+    started_at      = time.perf_counter()
+    completed       = 0
+    failed          = 0
+
+    with open(arguments.output, "w", encoding = "utf-8") as output_file:
+        for result in batch_extract(llm, _read_conversations(arguments.input), max_concurrency = arguments.concurrency, max_retries = arguments.max_retries):
+            output_file.write(json.dumps(result) + "\n")
+            completed += 1
+            failed    += result["error"] is not None
+
+    batch_logger.info(f"Batch extraction finished: {completed} items, {failed} failed, {time.perf_counter() - started_at:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+# EXTRACTION RESULT CACHE WITH LRU/TTL EVICTION
+
+# DEPENDENCIES
+
+import os
+import re
+import sys
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from logger.logger import LoggerSetup
+
+# LOGGER SETUP
+cache_logger = LoggerSetup(logger_name = "cache.py", log_filename_prefix = "cache").get_logger()
+
+
+def normalize_conversation(conversation_history : str) -> str:
+    """
+    Normalize a conversation so that phrasings differing only in case, punctuation or
+    whitespace share a cache key.
+
+    Word order is kept: "blue top and black jeans" and "black top and blue jeans" ask for
+    different products, as do "not black, I want blue" and "not blue, I want black". Line
+    order is preserved so that different conversations stay distinct.
+
+    Arguments:
+
+        - `conversation_history`        {str}      : The raw conversation text.
+
+    Returns:
+
+        - `normalized`                  {str}      : The normalized conversation text.
+    """
+
+    lines = []
+
+    for line in conversation_history.lower().splitlines():
+        tokens = re.findall(r"[a-z0-9&\-]+", line)
+
+        if tokens:
+            lines.append(" ".join(tokens))
+
+    return "\n".join(lines)
+
+
+def get_model_name(llm : object) -> str:
+    """
+    Best-effort model identifier for an LLM instance, used as part of the cache key.
+    """
+
+    return str(getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__)
+
+
+class ExtractionCache:
+    """
+    Bounded LRU cache with TTL for raw extractor responses, with an optional on-disk
+    (SQLite) backend that survives restarts.
+
+    The in-memory lock only guards the LRU; the disk tier has its own connection lock, so
+    memory hits never wait on SQLite. Disk errors (e.g. a write lock held by another worker
+    for longer than the busy timeout) are logged and treated as a miss or a skipped write.
+    """
+
+    def __init__(self, max_size : int = 1024, ttl : float = 3600, disk_path : str = None) -> None:
+        """
+        Arguments:
+
+            - `max_size`          {int, default = 1024}     : Maximum number of entries kept in memory.
+
+            - `ttl`              {float, default = 3600}    : Seconds an entry stays valid. None disables expiry.
+
+            - `disk_path`           {str, optional}         : Path of a SQLite file used as a persistent second tier.
+        """
+
+        self.max_size   = max_size
+        self.ttl        = ttl
+        self.hits       = 0
+        self.misses     = 0
+
+        self._entries   = OrderedDict()
+        self._lock      = threading.Lock()
+        self._disk      = None
+        self._disk_lock = threading.Lock()
+
+        if disk_path:
+            # WAL LETS WORKERS READ WHILE ANOTHER ONE WRITES; WRITERS WAIT UP TO 5 SECONDS FOR THE LOCK
+            self._disk  = sqlite3.connect(disk_path, check_same_thread = False, timeout = 5)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute("CREATE TABLE IF NOT EXISTS extraction_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)")
+            self._disk.commit()
+
+            cache_logger.info(f"Extraction cache disk backend opened at {disk_path}")
+
+    @staticmethod
+    def make_key(conversation_history : str, model_name : str) -> str:
+        """
+        Build the cache key from the normalized conversation and the model name.
+        """
+
+        raw = f"{model_name}\x00{normalize_conversation(conversation_history)}"
+
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key : str) -> str:
+        """
+        Return the cached response for `key`, or None on a miss or an expired entry.
+        """
+
+        now   = time.time()
+        value = self._get_memory(key, now)
+
+        if value is not None or self._disk is None:
+            return value
+
+        return self._get_disk(key, now)
+
+    async def aget(self, key : str) -> str:
+        """
+        Asynchronous `get` for event-loop callers: memory hits are answered directly, the disk
+        tier is read on a worker thread so SQLite never blocks the loop.
+        """
+
+        now   = time.time()
+        value = self._get_memory(key, now)
+
+        if value is not None or self._disk is None:
+            return value
+
+        return await asyncio.to_thread(self._get_disk, key, now)
+
+    def set(self, key : str, value : str) -> None:
+        """
+        Store `value` under `key`, evicting the least recently used entry when full.
+        """
+
+        expires_at = self._set_memory(key, value)
+
+        if self._disk is not None:
+            self._disk_execute("INSERT OR REPLACE INTO extraction_cache (key, value, expires_at) VALUES (?, ?, ?)", (key, value, expires_at))
+
+    async def aset(self, key : str, value : str) -> None:
+        """
+        Asynchronous `set` for event-loop callers; the disk tier is written on a worker thread.
+        """
+
+        expires_at = self._set_memory(key, value)
+
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk_execute, "INSERT OR REPLACE INTO extraction_cache (key, value, expires_at) VALUES (?, ?, ?)", (key, value, expires_at))
+
+    def _get_memory(self, key : str, now : float) -> str:
+        with self._lock:
+            entry                  = self._entries.get(key)
+
+            if entry is not None and (entry[1] is None or entry[1] > now):
+                self._entries.move_to_end(key)
+                self.hits         += 1
+
+                return entry[0]
+
+            if entry is not None:
+                del self._entries[key]
+
+            if self._disk is None:
+                self.misses       += 1
+
+            return None
+
+    def _get_disk(self, key : str, now : float) -> str:
+        row                        = self._disk_execute("SELECT value, expires_at FROM extraction_cache WHERE key = ?", (key,), fetch = True)
+
+        with self._lock:
+            if row is not None and (row[1] is None or row[1] > now):
+                self._store(key, row[0], row[1])
+                self.hits         += 1
+
+                return row[0]
+
+            self.misses           += 1
+
+            return None
+
+    def _set_memory(self, key : str, value : str) -> float:
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+
+        with self._lock:
+            self._store(key, value, expires_at)
+
+        return expires_at
+
+    def _disk_execute(self, statement : str, parameters : tuple = (), fetch : bool = False) -> tuple:
+        try:
+            with self._disk_lock:
+                cursor = self._disk.execute(statement, parameters)
+
+                if fetch:
+                    return cursor.fetchone()
+
+                self._disk.commit()
+
+        except sqlite3.Error as e:
+            cache_logger.warning(f"Extraction cache disk tier unavailable: {repr(e)}")
+
+        return None
+
+    def _store(self, key : str, value : str, expires_at : float) -> None:
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last = False)
+
+    def clear(self) -> None:
+        """
+        Drop every entry from memory and disk.
+        """
+
+        with self._lock:
+            self._entries.clear()
+
+        if self._disk is not None:
+            self._disk_execute("DELETE FROM extraction_cache")
+
+    def stats(self) -> dict:
+        """
+        Return hit/miss counters and the current in-memory size.
+        """
+
+        total = self.hits + self.misses
+
+        return {"hits"      : self.hits,
+                "misses"    : self.misses,
+                "hit_rate"  : self.hits / total if total else 0.0,
+                "size"      : len(self._entries)
+                }
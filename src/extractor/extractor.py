@@ -4,41 +4,90 @@
 
 import os
 import sys
+from functools import lru_cache
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
+from config import config
 from logger.logger import LoggerSetup
+from src.extractor.tokens import get_usage
+from src.extractor.tokens import count_tokens
+from src.extractor.cache import get_model_name
+from src.extractor.prompt_builder import MIN_HISTORY_TOKENS
+from src.extractor.prompt_builder import truncate_conversation
 
 # LOGGER SETUP
 extractor_logger = LoggerSetup(logger_name = "extractor.py", log_filename_prefix = "extractor").get_logger()
 
-def extractor(llm : object, conversation_history : str) -> str:
+def build_extractor_prompt(conversation_history : str, include_output_format : bool = True, token_budget : int = None) -> str:
     """
-    Extract structured product attributes from a fashion e-commerce conversation history.
+    Build the extraction prompt for a conversation history within a token budget.
 
-    This function uses a language model (LLM) to analyze a customer agent conversation
-    and infer key attributes of the primary product request. It focuses only on predefined
-    categories such as Category, Individual Category, Gender, and Colour. It also decides
-    whether enough information has been collected to proceed with product searching or if
-    a follow-up query is required.
+    The conversation is embedded once. If the full prompt would exceed `token_budget`,
+    older turns are dropped and replaced by a one-line summary of the product attributes
+    they mentioned, so prompt size stays bounded however long the chat gets.
 
     Arguments:
 
-        - `llm`                       {object}     : The language model instance (must support `.invoke(prompt)`).
-
         - `conversation_history`        {str}      : The conversation text containing customer queries and context.
 
+        - `include_output_format`  {bool, default = True} : Append the `Key: "value"` output format section. Structured
+                                                            output mode omits it because the schema defines the format.
+
+        - `token_budget`           {int, optional}  : Maximum prompt size in tokens. Defaults to `EXTRACTOR_TOKEN_BUDGET`
+                                                      from the configuration; 0 or None there disables truncation.
+
     Returns:
 
-        - str
-            A structured response from the LLM containing:
-            - Category
-            - Individual_category
-            - category_by_Gender
-            - colour
-            - MOVE_ON (true/false)
-            - FOLLOW_UP_MESSAGE (context-aware confirmation or follow-up question)
+        - `prompt`                      {str}      : The full prompt sent to the LLM by `extractor` and `aextractor`.
     """
 
+    token_budget = token_budget if token_budget is not None else config.EXTRACTOR_TOKEN_BUDGET
+
+    if token_budget:
+        conversation_history = truncate_conversation(conversation_history = conversation_history, max_tokens = _history_budget(token_budget, include_output_format))
+
+    return _render_prompt(conversation_history = conversation_history, include_output_format = include_output_format)
+
+
+@lru_cache(maxsize = 8)
+def _history_budget(token_budget : int, include_output_format : bool) -> int:
+    """
+    Tokens left for the conversation once the template is paid for, never less than
+    MIN_HISTORY_TOKENS: a budget smaller than the template cannot be met anyway, and the
+    latest message must stay readable.
+    """
+
+    history_budget = token_budget - _template_tokens(include_output_format)
+
+    if history_budget < MIN_HISTORY_TOKENS:
+        extractor_logger.warning(f"EXTRACTOR_TOKEN_BUDGET of {token_budget} leaves {history_budget} tokens for the conversation; using {MIN_HISTORY_TOKENS}")
+
+        return MIN_HISTORY_TOKENS
+
+    return history_budget
+
+
+@lru_cache(maxsize = 2)
+def _template_tokens(include_output_format : bool) -> int:
+    """
+    Token cost of the prompt template without any conversation.
+    """
+
+    return count_tokens(_render_prompt(conversation_history = "", include_output_format = include_output_format))
+
+
+def _render_prompt(conversation_history : str, include_output_format : bool) -> str:
+    output_format = '''    ## OUTPUT FORMAT ##
+    Respond with the information in the following format:
+
+    Category: "Extracted or inferred category for main product"
+    Individual_category: "Extracted or inferred individual category for main product"
+    category_by_Gender: "Extracted or inferred gender category"
+    colour: "Extracted or inferred colour for main product"
+    MOVE_ON: "true" or "false"
+    FOLLOW_UP_MESSAGE: "Your context-aware follow-up message"
+''' if include_output_format else ""
+
     prompt = f'''
     ## CONTEXT ##
     Analyze the following Fashion e-commerce conversation history:
@@ -48,10 +97,10 @@ def extractor(llm : object, conversation_history : str) -> str:
     Extract and infer relevant information about the customer's primary product request, focusing only on the parameters specified below. If multiple products are mentioned, focus on the first or main product. Make reasonable assumptions based on context, but do not introduce information outside the given categories.
 
     ## GUIDELINES ##
-    1. Category: Choose ONE from Indian Wear, Plus Size, Western, Sports Wear, Inner Wear & Sleep Wear, Lingerie & Sleep Wear. If none fit, use "Other". If multiple categories apply, choose the most relevant for the main product.
-    2. Individual Category: Choose ONE from kurta-sets, kurtas, tops, thermal-tops, jeans, skirts, shorts, trousers, palazzos, jumpsuit, co-ords, clothing-set, kurtis, tunics. If none fit, use "Other". This should correspond to the main product if multiple are mentioned.
+    1. Category: Choose ONE from {', '.join(config.CATEGORIES)}. If none fit, use "Other". If multiple categories apply, choose the most relevant for the main product.
+    2. Individual Category: Choose ONE from {', '.join(config.INDIVIDUAL_CATEGORIES)}. If none fit, use "Other". This should correspond to the main product if multiple are mentioned.
     3. Category by Gender: Choose Women or Men. If unclear, use your best judgment based on the conversation.
-    4. Colour: Choose from Black, Orange, Navy Blue, Red, Beige, Yellow, Green, Mustard, Teal, Peach, Blue, Sea Green, Pink, Burgundy, Maroon, Lavender, Purple, White, Grey, Lime Green, Brown, Cream, Rust, Off White, Turquoise Blue, Multi, Mauve, Assorted, Magenta, Fuchsia, Coral, Olive, Rose, Gold, Fluorescent Green, Silver, Nude, Violet, Charcoal, Grey Melange, Khaki, Coffee Brown, Taupe, Copper. If the color isn't listed or multiple colors are mentioned, use "Other" or the color of the main product.
+    4. Colour: Choose from {', '.join(config.COLOURS)}. If the color isn't listed or multiple colors are mentioned, use "Other" or the color of the main product.
     5. Move On: Determine if enough key information (at least Category, Individual Category, and one of either Colour or Category by Gender) has been gathered for the main product to proceed to product searching. Use "true" only if these are available, otherwise "false".
     6. Follow-up Message:
        - If Move On is "true", provide a confirmation message to proceed with searching for the main product.
@@ -66,25 +115,95 @@ def extractor(llm : object, conversation_history : str) -> str:
     - Stick strictly to the categories provided. Do not invent or introduce new parameters.
     - If information for a category is not available and can't be reasonably inferred, use "NA".
 
-    ## OUTPUT FORMAT ##
-    Respond with the information in the following format:
-
-    Category: "Extracted or inferred category for main product"
-    Individual_category: "Extracted or inferred individual category for main product"
-    category_by_Gender: "Extracted or inferred gender category"
-    colour: "Extracted or inferred colour for main product"
-    MOVE_ON: "true" or "false"
-    FOLLOW_UP_MESSAGE: "Your context-aware follow-up message"
-
-    Your Input: {conversation_history}
+{output_format}
     Your output:
     '''
 
+    return prompt
+
+def log_token_usage(prompt : str, response : object) -> dict:
+    """
+    Log the input/output token counts of one extractor call.
+
+    Provider-reported usage is preferred; missing counts are estimated from the text.
+
+    Arguments:
+
+        - `prompt`                    {str}        : The prompt sent to the LLM.
+
+        - `response`               {AIMessage}     : The LLM response.
+
+    Returns:
+
+        - dict
+            {"input_tokens": int, "output_tokens": int}
+    """
+
+    usage                     = get_usage(response)
+    usage["input_tokens"]     = usage["input_tokens"] or count_tokens(prompt)
+    usage["output_tokens"]    = usage["output_tokens"] or count_tokens(getattr(response, "content", str(response)))
+
+    extractor_logger.info(f"Extractor token usage - input: {usage['input_tokens']}, output: {usage['output_tokens']}")
+
+    return usage
+
+
+def extractor(llm : object, conversation_history : str, cache : object = None) -> str:
+    """
+    Extract structured product attributes from a fashion e-commerce conversation history.
+
+    This function uses a language model (LLM) to analyze a customer agent conversation
+    and infer key attributes of the primary product request. It focuses only on predefined
+    categories such as Category, Individual Category, Gender, and Colour. It also decides
+    whether enough information has been collected to proceed with product searching or if
+    a follow-up query is required.
+
+    Arguments:
+
+        - `llm`                       {object}     : The language model instance (must support `.invoke(prompt)`).
+
+        - `conversation_history`        {str}      : The conversation text containing customer queries and context.
+
+        - `cache`           {ExtractionCache, optional} : Cache consulted before the LLM call. On a hit the cached
+                                                          response is returned without invoking the LLM.
+
+    Returns:
+
+        - str
+            A structured response from the LLM containing:
+            - Category
+            - Individual_category
+            - category_by_Gender
+            - colour
+            - MOVE_ON (true/false)
+            - FOLLOW_UP_MESSAGE (context-aware confirmation or follow-up question)
+    """
+
     try:
 
+        cache_key    = None
+
+        if cache is not None:
+            cache_key       = cache.make_key(conversation_history = conversation_history, 
+                                             model_name           = get_model_name(llm)
+                                             )
+            cached_response = cache.get(cache_key)
+
+            if cached_response is not None:
+                extractor_logger.info("Extractor cache hit, skipping LLM invocation")
+
+                return cached_response
+
+        # THE PROMPT (AND ITS TOKEN COUNT) IS ONLY NEEDED ON A CACHE MISS
+        prompt   = build_extractor_prompt(conversation_history = conversation_history)
         response = llm.invoke(prompt)
         extractor_logger.debug(f"Extractor LLM response: {response}")
 
+        log_token_usage(prompt = prompt, response = response)
+
+        if cache is not None:
+            cache.set(cache_key, response.content)
+
         return response.content ## FOR CHATGROQ
 
         # if isinstance(response, str):
@@ -100,4 +219,169 @@ def extractor(llm : object, conversation_history : str) -> str:
     except Exception as e:
         extractor_logger.error(f"Error during LLM invocation in extractor: {repr(e)}")
         
-        raise e
\ No newline at end of file
+        raise e
+
+
+async def aextractor(llm : object, conversation_history : str, cache : object = None) -> str:
+    """
+    Asynchronous counterpart of `extractor` using the LLM's `ainvoke`.
+
+    The event loop is released while the LLM request is in flight, so one process can
+    hold many concurrent conversations waiting on the LLM.
+
+    Arguments:
+
+        - `llm`                       {object}     : The language model instance (must support `.ainvoke(prompt)`).
+
+        - `conversation_history`        {str}      : The conversation text containing customer queries and context.
+
+        - `cache`           {ExtractionCache, optional} : Cache consulted before the LLM call.
+
+    Returns:
+
+        - str
+            The same structured response as `extractor`.
+    """
+
+    try:
+
+        cache_key    = None
+
+        if cache is not None:
+            cache_key       = cache.make_key(conversation_history = conversation_history, 
+                                             model_name           = get_model_name(llm)
+                                             )
+            cached_response = await cache.aget(cache_key)
+
+            if cached_response is not None:
+                extractor_logger.info("Extractor cache hit, skipping LLM invocation")
+
+                return cached_response
+
+        # THE PROMPT (AND ITS TOKEN COUNT) IS ONLY NEEDED ON A CACHE MISS
+        prompt   = build_extractor_prompt(conversation_history = conversation_history)
+        response = await llm.ainvoke(prompt)
+        extractor_logger.debug(f"Extractor LLM response: {response}")
+
+        log_token_usage(prompt = prompt, response = response)
+
+        if cache is not None:
+            await cache.aset(cache_key, response.content)
+
+        return response.content
+
+    except Exception as e:
+        extractor_logger.error(f"Error during async LLM invocation in extractor: {repr(e)}")
+        
+        raise e
+
+def stream_extractor(llm : object, conversation_history : str, cache : object = None):
+    """
+    Streaming counterpart of `extractor`: yields the LLM response text as it is generated.
+
+    On a cache hit the cached response is yielded as a single chunk. After a full stream
+    the complete response is stored in the cache.
+
+    Arguments:
+
+        - `llm`                       {object}     : The language model instance (must support `.stream(prompt)`).
+
+        - `conversation_history`        {str}      : The conversation text containing customer queries and context.
+
+        - `cache`           {ExtractionCache, optional} : Cache consulted before the LLM call.
+
+    Yields:
+
+        - str
+            Successive chunks of the structured response.
+    """
+
+    try:
+
+        cache_key    = None
+
+        if cache is not None:
+            cache_key       = cache.make_key(conversation_history = conversation_history, 
+                                             model_name           = get_model_name(llm)
+                                             )
+            cached_response = cache.get(cache_key)
+
+            if cached_response is not None:
+                extractor_logger.info("Extractor cache hit, skipping LLM invocation")
+
+                yield cached_response
+
+                return
+
+        # THE PROMPT (AND ITS TOKEN COUNT) IS ONLY NEEDED ON A CACHE MISS
+        prompt = build_extractor_prompt(conversation_history = conversation_history)
+        chunks = []
+
+        for chunk in llm.stream(prompt):
+            text = chunk.content if hasattr(chunk, "content") else str(chunk)
+            chunks.append(text)
+
+            yield text
+
+        if cache is not None:
+            cache.set(cache_key, "".join(chunks))
+
+    except Exception as e:
+        extractor_logger.error(f"Error during streaming LLM invocation in extractor: {repr(e)}")
+        
+        raise e
+
+
+async def astream_extractor(llm : object, conversation_history : str, cache : object = None):
+    """
+    Asynchronous counterpart of `stream_extractor` using the LLM's `astream`, so the event
+    loop keeps serving other requests between chunks.
+
+    Arguments:
+
+        - `llm`                       {object}     : The language model instance (must support `.astream(prompt)`).
+
+        - `conversation_history`        {str}      : The conversation text containing customer queries and context.
+
+        - `cache`           {ExtractionCache, optional} : Cache consulted before the LLM call.
+
+    Yields:
+
+        - str
+            Successive chunks of the structured response.
+    """
+
+    try:
+
+        cache_key    = None
+
+        if cache is not None:
+            cache_key       = cache.make_key(conversation_history = conversation_history, 
+                                             model_name           = get_model_name(llm)
+                                             )
+            cached_response = await cache.aget(cache_key)
+
+            if cached_response is not None:
+                extractor_logger.info("Extractor cache hit, skipping LLM invocation")
+
+                yield cached_response
+
+                return
+
+        # THE PROMPT (AND ITS TOKEN COUNT) IS ONLY NEEDED ON A CACHE MISS
+        prompt = build_extractor_prompt(conversation_history = conversation_history)
+        chunks = []
+
+        async for chunk in llm.astream(prompt):
+            text = chunk.content if hasattr(chunk, "content") else str(chunk)
+            chunks.append(text)
+
+            yield text
+
+        if cache is not None:
+            await cache.aset(cache_key, "".join(chunks))
+
+    except Exception as e:
+        extractor_logger.error(f"Error during async streaming LLM invocation in extractor: {repr(e)}")
+        
+        raise e
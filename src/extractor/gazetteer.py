@@ -0,0 +1,201 @@
+# DETERMINISTIC GAZETTEER FAST PATH FOR UNAMBIGUOUS QUERIES
+
+# DEPENDENCIES
+
+import os
+import re
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from config import config
+from logger.logger import LoggerSetup
+
+# LOGGER SETUP
+gazetteer_logger = LoggerSetup(logger_name = "gazetteer.py", log_filename_prefix = "gazetteer").get_logger()
+
+# SYNONYMS, PLURALS AND SPELLING VARIANTS ON TOP OF THE CLOSED VOCABULARIES IN config.py
+SYNONYMS                    = {"Category"             : {"Indian Wear"              : ["ethnic", "ethnic wear", "indian", "traditional"],
+                                                         "Plus Size"                : ["plus-size", "plus sizes"],
+                                                         "Sports Wear"              : ["sportswear", "sport wear", "activewear", "active wear", "gym wear"],
+                                                         "Inner Wear & Sleep Wear"  : ["inner wear", "innerwear"],
+                                                         "Lingerie & Sleep Wear"    : ["lingerie"],
+                                                         },
+                               "Individual_category"  : {"kurta-sets"    : ["kurta set", "kurta sets", "kurtaset", "kurtasets"],
+                                                         "kurtas"        : ["kurta"],
+                                                         "tops"          : ["top"],
+                                                         "thermal-tops"  : ["thermal top", "thermal tops", "thermals", "thermal"],
+                                                         "jeans"         : ["jean", "denims", "denim jeans"],
+                                                         "skirts"        : ["skirt"],
+                                                         "shorts"        : ["short"],
+                                                         "trousers"      : ["trouser", "pants", "pant"],
+                                                         "palazzos"      : ["palazzo", "palazzo pants"],
+                                                         "jumpsuit"      : ["jumpsuits"],
+                                                         "co-ords"       : ["co-ord", "coord", "coords", "co-ord set", "co-ord sets"],
+                                                         "clothing-set"  : ["clothing set", "clothing sets"],
+                                                         "kurtis"        : ["kurti"],
+                                                         "tunics"        : ["tunic"],
+                                                         },
+                               "category_by_Gender"   : {"Women"  : ["woman", "womens", "women's", "ladies", "lady", "female", "females", "girl", "girls", "wife", "sister", "mother", "mom"],
+                                                         "Men"    : ["man", "mens", "men's", "male", "males", "boy", "boys", "husband", "brother", "father", "dad"],
+                                                         },
+                               "colour"               : {"Grey"        : ["gray"],
+                                                         "Navy Blue"   : ["navy"],
+                                                         "Multi"       : ["multicolour", "multicolor", "multi-colour", "multi-color", "multicoloured", "multicolored"],
+                                                         "Off White"   : ["off-white"],
+                                                         "Grey Melange": ["gray melange"],
+                                                         },
+                               }
+
+# CATEGORY IMPLIED BY AN INDIVIDUAL CATEGORY, ONLY WHERE THE MAPPING IS UNAMBIGUOUS
+IMPLIED_CATEGORY            = {"kurta-sets"    : "Indian Wear",
+                               "kurtas"        : "Indian Wear",
+                               "kurtis"        : "Indian Wear",
+                               "palazzos"      : "Indian Wear",
+                               "tops"          : "Western",
+                               "jeans"         : "Western",
+                               "skirts"        : "Western",
+                               "trousers"      : "Western",
+                               "jumpsuit"      : "Western",
+                               "co-ords"       : "Western",
+                               "thermal-tops"  : "Inner Wear & Sleep Wear",
+                               }
+
+# WORDS THAT MAKE A QUERY TOO NUANCED FOR LITERAL MATCHING
+NEGATION_WORDS              = {"not", "no", "without", "except", "dont", "don't", "isn't", "other", "than", "instead", "but"}
+
+_TOKEN_PATTERN              = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def _tokenize(text : str) -> list:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def _build_trie() -> dict:
+    """
+    Compile every vocabulary entry and synonym into a token-level trie.
+
+    Each node maps a token to its child node; a node that ends a phrase carries the
+    (slot, canonical value) pair under the `None` key.
+    """
+
+    vocabularies = {"Category"             : config.CATEGORIES,
+                    "Individual_category"  : config.INDIVIDUAL_CATEGORIES,
+                    "category_by_Gender"   : config.GENDERS,
+                    "colour"               : config.COLOURS,
+                    }
+
+    trie         = {}
+
+    for slot, values in vocabularies.items():
+        for value in values:
+            phrases  = [value] + SYNONYMS.get(slot, {}).get(value, [])
+
+            for phrase in phrases:
+                node = trie
+
+                for token in _tokenize(phrase):
+                    node = node.setdefault(token, {})
+
+                node[None] = (slot, value)
+
+    return trie
+
+
+_TRIE                       = _build_trie()
+
+
+def match_slots(text : str) -> dict:
+    """
+    Find every vocabulary mention in `text` using greedy longest-match over the trie.
+
+    Arguments:
+
+        - `text`                {str}       : The user text to scan.
+
+    Returns:
+
+        - dict
+            A mapping of slot name to the set of canonical values mentioned for it.
+    """
+
+    tokens   = _tokenize(text)
+    matches  = {"Category" : set(), "Individual_category" : set(), "category_by_Gender" : set(), "colour" : set()}
+    position = 0
+
+    while position < len(tokens):
+        node       = _TRIE
+        best       = None
+        best_end   = position
+
+        for index in range(position, len(tokens)):
+            node   = node.get(tokens[index])
+
+            if node is None:
+                break
+
+            if None in node:
+                best, best_end = node[None], index + 1
+
+        if best is not None:
+            matches[best[0]].add(best[1])
+            position = best_end
+
+        else:
+            position += 1
+
+    return matches
+
+
+def gazetteer_extract(conversation_history : str) -> dict:
+    """
+    Extract the product slots without an LLM call when the query is unambiguous.
+
+    The query is answered here only if every slot has at most one candidate value, no
+    negation is present, Category and Individual_category are known (Category may be
+    implied by the Individual category) and either colour or gender is known. Otherwise
+    None is returned and the caller should fall back to `extractor` + `parser`.
+
+    Arguments:
+
+        - `conversation_history`        {str}      : The conversation text containing customer queries.
+
+    Returns:
+
+        - dict or None
+            The same dictionary shape as `parser()` with "MOVE_ON" set to True, or None
+            when the query needs the LLM.
+    """
+
+    if NEGATION_WORDS.intersection(_tokenize(conversation_history)):
+        return None
+
+    matches    = match_slots(conversation_history)
+
+    if any(len(values) > 1 for values in matches.values()):
+        return None
+
+    slots      = {slot: next(iter(values)) if values else "NA" for slot, values in matches.items()}
+
+    if slots["Category"] == "NA":
+        slots["Category"] = IMPLIED_CATEGORY.get(slots["Individual_category"], "NA")
+
+    if slots["Category"] == "NA" or slots["Individual_category"] == "NA":
+        return None
+
+    if slots["colour"] == "NA" and slots["category_by_Gender"] == "NA":
+        return None
+
+    description = " ".join(value for value in (slots["colour"].lower() if slots["colour"] != "NA" else "", slots["Individual_category"]) if value)
+    audience    = f" for {slots['category_by_Gender'].lower()}" if slots["category_by_Gender"] != "NA" else ""
+
+    parsed_data = {"Category"             : slots["Category"],
+                   "Individual_category"  : slots["Individual_category"],
+                   "category_by_Gender"   : slots["category_by_Gender"],
+                   "colour"               : slots["colour"],
+                   "MOVE_ON"              : True,
+                   "FOLLOW_UP_MESSAGE"    : f"Great choice! Searching our {slots['Category']} collection for {description}{audience}."
+                   }
+
+    gazetteer_logger.info(f"Gazetteer fast path matched: {parsed_data}")
+
+    return parsed_data
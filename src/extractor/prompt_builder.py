@@ -0,0 +1,96 @@
+# CONVERSATION TRUNCATION FOR THE TOKEN-BUDGETED EXTRACTOR PROMPT
+
+# DEPENDENCIES
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from logger.logger import LoggerSetup
+from src.extractor.tokens import count_tokens
+from src.extractor.gazetteer import match_slots
+
+# LOGGER SETUP
+prompt_builder_logger = LoggerSetup(logger_name = "prompt_builder.py", log_filename_prefix = "prompt_builder").get_logger()
+
+# SMALLEST CONVERSATION BUDGET THAT STILL KEEPS THE LATEST MESSAGE READABLE
+MIN_HISTORY_TOKENS    = 64
+
+
+def summarize_turns(turns : list) -> str:
+    """
+    Summarize dropped conversation turns as the product attributes they mentioned.
+
+    The summary is deterministic (vocabulary matching, no LLM call), so it is cheap and
+    keeps the slot information the extractor needs from older turns.
+
+    Arguments:
+
+        - `turns`                      {list}      : The conversation turns being dropped.
+
+    Returns:
+
+        - `summary`                    {str}       : A single summary line.
+    """
+
+    matches    = match_slots("\n".join(turns))
+    mentioned  = [f"{slot}: {', '.join(sorted(values))}" for slot, values in matches.items() if values]
+
+    if mentioned:
+        return f"[{len(turns)} earlier messages omitted; they mentioned {'; '.join(mentioned)}]"
+
+    return f"[{len(turns)} earlier messages omitted]"
+
+
+def truncate_conversation(conversation_history : str, max_tokens : int) -> str:
+    """
+    Fit a conversation into `max_tokens` by keeping the most recent turns.
+
+    Turns are lines of the conversation. Older turns that do not fit are replaced by a
+    one-line summary from `summarize_turns`. If even the latest turn alone is too long,
+    its beginning is cut.
+
+    Arguments:
+
+        - `conversation_history`        {str}      : The conversation text, one turn per line.
+
+        - `max_tokens`                  {int}      : Token budget for the conversation, at least MIN_HISTORY_TOKENS.
+
+    Returns:
+
+        - `conversation`                {str}      : The conversation, unchanged if it already fits.
+
+    Raises:
+
+        - `ValueError`                             : If `max_tokens` is below MIN_HISTORY_TOKENS.
+    """
+
+    if max_tokens < MIN_HISTORY_TOKENS:
+        raise ValueError(f"max_tokens must be at least {MIN_HISTORY_TOKENS}, got {max_tokens}")
+
+    if count_tokens(conversation_history) <= max_tokens:
+        return conversation_history
+
+    turns      = [turn for turn in conversation_history.splitlines() if turn.strip()]
+    kept       = []
+    used       = count_tokens(summarize_turns(turns))
+
+    for turn in reversed(turns):
+        cost   = count_tokens(turn) + 1
+
+        if used + cost > max_tokens:
+            break
+
+        kept.insert(0, turn)
+        used  += cost
+
+    dropped    = turns[:len(turns) - len(kept)]
+
+    if not kept:
+        # KEEP THE END OF THE LATEST TURN, ROUGHLY 4 CHARACTERS PER TOKEN
+        kept    = [turns[-1][-max_tokens * 4:]]
+        dropped = turns[:-1]
+
+    prompt_builder_logger.info(f"Conversation truncated to fit {max_tokens} tokens: kept {len(kept)} turns, summarized {len(dropped)}")
+
+    return "\n".join(([summarize_turns(dropped)] if dropped else []) + kept)
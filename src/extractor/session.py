@@ -0,0 +1,280 @@
+# SERVER-SIDE CONVERSATION SESSIONS FOR INCREMENTAL SLOT EXTRACTION
+
+# DEPENDENCIES
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from config import config
+from logger.logger import LoggerSetup
+
+# LOGGER SETUP
+session_logger = LoggerSetup(logger_name = "session.py", log_filename_prefix = "session").get_logger()
+
+# SLOTS CARRIED FROM ONE TURN TO THE NEXT
+SESSION_SLOTS          = ["Category", "Individual_category", "category_by_Gender", "colour"]
+
+# LONGER CLIENT-SUPPLIED SESSION IDS ARE REJECTED
+MAX_SESSION_ID_LENGTH  = 128
+
+
+def format_session_context(message : str, slots : dict) -> str:
+    """
+    Build the extractor input for one turn of a session: a one-line summary of the slots
+    known so far followed by the new user message.
+
+    The summary replaces the full conversation history, so the prompt stays the same size
+    however long the chat gets. Values are written with their vocabulary spelling, so the
+    gazetteer fast path can still answer from summary + message.
+
+    Arguments:
+
+        - `message`                     {str}      : The new user message.
+
+        - `slots`                      {dict}      : The slots of the session so far.
+
+    Returns:
+
+        - `context`                     {str}      : The text passed to the extractor as the conversation history.
+    """
+
+    known = [f'{slot}: "{slots[slot]}"' for slot in SESSION_SLOTS if slots.get(slot, "NA") != "NA"]
+
+    if not known:
+        return message
+
+    return f"[Known so far: {'; '.join(known)}]\n{message}"
+
+
+def merge_slots(previous : dict, response : dict) -> dict:
+    """
+    Merge the slots extracted from the latest turn into those of the session.
+
+    A slot the latest turn did not determine ("NA") keeps its earlier value; every other
+    value, MOVE_ON and FOLLOW_UP_MESSAGE come from the latest turn.
+
+    Returns
+
+        - dict
+            The same dictionary shape as `parser()`.
+    """
+
+    merged = dict(response)
+
+    for slot in SESSION_SLOTS:
+        if merged.get(slot, "NA") == "NA" and previous.get(slot, "NA") != "NA":
+            merged[slot] = previous[slot]
+
+    return merged
+
+
+class SessionStore:
+    """
+    Interface of a session backend: JSON-serializable state per session ID, expiring
+    `ttl` seconds after its last use.
+
+    Backends implement `_load`, `_save` and `delete`; `get` and `set` add the ID checks.
+    """
+
+    def __init__(self, ttl : float = 1800) -> None:
+        self.ttl = ttl
+
+    def get(self, session_id : str) -> dict:
+        """
+        Return the state of `session_id`, or None for an unknown, expired or invalid ID.
+        """
+
+        if not session_id or len(session_id) > MAX_SESSION_ID_LENGTH:
+            return None
+
+        return self._load(session_id)
+
+    def set(self, session_id : str, state : dict) -> None:
+        """
+        Store `state` for `session_id` and restart its expiry.
+        """
+
+        if not session_id or len(session_id) > MAX_SESSION_ID_LENGTH:
+            return
+
+        self._save(session_id, state)
+
+    def delete(self, session_id : str) -> None:
+        raise NotImplementedError
+
+    def _load(self, session_id : str) -> dict:
+        raise NotImplementedError
+
+    def _save(self, session_id : str, state : dict) -> None:
+        raise NotImplementedError
+
+    def _expires_at(self) -> float:
+        return time.time() + self.ttl if self.ttl is not None else None
+
+
+class MemorySessionStore(SessionStore):
+    """
+    In-process session store with LRU eviction and a sliding TTL. Sessions are local to
+    one worker process.
+    """
+
+    def __init__(self, ttl : float = 1800, max_size : int = 10000) -> None:
+        """
+        Arguments:
+
+            - `ttl`              {float, default = 1800}    : Seconds a session lives after its last turn. None disables expiry.
+
+            - `max_size`          {int, default = 10000}    : Maximum number of sessions kept.
+        """
+
+        super().__init__(ttl = ttl)
+
+        self.max_size  = max_size
+
+        self._entries  = OrderedDict()
+        self._lock     = threading.Lock()
+
+    def _load(self, session_id : str) -> dict:
+        with self._lock:
+            entry = self._entries.get(session_id)
+
+            if entry is None:
+                return None
+
+            if entry[1] is not None and entry[1] <= time.time():
+                del self._entries[session_id]
+
+                return None
+
+            self._entries.move_to_end(session_id)
+
+            return json.loads(entry[0])
+
+    def _save(self, session_id : str, state : dict) -> None:
+        with self._lock:
+            self._entries[session_id] = (json.dumps(state), self._expires_at())
+            self._entries.move_to_end(session_id)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last = False)
+
+    def delete(self, session_id : str) -> None:
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session store in a SQLite file, shared by every worker process of the host and kept
+    across restarts.
+    """
+
+    def __init__(self, path : str, ttl : float = 1800) -> None:
+        """
+        Arguments:
+
+            - `path`                    {str}               : Path of the SQLite file.
+
+            - `ttl`              {float, default = 1800}    : Seconds a session lives after its last turn. None disables expiry.
+        """
+
+        super().__init__(ttl = ttl)
+
+        self._lock  = threading.Lock()
+        self._db    = sqlite3.connect(path, check_same_thread = False, timeout = 5)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, state TEXT NOT NULL, expires_at REAL)")
+        self._db.commit()
+
+        session_logger.info(f"Session store opened at {path}")
+
+    def _load(self, session_id : str) -> dict:
+        with self._lock:
+            row = self._db.execute("SELECT state, expires_at FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+
+        return json.loads(row[0])
+
+    def _save(self, session_id : str, state : dict) -> None:
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO sessions (session_id, state, expires_at) VALUES (?, ?, ?)", (session_id, json.dumps(state), self._expires_at()))
+
+            # EXPIRED SESSIONS ARE PURGED WHILE WRITING, SO THE FILE DOES NOT GROW WITHOUT BOUND
+            self._db.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+
+    def delete(self, session_id : str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._db.commit()
+
+
+# BACKEND NAME -> FACTORY BUILDING THE STORE FROM THE CONFIGURATION
+SESSION_BACKENDS       = {"memory"  : lambda: MemorySessionStore(ttl = config.SESSION_TTL, max_size = config.SESSION_MAX_SIZE),
+                          "sqlite"  : lambda: SQLiteSessionStore(path = config.SESSION_STORE_PATH, ttl = config.SESSION_TTL),
+                          }
+
+
+def build_session_store(backend : str = None) -> SessionStore:
+    """
+    Build the session store of `backend` ("memory" or "sqlite", defaults to `SESSION_BACKEND`).
+
+    Other backends (e.g. Redis) can be plugged in by adding a `SessionStore` subclass to
+    `SESSION_BACKENDS`.
+
+    Raises
+
+        - `ValueError`                                 : If the backend is unknown.
+    """
+
+    backend = backend or config.SESSION_BACKEND
+
+    if backend not in SESSION_BACKENDS:
+        raise ValueError(f"Unknown session backend: {backend}. Choose one of {list(SESSION_BACKENDS)}.")
+
+    return SESSION_BACKENDS[backend]()
+
+
+def begin_turn(store : SessionStore, session_id : str, message : str) -> tuple:
+    """
+    Load the session of `session_id` and build the extractor input for `message`.
+
+    Returns
+
+        - tuple
+            (context, state): the text to extract from, and the session state (None without a session).
+    """
+
+    state = store.get(session_id) if store is not None and session_id else None
+
+    if state is None:
+        return message, None
+
+    return format_session_context(message = message, slots = state["slots"]), state
+
+
+def end_turn(store : SessionStore, session_id : str, state : dict, response : dict) -> dict:
+    """
+    Merge the slots of this turn into the session, store it and return the merged slots.
+    Without a session ID the response is returned unchanged.
+    """
+
+    if store is None or not session_id:
+        return response
+
+    merged = merge_slots((state or {}).get("slots", {}), response)
+
+    store.set(session_id, {"slots" : {slot: merged[slot] for slot in SESSION_SLOTS},
+                           "turns" : (state or {}).get("turns", 0) + 1
+                           })
+
+    return merged
@@ -0,0 +1,196 @@
+# STRUCTURED (TOOL-CALLING) OUTPUT MODE FOR THE EXTRACTOR
+
+# DEPENDENCIES
+
+import os
+import sys
+import threading
+from typing import Literal
+from pydantic import Field
+from pydantic import BaseModel
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from config import config
+from logger.logger import LoggerSetup
+from src.parser.parser import parser
+from src.extractor.tokens import get_usage
+from src.extractor.tokens import count_tokens
+from src.extractor.extractor import extractor
+from src.extractor.extractor import aextractor
+from src.extractor.cache import get_model_name
+from src.extractor.extractor import build_extractor_prompt
+
+# LOGGER SETUP
+structured_logger = LoggerSetup(logger_name = "structured.py", log_filename_prefix = "structured").get_logger()
+
+
+class ExtractedSlots(BaseModel):
+    """
+    Product attributes of the customer's main product request.
+    """
+
+    Category             : Literal[tuple(config.CATEGORIES + ["Other", "NA"])]             = Field(description = "Category of the main product.")
+    Individual_category  : Literal[tuple(config.INDIVIDUAL_CATEGORIES + ["Other", "NA"])]  = Field(description = "Individual category of the main product.")
+    category_by_Gender   : Literal[tuple(config.GENDERS + ["NA"])]                         = Field(description = "Gender the product is for.")
+    colour               : Literal[tuple(config.COLOURS + ["Other", "NA"])]                = Field(description = "Colour of the main product.")
+    MOVE_ON              : bool                                                            = Field(description = "True only if Category, Individual category and either colour or gender are known.")
+    FOLLOW_UP_MESSAGE    : str                                                             = Field(description = "Confirmation message, or a question asking for the missing information.")
+
+
+# CUMULATIVE TOKEN ACCOUNTING FOR THE STRUCTURED MODE IN THIS PROCESS
+structured_stats        = {"calls"                      : 0,
+                           "fallbacks"                  : 0,
+                           "structured_output_tokens"   : 0,
+                           "text_output_tokens"         : 0,
+                           "tokens_saved"               : 0
+                           }
+
+_stats_lock             = threading.Lock()
+
+
+def format_slots_as_text(parsed_data : dict) -> str:
+    """
+    Render parsed slots in the extractor's `Key: "value"` text format, so that they can be
+    cached and re-read by `parser()`.
+    """
+
+    return "\n".join(f'{key}: "{str(value).lower() if key == "MOVE_ON" else value}"' for key, value in parsed_data.items())
+
+
+def _accept_structured_output(output : dict) -> tuple:
+    """
+    Validate a `with_structured_output(..., include_raw = True)` result and account its
+    output tokens against the text format.
+
+    Returns
+
+        - tuple
+            (parsed slots dict, the same slots in the text format for the cache)
+
+    Raises
+
+        - `ValueError`                                 : If the output failed validation.
+    """
+
+    if output.get("parsing_error") is not None or output.get("parsed") is None:
+        raise ValueError(f"Structured output failed validation: {output.get('parsing_error')}")
+
+    parsed_data    = output["parsed"].model_dump()
+    text_response  = format_slots_as_text(parsed_data)
+
+    output_tokens  = get_usage(output["raw"])["output_tokens"] or count_tokens(output["parsed"].model_dump_json())
+    text_tokens    = count_tokens(text_response)
+
+    with _stats_lock:
+        structured_stats["calls"]                     += 1
+        structured_stats["structured_output_tokens"]  += output_tokens
+        structured_stats["text_output_tokens"]        += text_tokens
+        structured_stats["tokens_saved"]              += text_tokens - output_tokens
+
+    structured_logger.info(f"Structured extraction used {output_tokens} output tokens vs ~{text_tokens} in text format (saved {text_tokens - output_tokens})")
+
+    return parsed_data, text_response
+
+
+def structured_extractor(llm : object, conversation_history : str, cache : object = None) -> dict:
+    """
+    Extract the product slots with the model's structured output (function calling) support.
+
+    The slots are constrained by an enum schema built from the closed vocabularies and
+    validated in a single pass, so no line splitting is needed. The output token count is
+    compared with the same answer in the text format and the saving is logged and
+    accumulated in `structured_stats`. If the model does not support tool calling or the
+    output fails validation, the text `extractor` + `parser` path is used instead.
+
+    Arguments:
+
+        - `llm`                       {object}     : The language model instance (must support `.with_structured_output`).
+
+        - `conversation_history`        {str}      : The conversation text containing customer queries and context.
+
+        - `cache`           {ExtractionCache, optional} : Cache consulted before the LLM call. Entries are stored in
+                                                          the text format, so they are shared with the text mode.
+
+    Returns:
+
+        - dict
+            The same dictionary shape as `parser()`.
+    """
+
+    cache_key          = None
+
+    if cache is not None:
+        cache_key      = cache.make_key(conversation_history = conversation_history, 
+                                        model_name           = get_model_name(llm)
+                                        )
+        cached_response = cache.get(cache_key)
+
+        if cached_response is not None:
+            structured_logger.info("Extractor cache hit, skipping LLM invocation")
+
+            return parser(response = cached_response)
+
+    prompt             = build_extractor_prompt(conversation_history = conversation_history, include_output_format = False)
+
+    try:
+
+        structured_llm = llm.with_structured_output(ExtractedSlots, method = "function_calling", include_raw = True)
+        parsed_data, text_response = _accept_structured_output(structured_llm.invoke(prompt))
+
+        if cache is not None:
+            cache.set(cache_key, text_response)
+
+        return parsed_data
+
+    except Exception as e:
+        structured_logger.warning(f"Structured extraction failed, falling back to the text parser: {repr(e)}")
+
+        with _stats_lock:
+            structured_stats["fallbacks"] += 1
+
+        return parser(response = extractor(llm = llm, conversation_history = conversation_history, cache = cache))
+
+
+async def astructured_extractor(llm : object, conversation_history : str, cache : object = None) -> dict:
+    """
+    Asynchronous counterpart of `structured_extractor` using `ainvoke`, falling back to
+    `aextractor` + `parser` the same way.
+
+    Returns:
+
+        - dict
+            The same dictionary shape as `parser()`.
+    """
+
+    cache_key          = None
+
+    if cache is not None:
+        cache_key      = cache.make_key(conversation_history = conversation_history, 
+                                        model_name           = get_model_name(llm)
+                                        )
+        cached_response = await cache.aget(cache_key)
+
+        if cached_response is not None:
+            structured_logger.info("Extractor cache hit, skipping LLM invocation")
+
+            return parser(response = cached_response)
+
+    prompt             = build_extractor_prompt(conversation_history = conversation_history, include_output_format = False)
+
+    try:
+
+        structured_llm = llm.with_structured_output(ExtractedSlots, method = "function_calling", include_raw = True)
+        parsed_data, text_response = _accept_structured_output(await structured_llm.ainvoke(prompt))
+
+        if cache is not None:
+            await cache.aset(cache_key, text_response)
+
+        return parsed_data
+
+    except Exception as e:
+        structured_logger.warning(f"Structured extraction failed, falling back to the text parser: {repr(e)}")
+
+        with _stats_lock:
+            structured_stats["fallbacks"] += 1
+
+        return parser(response = await aextractor(llm = llm, conversation_history = conversation_history, cache = cache))
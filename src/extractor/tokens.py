@@ -0,0 +1,79 @@
+# TOKEN COUNTING AND USAGE ACCOUNTING FOR LLM CALLS
+
+# DEPENDENCIES
+
+import os
+import sys
+from functools import lru_cache
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from logger.logger import LoggerSetup
+
+# LOGGER SETUP
+tokens_logger = LoggerSetup(logger_name = "tokens.py", log_filename_prefix = "tokens").get_logger()
+
+
+@lru_cache(maxsize = 1)
+def _get_encoding() -> object:
+    """
+    Load the tiktoken `cl100k_base` encoding once, or return None if tiktoken is not installed.
+    """
+
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+
+    except Exception:
+        tokens_logger.info("tiktoken not available, falling back to a 4 characters per token estimate")
+
+        return None
+
+
+def count_tokens(text : str) -> int:
+    """
+    Count (or estimate) the number of tokens in `text`.
+
+    Uses tiktoken's `cl100k_base` encoding when available, which is close to the Llama 3
+    tokenizer for English text; otherwise estimates 4 characters per token.
+
+    Arguments:
+
+        - `text`                {str}       : The text to measure.
+
+    Returns:
+
+        - `tokens`              {int}       : The token count.
+    """
+
+    encoding = _get_encoding()
+
+    if encoding is not None:
+        return len(encoding.encode(text))
+
+    return max(1, len(text) // 4) if text else 0
+
+
+def get_usage(response : object) -> dict:
+    """
+    Extract input/output token usage reported by the provider for an LLM response.
+
+    Arguments:
+
+        - `response`          {AIMessage}     : The message returned by `llm.invoke`.
+
+    Returns:
+
+        - dict
+            {"input_tokens": int or None, "output_tokens": int or None}
+    """
+
+    usage = getattr(response, "usage_metadata", None) or {}
+
+    if not usage:
+        token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage", {})
+        usage       = {"input_tokens"  : token_usage.get("prompt_tokens"),
+                       "output_tokens" : token_usage.get("completion_tokens")
+                       }
+
+    return {"input_tokens" : usage.get("input_tokens"), "output_tokens" : usage.get("output_tokens")}
@@ -0,0 +1,294 @@
+# BULK CATALOG INGESTION INTO QDRANT
+
+# DEPENDENCIES
+
+import os
+import sys
+import math
+import time
+import json
+import uuid
+import hashlib
+import argparse
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from config import config
+from qdrant_client import models
+from logger.logger import LoggerSetup
+from src.searcher.encoder import load_encoder
+from src.searcher.searcher import ensure_payload_indexes
+from src.searcher.result_cache import bump_catalog_version
+
+# LOGGER SETUP
+ingest_logger = LoggerSetup(logger_name = "ingest.py", log_filename_prefix = "ingest").get_logger()
+
+# PAYLOAD STORED WITH EVERY POINT, AS IN THE NOTEBOOK
+PAYLOAD_FIELDS     = ["name", "price", "colour", "brand", "img", "ratingCount", "avg_rating", "description",
+                      "Category", "Individual_category", "category_by_Gender", "size"
+                      ]
+
+# COLUMNS THAT MAKE UP THE EMBEDDED TEXT
+EMBEDDING_FIELDS   = ["name", "size", "Category", "Individual_category", "category_by_Gender", "brand"]
+
+# COLUMNS THAT IDENTIFY A PRODUCT ACROSS CATALOG REFRESHES
+IDENTITY_FIELDS    = ["name", "brand", "img"]
+
+# FIXED NAMESPACE SO THE SAME PRODUCT ALWAYS MAPS TO THE SAME POINT ID
+POINT_ID_NAMESPACE = uuid.UUID("6f1d3c8e-5b4a-4f2e-9a7c-1e2d3f4a5b6c")
+
+
+def _clean(value : object) -> object:
+    """
+    Convert pandas missing values (NaN) to None so payloads serialize as JSON.
+    """
+
+    if isinstance(value, float) and math.isnan(value):
+        return None
+
+    return value
+
+
+def embedding_text(row : dict) -> str:
+    """
+    The text embedded for a product (same template as the notebook).
+    """
+
+    return " ".join(str(row.get(field)) for field in EMBEDDING_FIELDS)
+
+
+def text_hash(row : dict) -> str:
+    """
+    Hash of the embedded text: when it changes the product must be re-embedded.
+    """
+
+    return hashlib.sha1(embedding_text(row).encode("utf-8")).hexdigest()
+
+
+def content_hash(row : dict) -> str:
+    """
+    Hash of the whole stored payload: when only this changes a payload update is enough.
+    """
+
+    payload = {field : row.get(field) for field in PAYLOAD_FIELDS}
+
+    return hashlib.sha1(json.dumps(payload, sort_keys = True, default = str).encode("utf-8")).hexdigest()
+
+
+def build_payload(row : dict) -> dict:
+    """
+    Payload stored with a product's point, including the hashes used by incremental sync.
+    """
+
+    payload                  = {field : row.get(field) for field in PAYLOAD_FIELDS}
+    payload["text_hash"]     = text_hash(row)
+    payload["content_hash"]  = content_hash(row)
+
+    return payload
+
+
+def point_id(row : dict) -> str:
+    """
+    Deterministic point ID derived from the product's identity columns, so re-ingesting
+    the same product overwrites its point instead of adding a duplicate.
+    """
+
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, "\x1f".join(str(row.get(field)) for field in IDENTITY_FIELDS)))
+
+
+def iter_catalog_chunks(csv_path : str, chunk_size : int = 10000):
+    """
+    Stream the catalog CSV as lists of row dicts, `chunk_size` rows at a time.
+    """
+
+    for frame in pd.read_csv(csv_path, chunksize = chunk_size):
+        yield [{column : _clean(value) for column, value in row.items()} for row in frame.to_dict(orient = "records")]
+
+
+def ensure_collection(client : object, collection_name : str, vector_size : int) -> None:
+    """
+    Create the collection (cosine distance) if it does not exist, and its payload indexes.
+    Existing collections are kept, so reruns upsert instead of rebuilding.
+    """
+
+    if not client.collection_exists(collection_name):
+        client.create_collection(collection_name  = collection_name,
+                                 vectors_config   = models.VectorParams(size      = vector_size,
+                                                                        distance  = models.Distance.COSINE
+                                                                        ),
+                                 )
+
+        ingest_logger.info(f"Created collection {collection_name} with vector size {vector_size}")
+
+    ensure_payload_indexes(client, collection_name)
+
+
+def encode_texts(encoder : object, texts : list, pool : dict = None, batch_size : int = 64) -> list:
+    """
+    Batch-encode `texts`, spreading the work over the multi-process pool when given.
+    """
+
+    if pool is not None:
+        return encoder.encode_multi_process(texts, pool, batch_size = batch_size)
+
+    return encoder.encode(texts, batch_size = batch_size)
+
+
+def upload_rows(client : object, collection_name : str, rows : list, vectors : list, upload_workers : int = 4, batch_size : int = 256) -> int:
+    """
+    Upsert `rows` with their `vectors` under deterministic point IDs.
+
+    Returns
+
+        - `count`                   {int}               : Number of points uploaded.
+    """
+
+    points = [models.PointStruct(id       = point_id(row),
+                                 vector   = [float(value) for value in vector],
+                                 payload  = build_payload(row)
+                                 )
+              for row, vector in zip(rows, vectors)
+              ]
+
+    client.upload_points(collection_name  = collection_name,
+                         points           = points,
+                         batch_size       = batch_size,
+                         parallel         = upload_workers,
+                         wait             = True
+                         )
+
+    return len(points)
+
+
+def ingest_catalog(client          : object,
+                   collection_name : str,
+                   csv_path        : str,
+                   chunk_size      : int = 10000,
+                   workers         : int = None,
+                   upload_workers  : int = 4,
+                   batch_size      : int = 256,
+                   encoder         : object = None
+                   ) -> dict:
+    """
+    Stream a catalog CSV into Qdrant: chunked reads, batched multi-process encoding and
+    parallel upserts.
+
+    Encoding of a chunk overlaps with the upload of the previous one. Point IDs are derived
+    from the identity columns, so rerunning over the same CSV is an idempotent upsert.
+    The collection's catalog version is bumped afterwards, which invalidates cached search results.
+
+    Arguments:
+
+        - `client`                  {QdrantClient}      : Qdrant client.
+
+        - `collection_name`             {str}           : Target collection, created if missing.
+
+        - `csv_path`                    {str}           : Path of the catalog CSV.
+
+        - `chunk_size`         {int, default = 10000}   : Rows read and encoded per chunk.
+
+        - `workers`               {int, optional}       : Encoding processes, defaults to the CPU count.
+                                                          1 encodes in-process.
+
+        - `upload_workers`       {int, default = 4}     : Parallel upload workers.
+
+        - `batch_size`          {int, default = 256}    : Points per upload request.
+
+        - `encoder`               {object, optional}    : Encoder with `encode()`; loaded from config if omitted.
+
+    Returns
+
+        - `stats`                      {dict}           : Rows ingested, chunks and elapsed seconds.
+    """
+
+    workers        = workers or os.cpu_count() or 1
+    encoder        = encoder or load_encoder(model_name = config.ENCODER_MODEL_NAME, backend = config.ENCODER_BACKEND)
+    pool           = encoder.start_multi_process_pool(target_devices = ["cpu"] * workers) if workers > 1 and hasattr(encoder, "start_multi_process_pool") else None
+
+    started_at     = time.perf_counter()
+    ingested       = 0
+    chunks         = 0
+    pending        = None
+
+    try:
+        with ThreadPoolExecutor(max_workers = 1) as uploader:
+            for rows in iter_catalog_chunks(csv_path, chunk_size = chunk_size):
+                vectors  = encode_texts(encoder, [embedding_text(row) for row in rows], pool = pool)
+
+                if chunks == 0:
+                    ensure_collection(client, collection_name, vector_size = len(vectors[0]))
+
+                if pending is not None:
+                    ingested += pending.result()
+
+                pending  = uploader.submit(upload_rows, client, collection_name, rows, vectors, upload_workers, batch_size)
+                chunks  += 1
+
+                ingest_logger.info(f"Encoded chunk {chunks} ({len(rows)} rows)")
+
+            if pending is not None:
+                ingested += pending.result()
+
+    finally:
+        if pool is not None:
+            encoder.stop_multi_process_pool(pool)
+
+    # SERVERS DROP THEIR CACHED SEARCH RESULTS FOR THE OLD CATALOG
+    if ingested:
+        bump_catalog_version(client, collection_name)
+
+    elapsed        = time.perf_counter() - started_at
+
+    ingest_logger.info(f"Ingested {ingested} products into {collection_name} in {chunks} chunks, {elapsed:.1f}s")
+
+    return {"ingested" : ingested, "chunks" : chunks, "elapsed" : elapsed}
+
+
+def main() -> None:
+    """
+    CLI: ingest a catalog CSV into the configured Qdrant collection.
+    """
+
+    argument_parser = argparse.ArgumentParser(description = "Bulk catalog ingestion into Qdrant.")
+    argument_parser.add_argument("--csv", required = True, help = "Catalog CSV file.")
+    argument_parser.add_argument("--collection", default = config.QDRANT_COLLECTION_NAME, help = "Target collection name.")
+    argument_parser.add_argument("--chunk-size", type = int, default = 10000, help = "Rows read and encoded per chunk.")
+    argument_parser.add_argument("--workers", type = int, default = None, help = "Encoding processes (default: CPU count).")
+    argument_parser.add_argument("--upload-workers", type = int, default = 4, help = "Parallel upload workers.")
+    argument_parser.add_argument("--batch-size", type = int, default = 256, help = "Points per upload request.")
+    argument_parser.add_argument("--sync", action = "store_true", help = "Incremental sync: re-embed changed rows only and delete removed products.")
+    arguments       = argument_parser.parse_args()
+
+    from src.clients.client_builder import initialize_qdrant_client
+
+    client          = initialize_qdrant_client(url      = config.QDRANT_CLUSTER_URL,
+                                               api_key  = config.QDRANT_API_KEY,
+                                               timeout  = config.QDRANT_REQUEST_TIMEOUT
+                                               )
+
+    if arguments.sync:
+        from src.ingest.sync import sync_catalog
+
+        sync_catalog(client           = client,
+                     collection_name  = arguments.collection,
+                     csv_path         = arguments.csv,
+                     chunk_size       = arguments.chunk_size,
+                     upload_workers   = arguments.upload_workers,
+                     batch_size       = arguments.batch_size
+                     )
+
+        return
+
+    ingest_catalog(client           = client,
+                   collection_name  = arguments.collection,
+                   csv_path         = arguments.csv,
+                   chunk_size       = arguments.chunk_size,
+                   workers          = arguments.workers,
+                   upload_workers   = arguments.upload_workers,
+                   batch_size       = arguments.batch_size
+                   )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# INCREMENTAL CATALOG SYNC BY CONTENT HASH
+
+# DEPENDENCIES
+
+import os
+import sys
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from config import config
+from qdrant_client import models
+from logger.logger import LoggerSetup
+from src.ingest.ingest import point_id
+from src.ingest.ingest import text_hash
+from src.ingest.ingest import upload_rows
+from src.ingest.ingest import encode_texts
+from src.ingest.ingest import content_hash
+from src.ingest.ingest import build_payload
+from src.ingest.ingest import embedding_text
+from src.searcher.encoder import load_encoder
+from src.ingest.ingest import ensure_collection
+from src.ingest.ingest import iter_catalog_chunks
+from src.searcher.result_cache import bump_catalog_version
+
+# LOGGER SETUP
+sync_logger = LoggerSetup(logger_name = "sync.py", log_filename_prefix = "sync").get_logger()
+
+
+def load_stored_hashes(client : object, collection_name : str, page_size : int = 1000) -> dict:
+    """
+    Scroll the collection and return {point_id: (text_hash, content_hash)} without vectors.
+
+    Points written before hashes were stored map to (None, None) and are re-embedded once.
+    """
+
+    hashes = {}
+    offset = None
+
+    while True:
+        points, offset = client.scroll(collection_name  = collection_name,
+                                       limit            = page_size,
+                                       offset           = offset,
+                                       with_payload     = ["text_hash", "content_hash"],
+                                       with_vectors     = False
+                                       )
+
+        for point in points:
+            payload               = point.payload or {}
+            hashes[str(point.id)] = (payload.get("text_hash"), payload.get("content_hash"))
+
+        if offset is None:
+            return hashes
+
+
+def _set_payloads(client : object, collection_name : str, rows : list, batch_size : int = 256) -> None:
+    """
+    Overwrite the payload of already-embedded points, `batch_size` operations per request.
+    """
+
+    for start in range(0, len(rows), batch_size):
+        operations = [models.SetPayloadOperation(set_payload = models.SetPayload(payload  = build_payload(row),
+                                                                                 points   = [point_id(row)]
+                                                                                 )
+                                                 )
+                      for row in rows[start : start + batch_size]
+                      ]
+
+        client.batch_update_points(collection_name = collection_name, update_operations = operations, wait = True)
+
+
+def sync_catalog(client          : object,
+                 collection_name : str,
+                 csv_path        : str,
+                 chunk_size      : int = 10000,
+                 upload_workers  : int = 4,
+                 batch_size      : int = 256,
+                 delete_missing  : bool = True,
+                 encoder         : object = None
+                 ) -> dict:
+    """
+    Bring the collection in line with a catalog CSV, doing work only for what changed.
+
+    Each product's payload stores a hash of its embedded text and a hash of its whole payload.
+    Rows that are new or whose embedded text (name/size/Category/Individual_category/gender/brand)
+    changed are re-embedded and upserted. Rows whose other fields (price, ratings, ...) changed get
+    a payload-only update. Products absent from the CSV are deleted. If anything changed, the
+    catalog version is bumped so servers stop serving cached search results.
+
+    Arguments:
+
+        - `client`                  {QdrantClient}      : Qdrant client.
+
+        - `collection_name`             {str}           : Collection to sync, created if missing.
+
+        - `csv_path`                    {str}           : Path of the new catalog CSV.
+
+        - `chunk_size`         {int, default = 10000}   : Rows read per chunk.
+
+        - `upload_workers`       {int, default = 4}     : Parallel upload workers for re-embedded rows.
+
+        - `batch_size`          {int, default = 256}    : Points or payload operations per request.
+
+        - `delete_missing`     {bool, default = True}   : Delete products that are no longer in the CSV.
+
+        - `encoder`               {object, optional}    : Encoder with `encode()`; loaded from config on first use.
+
+    Returns
+
+        - `stats`                      {dict}           : Counts of embedded, payload-updated, unchanged and deleted products.
+    """
+
+    started_at   = time.perf_counter()
+    stored       = load_stored_hashes(client, collection_name) if client.collection_exists(collection_name) else {}
+    seen         = set()
+    stats        = {"embedded" : 0, "payload_updated" : 0, "unchanged" : 0, "deleted" : 0}
+
+    for rows in iter_catalog_chunks(csv_path, chunk_size = chunk_size):
+        to_embed        = []
+        to_update       = []
+
+        for row in rows:
+            identifier  = point_id(row)
+
+            if identifier in seen:
+                continue
+
+            seen.add(identifier)
+            hashes      = stored.get(identifier)
+
+            if hashes is None or hashes[0] != text_hash(row):
+                to_embed.append(row)
+
+            elif hashes[1] != content_hash(row):
+                to_update.append(row)
+
+            else:
+                stats["unchanged"] += 1
+
+        if to_embed:
+            encoder     = encoder or load_encoder(model_name = config.ENCODER_MODEL_NAME, backend = config.ENCODER_BACKEND)
+            vectors     = encode_texts(encoder, [embedding_text(row) for row in to_embed])
+
+            if not stored and not stats["embedded"]:
+                ensure_collection(client, collection_name, vector_size = len(vectors[0]))
+
+            stats["embedded"] += upload_rows(client, collection_name, to_embed, vectors, upload_workers, batch_size)
+
+        if to_update:
+            _set_payloads(client, collection_name, to_update, batch_size = batch_size)
+            stats["payload_updated"] += len(to_update)
+
+    removed      = [identifier for identifier in stored if identifier not in seen]
+
+    if delete_missing and removed:
+        for start in range(0, len(removed), batch_size):
+            client.delete(collection_name  = collection_name,
+                          points_selector  = models.PointIdsList(points = removed[start : start + batch_size]),
+                          wait             = True
+                          )
+
+        stats["deleted"] = len(removed)
+
+    if stats["embedded"] or stats["payload_updated"] or stats["deleted"]:
+        bump_catalog_version(client, collection_name)
+
+    stats["elapsed"] = time.perf_counter() - started_at
+
+    sync_logger.info(f"Synced {collection_name}: {stats}")
+
+    return stats
@@ -4,17 +4,13 @@
 
 import os
 import sys
-from peft import LoraConfig
-from peft import get_peft_model
-from transformers import pipeline
-from langchain_groq import ChatGroq
-from transformers import AutoTokenizer
-from transformers import BitsAndBytesConfig
-from transformers import AutoModelForCausalLM
-from langchain_huggingface import HuggingFacePipeline
+import httpx
 
 from logger.logger import LoggerSetup
 
+# BACKEND LIBRARIES (langchain_groq, transformers, peft, torch) ARE IMPORTED INSIDE THE
+# INITIALIZERS, SO IMPORTING THIS MODULE ONLY COSTS WHAT THE SELECTED BACKEND NEEDS
+
 # LOGGER SETUP
 llm_builder_logger = LoggerSetup(logger_name = "llm_builder.py", log_filename_prefix = "llm_builder").get_logger()
 
@@ -22,7 +18,13 @@ llm_builder_logger = LoggerSetup(logger_name = "llm_builder.py", log_filename_pr
 # CHATGROQ LARGE LANGUAGE MODEL
 #-------------------------------
 
-def initialize_chatgroq_llm(temperature : float, groq_api_key : str, model_name : str) -> ChatGroq:
+def initialize_chatgroq_llm(temperature       : float, 
+                            groq_api_key      : str, 
+                            model_name        : str,
+                            pool_size         : int = None,
+                            keepalive_expiry  : float = 60,
+                            request_timeout   : float = None
+                            ) -> "ChatGroq":
     """
     Initialize a ChatGroq LLM instance.
 
@@ -35,6 +37,13 @@ def initialize_chatgroq_llm(temperature : float, groq_api_key : str, model_name
         
         - `model_name`          {str}      : The name of the LLM model to load.
 
+        - `pool_size`       {int, optional}    : Size of a dedicated keep-alive HTTP connection pool for the Groq
+                                             client. If None, the Groq SDK default client is used.
+
+        - `keepalive_expiry`  {float, default = 60} : Seconds an idle pooled connection is kept open.
+
+        - `request_timeout`  {float, optional} : Timeout in seconds for each LLM request.
+
     Returns
     
         - `llm`               {ChatGroq}   : An initialized ChatGroq LLM instance.
@@ -55,9 +64,25 @@ def initialize_chatgroq_llm(temperature : float, groq_api_key : str, model_name
             
             raise ValueError("Model name must be specified.")
 
-        llm = ChatGroq(temperature   = temperature,
-                       groq_api_key  = groq_api_key, 
-                       model_name    = model_name
+        from langchain_groq import ChatGroq
+
+        http_client         = None
+        http_async_client   = None
+
+        if pool_size:
+            limits              = httpx.Limits(max_connections            = pool_size,
+                                               max_keepalive_connections  = pool_size,
+                                               keepalive_expiry           = keepalive_expiry
+                                               )
+            http_client         = httpx.Client(limits = limits, timeout = request_timeout)
+            http_async_client   = httpx.AsyncClient(limits = limits, timeout = request_timeout)
+
+        llm = ChatGroq(temperature        = temperature,
+                       groq_api_key       = groq_api_key, 
+                       model_name         = model_name,
+                       request_timeout    = request_timeout,
+                       http_client        = http_client,
+                       http_async_client  = http_async_client
                        )
 
         llm_builder_logger.info(f"ChatGroq LLM initialized successfully with model: {model_name}")
@@ -70,116 +95,124 @@ def initialize_chatgroq_llm(temperature : float, groq_api_key : str, model_name
         raise
 
 # --------------------------------------------
-# HUGGING-FACE FINE-TUNED LARGE LANGUAGE MODEL
+# HUGGING-FACE FINE-TUNED LARGE LANGUAGE MODEL (CPU, INT8, BATCHED)
 #---------------------------------------------
 
-# def initialize_hf_llm(hf_llm_model_name    : str, 
-#                       max_new_tokens       : int = 512,
-#                       temperature          : float = 0.5, 
-#                       do_sample            : bool = True,
-#                       use_lora             : bool = False,
-#                       lora_r               : int = 8,
-#                       lora_alpha           : int = 16,
-#                       lora_dropout         : float = 0.05,
-#                       lora_target_modules  : list = ["q_proj", "v_proj"]
-#                       ) -> HuggingFacePipeline:
-#     """
-#     Initialize a Hugging Face LLM with 4-bit quantization and wrap it into a LangChain HuggingFacePipeline.
-
-#     Arguments
-
-#         - `hf_llm_model_name`              {str}                       : The Hugging Face model name or local path 
-#                                                                          (e.g., "meta-llama/Llama-2-7b-chat-hf").
-        
-#         - `max_new_tokens`     {int, optional, default = 512}          : Maximum number of new tokens to generate.
-        
-#         - `temperature`       {float, optional, default = 0.5}         : Sampling temperature for text generation. 
-#                                                                          Lower values = more deterministic, higher = more creative.
-        
-#         - `do_sample`         {bool, optional, default = True}         : Whether to use sampling; if False, uses greedy decoding.
+def initialize_hf_llm(hf_llm_model_name  : str, 
+                      max_new_tokens     : int = 96,
+                      temperature        : float = 0.5, 
+                      do_sample          : bool = False,
+                      quantize_int8      : bool = True,
+                      lora_adapter       : str = None,
+                      num_threads        : int = None,
+                      batch_window_ms    : float = 10,
+                      max_batch_size     : int = 8,
+                      constrained        : bool = True,
+                      hf_token           : str = None
+                      ) -> "LocalChatModel":
+    """
+    Initialize a local Hugging Face causal LM for CPU-only inference and wrap it into a
+    LangChain chat model.
 
-#         - `use_lora`                {bool, default = False}            : Enable LoRA adapter injection if True.
-        
-#         - `lora_r`                     {int, default = 8}              : LoRA rank.
+    The model is loaded in float32 on the CPU and its Linear layers are dynamically quantized
+    to int8. Concurrent requests are merged by a `GenerationScheduler` into one batched
+    `generate()` call, and decoding is constrained to the extractor's output format: the slot
+    lines can only take their allowed values and generation stops once the follow-up message
+    is closed, instead of running to `max_new_tokens`.
+
+    Arguments
+
+        - `hf_llm_model_name`              {str}                       : The Hugging Face model name or local path.
         
-#         - `lora_alpha`                 {int, default = 16}             : LoRA scaling factor.
+        - `max_new_tokens`           {int, default = 96}               : Upper bound on generated tokens per request.
         
-#         - `lora_dropout`            {float, default = 0.05}            : Dropout rate in LoRA layers.
+        - `temperature`             {float, default = 0.5}             : Sampling temperature (only used with `do_sample`).
         
-#         - `lora_target_modules` {list, default = ["q_proj","v_proj"]}  : Target modules for LoRA injection.
+        - `do_sample`               {bool, default = False}            : Sample the follow-up message instead of greedy decoding.
+
+        - `quantize_int8`            {bool, default = True}            : Apply int8 dynamic quantization to the Linear layers.
 
-#     Returns
+        - `lora_adapter`               {str, optional}                 : Path or hub ID of a fine-tuned LoRA adapter, merged
+                                                                         into the base weights before quantization.
 
-#         - `llm`                     {HuggingFacePipeline}            : A LangChain-compatible Hugging Face pipeline object for 
-#                                                                        text generation.
+        - `num_threads`                {int, optional}                 : Torch intra-op threads (defaults to torch's choice).
 
-#     Raises
+        - `batch_window_ms`         {float, default = 10}              : How long the first request of a batch waits for others.
 
-#         - `ValueError`                                               : If model name is missing or loading fails.
-#     """
+        - `max_batch_size`            {int, default = 8}               : Maximum prompts per `generate()` call.
+
+        - `constrained`              {bool, default = True}            : Constrain decoding to the extractor output format.
+
+        - `hf_token`                   {str, optional}                 : Hugging Face token for gated or private models.
+
+    Returns
+
+        - `llm`                       {LocalChatModel}                 : A LangChain chat model (`invoke`, `ainvoke`, `stream`).
+
+    Raises
+
+        - `ValueError`                                                 : If model name is missing or loading fails.
+    """
     
-#     try:
+    try:
 
-#         if not hf_llm_model_name:
-#             raise ValueError("Hugging Face model name must be provided.")
+        if not hf_llm_model_name:
+            raise ValueError("Hugging Face model name must be provided.")
 
-#         llm_builder_logger.info(f"Loading Hugging Face model: {hf_llm_model_name}")
+        import torch
+        from transformers import AutoTokenizer
+        from transformers import AutoModelForCausalLM
 
-#         # # QUANTIZATION CONFIGURATION FOR 4-BIT LOADING (FOR CUDA DEVICES)
-#         # bnb_config    = BitsAndBytesConfig(load_in_4bit               = True,
-#         #                                    bnb_4bit_use_double_quant  = True,
-#         #                                    bnb_4bit_quant_type        = "nf4",
-#         #                                    bnb_4bit_compute_dtype     = "bfloat16"
-#         #                                    )
+        from src.llm.local_llm import LocalChatModel
+        from src.llm.local_llm import GenerationScheduler
 
-#         # llm_builder_logger.info("Quantization configuration set for 4-bit loading")
+        llm_builder_logger.info(f"Loading Hugging Face model for CPU inference: {hf_llm_model_name}")
 
-#         # LOADING MODEL AND TOKENIZER
-#         tokenizer     = AutoTokenizer.from_pretrained(hf_llm_model_name)
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        # LOADING MODEL AND TOKENIZER
+        tokenizer     = AutoTokenizer.from_pretrained(hf_llm_model_name, token = hf_token)
         
-#         model         = AutoModelForCausalLM.from_pretrained(hf_llm_model_name, 
-#                                                              device_map           = "auto"
-#                                                              )
+        model         = AutoModelForCausalLM.from_pretrained(hf_llm_model_name, 
+                                                             torch_dtype        = torch.float32,
+                                                             low_cpu_mem_usage  = True,
+                                                             token              = hf_token
+                                                             )
 
-#         llm_builder_logger.info("Model and tokenizer loaded successfully")
+        # MERGE THE FINE-TUNED LORA ADAPTER SO THE QUANTIZED MODEL HAS NO EXTRA ADAPTER LAYERS
+        if lora_adapter:
+            from peft import PeftModel
 
-#         # APPLY LORA CONFIG IF ENABLED
-#         if use_lora:
-#             llm_builder_logger.info("Applying LoRA configuration...")
-            
-#             lora_config = LoraConfig(r                = lora_r,
-#                                      lora_alpha       = lora_alpha, 
-#                                      target_modules   = lora_target_modules, 
-#                                      lora_dropout     = lora_dropout, 
-#                                      bias             = "none", 
-#                                      task_type        = "CAUSAL_LM"
-#                                      )
-            
-#             model       = get_peft_model(model, lora_config)
-            
-#             llm_builder_logger.info(f"LoRA applied with r = {lora_r}, alpha = {lora_alpha}, dropout = {lora_dropout}")
+            model     = PeftModel.from_pretrained(model, lora_adapter, token = hf_token).merge_and_unload()
+
+            llm_builder_logger.info(f"LoRA adapter merged: {lora_adapter}")
+
+        model.eval()
 
-#         else:
-#             llm_builder_logger.info("LoRA not enabled, using base model only.")
+        # INT8 DYNAMIC QUANTIZATION OF THE LINEAR LAYERS (CPU)
+        if quantize_int8:
+            model     = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype = torch.qint8)
 
-#         # BUILDING THE TEXT GENERATION PIPELINE
-#         pipe          = pipeline("text-generation",
-#                                  model           = model, 
-#                                  tokenizer       = tokenizer, 
-#                                  max_new_tokens  = max_new_tokens, 
-#                                  temperature     = temperature, 
-#                                  do_sample       = do_sample
-#                                  )
+            llm_builder_logger.info("Linear layers quantized to int8")
 
-#         llm_builder_logger.info("Text generation pipeline created successfully")
+        scheduler     = GenerationScheduler(model           = model,
+                                            tokenizer       = tokenizer,
+                                            max_new_tokens  = max_new_tokens,
+                                            window_ms       = batch_window_ms,
+                                            max_batch_size  = max_batch_size,
+                                            do_sample       = do_sample,
+                                            temperature     = temperature,
+                                            constrained     = constrained
+                                            )
 
-#         llm           = HuggingFacePipeline(pipeline = pipe)
+        llm           = LocalChatModel(scheduler = scheduler, model_name = hf_llm_model_name)
 
-#         llm_builder_logger.info(f"Hugging Face LLM initialized successfully with model: {hf_llm_model_name}")
+        llm_builder_logger.info(f"Hugging Face LLM initialized successfully with model: {hf_llm_model_name}")
         
-#         return llm
+        return llm
 
-#     except Exception as e:
-#         llm_builder_logger.error(f"Failed to initialize Hugging Face LLM: {str(e)}")
+    except Exception as e:
+        llm_builder_logger.error(f"Failed to initialize Hugging Face LLM: {repr(e)}")
         
-#         raise
\ No newline at end of file
+        raise
@@ -0,0 +1,335 @@
+# LOCAL CPU LLM BACKEND: DYNAMIC BATCHING AND CONSTRAINED DECODING OF THE EXTRACTOR FORMAT
+
+# DEPENDENCIES
+
+import os
+import sys
+import time
+import queue
+import threading
+from typing import Any
+from concurrent.futures import Future
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatResult
+from langchain_core.outputs import ChatGeneration
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from config import config
+from logger.logger import LoggerSetup
+
+# LOGGER SETUP
+local_llm_logger = LoggerSetup(logger_name = "local_llm.py", log_filename_prefix = "local_llm").get_logger()
+
+# SLOT LINES OF THE EXTRACTOR OUTPUT FORMAT, IN ORDER, WITH THEIR ALLOWED VALUES (SAME ENUMS AS ExtractedSlots)
+OUTPUT_SLOTS         = [("Category",             config.CATEGORIES + ["Other", "NA"]),
+                        ("Individual_category",  config.INDIVIDUAL_CATEGORIES + ["Other", "NA"]),
+                        ("category_by_Gender",   config.GENDERS + ["NA"]),
+                        ("colour",               config.COLOURS + ["Other", "NA"]),
+                        ("MOVE_ON",              ["true", "false"])
+                        ]
+
+# FREE-TEXT LINE THAT FOLLOWS THE SLOTS; GENERATION STOPS AT ITS CLOSING QUOTE
+FOLLOW_UP_PREFIX     = 'FOLLOW_UP_MESSAGE: "'
+
+
+def _line_tokens(tokenizer : object, text : str) -> tuple:
+    """
+    Token IDs of `text` as it appears at the start of a line.
+
+    The text is encoded after a newline and the newline's tokens are dropped, so SentencePiece
+    tokenizers do not add a word-initial space marker.
+    """
+
+    prefix = tokenizer.encode("\n", add_special_tokens = False)
+    tokens = tokenizer.encode("\n" + text, add_special_tokens = False)
+
+    return tuple(tokens[len(prefix):]) if tokens[:len(prefix)] == prefix else tuple(tokenizer.encode(text, add_special_tokens = False))
+
+
+class OutputGrammar:
+    """
+    Token-level grammar of the extractor output: one trie of token sequences per slot line
+    (`Key: "value"` followed by a newline, for each allowed value), then the forced
+    `FOLLOW_UP_MESSAGE: "` prefix, then free text.
+
+    `allowed_tokens(generated)` walks the tries with the tokens generated so far and returns the
+    token IDs that may come next, or None once the free-text follow-up message has started.
+    """
+
+    def __init__(self, tokenizer : object, slots : list = None, follow_up_prefix : str = FOLLOW_UP_PREFIX) -> None:
+        self.tokenizer  = tokenizer
+        self.tries      = []
+
+        for key, values in (slots or OUTPUT_SLOTS):
+            self.tries.append(self._build_trie([_line_tokens(tokenizer, f'{key}: "{value}"\n') for value in values]))
+
+        self.tries.append(self._build_trie([_line_tokens(tokenizer, follow_up_prefix)]))
+
+    @staticmethod
+    def _build_trie(sequences : list) -> dict:
+        root = {}
+
+        for sequence in sequences:
+            node = root
+
+            for token in sequence:
+                node = node.setdefault(token, {})
+
+        return root
+
+    def free_text_start(self, generated : list) -> int:
+        """
+        Index in `generated` where the free-text follow-up message starts, or None if the
+        constrained part is not finished yet.
+        """
+
+        segment = 0
+        node    = self.tries[0]
+
+        for index, token in enumerate(generated):
+            node = node.get(token)
+
+            if node is None:
+                return None
+
+            if not node:
+                segment += 1
+
+                if segment == len(self.tries):
+                    return index + 1
+
+                node     = self.tries[segment]
+
+        return None
+
+    def allowed_tokens(self, generated : list) -> list:
+        """
+        Token IDs allowed after `generated`, or None when any token is allowed (free text).
+        """
+
+        segment = 0
+        node    = self.tries[0]
+
+        for token in generated:
+            node = node.get(token)
+
+            if node is None:
+                return None
+
+            if not node:
+                segment += 1
+
+                if segment == len(self.tries):
+                    return None
+
+                node     = self.tries[segment]
+
+        return list(node)
+
+
+class SlotConstraintProcessor:
+    """
+    Logits processor that masks every token the grammar does not allow next.
+
+    Only the generated part of each row (after the left-padded prompt) is constrained; once a
+    row reaches the follow-up message it is left unconstrained.
+    """
+
+    def __init__(self, grammar : OutputGrammar, prompt_length : int) -> None:
+        self.grammar        = grammar
+        self.prompt_length  = prompt_length
+
+    def __call__(self, input_ids : Any, scores : Any) -> Any:
+        import torch
+
+        for row in range(input_ids.shape[0]):
+            allowed = self.grammar.allowed_tokens(input_ids[row, self.prompt_length:].tolist())
+
+            if allowed:
+                mask          = torch.full_like(scores[row], float("-inf"))
+                mask[allowed] = 0
+                scores[row]   = scores[row] + mask
+
+        return scores
+
+
+class StopAfterFollowUp:
+    """
+    Per-row stopping criterion: a row is done once its follow-up message has been closed with a
+    quote (or a newline), or after `max_follow_up_tokens` free-text tokens.
+    """
+
+    def __init__(self, grammar : OutputGrammar, tokenizer : object, prompt_length : int, max_follow_up_tokens : int = 64) -> None:
+        self.grammar               = grammar
+        self.tokenizer             = tokenizer
+        self.prompt_length         = prompt_length
+        self.max_follow_up_tokens  = max_follow_up_tokens
+
+    def __call__(self, input_ids : Any, scores : Any, **kwargs) -> Any:
+        import torch
+
+        done = []
+
+        for row in range(input_ids.shape[0]):
+            generated  = input_ids[row, self.prompt_length:].tolist()
+            start      = self.grammar.free_text_start(generated)
+
+            if start is None:
+                done.append(False)
+
+                continue
+
+            free_text  = self.tokenizer.decode(generated[start:], skip_special_tokens = True)
+
+            done.append('"' in free_text or "\n" in free_text or len(generated) - start >= self.max_follow_up_tokens)
+
+        return torch.tensor(done, dtype = torch.bool, device = input_ids.device)
+
+
+class GenerationScheduler:
+    """
+    Dynamic batching scheduler for a local causal LM.
+
+    Concurrent `submit(prompt)` calls are collected for up to `window_ms` (at most
+    `max_batch_size` prompts), left-padded into one batch and run through a single
+    `model.generate()` call with the slot constraint and the follow-up stopping criterion.
+    """
+
+    def __init__(self,
+                 model                 : object,
+                 tokenizer             : object,
+                 max_new_tokens        : int = 96,
+                 window_ms             : float = 10,
+                 max_batch_size        : int = 8,
+                 do_sample             : bool = False,
+                 temperature           : float = 0.5,
+                 constrained           : bool = True,
+                 max_follow_up_tokens  : int = 64
+                 ) -> None:
+        self.model                 = model
+        self.tokenizer             = tokenizer
+        self.max_new_tokens        = max_new_tokens
+        self.window                = window_ms / 1000
+        self.max_batch_size        = max_batch_size
+        self.do_sample             = do_sample
+        self.temperature           = temperature
+        self.max_follow_up_tokens  = max_follow_up_tokens
+        self.grammar               = OutputGrammar(tokenizer) if constrained else None
+
+        # DECODER-ONLY MODELS MUST BE LEFT-PADDED FOR BATCHED GENERATION
+        self.tokenizer.padding_side = "left"
+
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+
+        self._queue                = queue.Queue()
+        self._worker               = threading.Thread(target = self._run, name = "llm-batcher", daemon = True)
+        self._worker.start()
+
+    def submit(self, prompt : str) -> Future:
+        """
+        Queue `prompt` for the next batch; the future resolves to the generated text.
+        """
+
+        future = Future()
+        self._queue.put((prompt, future))
+
+        return future
+
+    def _collect(self) -> list:
+        batch         = [self._queue.get()]
+        deadline      = time.monotonic() + self.window
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+
+            if remaining <= 0:
+                break
+
+            try:
+                batch.append(self._queue.get(timeout = remaining))
+
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+
+            try:
+                texts = self.generate([prompt for prompt, _ in batch])
+
+                for (_, future), text in zip(batch, texts):
+                    future.set_result(text)
+
+            except Exception as e:
+                local_llm_logger.error(f"Batched generation failed: {repr(e)}")
+
+                for _, future in batch:
+                    future.set_exception(e)
+
+    def generate(self, prompts : list) -> list:
+        """
+        Generate completions for `prompts` in one batched `generate()` call.
+        """
+
+        import torch
+
+        started_at     = time.perf_counter()
+        inputs         = self.tokenizer(prompts, return_tensors = "pt", padding = True)
+        prompt_length  = inputs["input_ids"].shape[1]
+
+        options        = {"max_new_tokens" : self.max_new_tokens, "do_sample" : self.do_sample, "pad_token_id" : self.tokenizer.pad_token_id}
+
+        if self.do_sample:
+            options["temperature"] = self.temperature
+
+        if self.grammar is not None:
+            options["logits_processor"]   = [SlotConstraintProcessor(self.grammar, prompt_length)]
+            options["stopping_criteria"]  = [StopAfterFollowUp(self.grammar, self.tokenizer, prompt_length, self.max_follow_up_tokens)]
+
+        with torch.inference_mode():
+            outputs    = self.model.generate(**inputs, **options)
+
+        texts          = [self._finish(self.tokenizer.decode(row[prompt_length:], skip_special_tokens = True)) for row in outputs]
+
+        local_llm_logger.info(f"Generated {len(prompts)} completions in one batch, {time.perf_counter() - started_at:.2f}s")
+
+        return texts
+
+    def _finish(self, text : str) -> str:
+        """
+        Cut the follow-up message at its closing quote and re-close it, so the text parses cleanly.
+        """
+
+        if self.grammar is None or FOLLOW_UP_PREFIX not in text:
+            return text
+
+        head, message = text.split(FOLLOW_UP_PREFIX, 1)
+        message       = message.split('"', 1)[0].split("\n", 1)[0]
+
+        return f'{head}{FOLLOW_UP_PREFIX}{message}"'
+
+
+class LocalChatModel(BaseChatModel):
+    """
+    LangChain chat model backed by a `GenerationScheduler`, so `invoke`, `ainvoke` and `stream`
+    work like the ChatGroq LLM and concurrent calls share one batched `generate()`.
+    """
+
+    scheduler   : Any
+    model_name  : str = "local-hf"
+
+    @property
+    def _llm_type(self) -> str:
+        return "local-hf"
+
+    def _generate(self, messages : list, stop : list = None, run_manager : Any = None, **kwargs : Any) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        text   = self.scheduler.submit(prompt).result()
+
+        return ChatResult(generations = [ChatGeneration(message = AIMessage(content = text))])
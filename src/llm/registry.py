@@ -0,0 +1,155 @@
+# LAZY, PLUGGABLE LLM BACKEND REGISTRY
+
+# DEPENDENCIES
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from config import config
+from logger.logger import LoggerSetup
+
+# LOGGER SETUP
+registry_logger = LoggerSetup(logger_name = "registry.py", log_filename_prefix = "registry").get_logger()
+
+# BACKEND NAME -> FACTORY; EACH FACTORY IMPORTS ITS OWN DEPENDENCIES WHEN CALLED
+LLM_BACKENDS       = {}
+
+# SECONDS SPENT IMPORTING AND BUILDING EACH BACKEND IN THIS PROCESS
+backend_load_times = {}
+
+
+def register_backend(name : str) -> callable:
+    """
+    Decorator registering an LLM factory under `name`. The factory receives the keyword
+    options passed to `build_llm` and must import its dependencies inside its body.
+    """
+
+    def decorator(factory : callable) -> callable:
+        LLM_BACKENDS[name] = factory
+
+        return factory
+
+    return decorator
+
+
+@register_backend("groq")
+def _groq_backend(pool_size : int = None, **options) -> object:
+    from src.llm.llm_builder import initialize_chatgroq_llm
+
+    return initialize_chatgroq_llm(temperature       = config.LLM_TEMPERATURE,
+                                   groq_api_key      = config.GROQ_API_KEY,
+                                   model_name        = config.LLM_MODEL_NAME,
+                                   pool_size         = pool_size or config.LLM_POOL_SIZE,
+                                   keepalive_expiry  = config.KEEPALIVE_EXPIRY,
+                                   request_timeout   = config.LLM_REQUEST_TIMEOUT
+                                   )
+
+
+@register_backend("hf-local")
+def _hf_local_backend(**options) -> object:
+    from src.llm.llm_builder import initialize_hf_llm
+
+    return initialize_hf_llm(hf_llm_model_name  = config.HF_LLM_MODEL_NAME,
+                             temperature        = config.LLM_TEMPERATURE,
+                             max_new_tokens     = config.LOCAL_LLM_MAX_NEW_TOKENS,
+                             quantize_int8      = config.LOCAL_LLM_QUANTIZE_INT8,
+                             lora_adapter       = config.LOCAL_LLM_LORA_ADAPTER,
+                             num_threads        = config.LOCAL_LLM_THREADS,
+                             batch_window_ms    = config.LOCAL_LLM_BATCH_WINDOW_MS,
+                             max_batch_size     = config.LOCAL_LLM_MAX_BATCH_SIZE,
+                             hf_token           = config.HUGGINGFACE_LOGIN_TOKEN
+                             )
+
+
+@register_backend("fake")
+def _fake_backend(**options) -> object:
+    from src.llm.replay import ReplayChatModel
+    from src.llm.replay import load_replay_file
+
+    recordings = load_replay_file(config.LLM_REPLAY_PATH) if config.LLM_REPLAY_PATH else {}
+
+    return ReplayChatModel(recordings = recordings)
+
+
+def build_llm(backend : str = None, **options) -> object:
+    """
+    Build the LLM of the selected backend, importing only that backend's dependencies.
+
+    Arguments:
+
+        - `backend`           {str, default = LLM_BACKEND}  : "groq", "hf-local", "fake" or any registered name.
+
+        - `options`                                         : Passed to the backend factory (e.g. `pool_size`).
+
+    Returns
+
+        - `llm`                      {object}               : A LangChain chat model.
+
+    Raises
+
+        - `ValueError`                                      : If the backend is not registered.
+    """
+
+    backend    = backend or config.LLM_BACKEND
+
+    if backend not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM backend: {backend}. Choose one of {list(LLM_BACKENDS)}.")
+
+    started_at = time.perf_counter()
+    llm        = LLM_BACKENDS[backend](**options)
+
+    backend_load_times[backend] = time.perf_counter() - started_at
+
+    registry_logger.info(f"LLM backend {backend} imported and built in {backend_load_times[backend]:.2f}s")
+
+    return llm
+
+
+def import_time_report(module : str = "web.app", top : int = 15) -> list:
+    """
+    Import `module` in a fresh interpreter with `-X importtime` and return the slowest imports.
+
+    Returns
+
+        - list
+            [{"module", "cumulative_ms", "self_ms"}, ...] sorted by cumulative time, slowest first.
+    """
+
+    root     = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+    result   = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              cwd             = root,
+                              capture_output  = True,
+                              text            = True
+                              )
+    entries  = []
+
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        entries.append({"module" : name, "cumulative_ms" : int(cumulative_us) / 1000, "self_ms" : int(self_us) / 1000})
+
+    return sorted(entries, key = lambda entry: entry["cumulative_ms"], reverse = True)[:top]
+
+
+def main() -> None:
+    """
+    CLI: print the slowest imports of a module, e.g. `python -m src.llm.registry --module web.app`.
+    """
+
+    argument_parser = argparse.ArgumentParser(description = "Import-time report for a module.")
+    argument_parser.add_argument("--module", default = "web.app", help = "Module to import.")
+    argument_parser.add_argument("--top", type = int, default = 15, help = "Number of slowest imports to show.")
+    arguments       = argument_parser.parse_args()
+
+    for entry in import_time_report(module = arguments.module, top = arguments.top):
+        print(f"{entry['cumulative_ms']:10.1f} ms  {entry['self_ms']:8.1f} ms  {entry['module']}")
+
+
+if __name__ == "__main__":
+    main()
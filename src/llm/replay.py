@@ -0,0 +1,68 @@
+# FAKE / REPLAY LLM FOR OFFLINE RUNS, DEMOS AND LOAD TESTS
+
+# DEPENDENCIES
+
+import os
+import sys
+import json
+from typing import Any
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatResult
+from langchain_core.outputs import ChatGeneration
+from langchain_core.language_models.chat_models import BaseChatModel
+
+# RESPONSE RETURNED WHEN NO RECORDED CONVERSATION MATCHES THE PROMPT
+CANNED_RESPONSE    = ('Category: "Western"\n'
+                      'Individual_category: "jeans"\n'
+                      'category_by_Gender: "Women"\n'
+                      'colour: "Black"\n'
+                      'MOVE_ON: "true"\n'
+                      'FOLLOW_UP_MESSAGE: "Sure! Let me find black jeans for women."'
+                      )
+
+
+def load_replay_file(path : str) -> dict:
+    """
+    Read recorded {conversation: response} pairs from a JSONL file written by
+    `python -m src.extractor.batch` (failed items are skipped).
+    """
+
+    recordings = {}
+
+    with open(path, encoding = "utf-8") as replay_file:
+        for line in replay_file:
+            if not line.strip():
+                continue
+
+            item = json.loads(line)
+
+            if item.get("conversation") and item.get("response"):
+                recordings[item["conversation"]] = item["response"]
+
+    return recordings
+
+
+class ReplayChatModel(BaseChatModel):
+    """
+    Chat model that answers from recorded extractor responses without any network call.
+
+    The response of the longest recorded conversation contained in the prompt is returned,
+    otherwise `default_response`.
+    """
+
+    recordings        : dict = {}
+    default_response  : str = CANNED_RESPONSE
+    model_name        : str = "replay"
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def _generate(self, messages : list, stop : list = None, run_manager : Any = None, **kwargs : Any) -> ChatResult:
+        prompt   = "\n".join(str(message.content) for message in messages)
+        matches  = [conversation for conversation in self.recordings if conversation in prompt]
+        text     = self.recordings[max(matches, key = len)] if matches else self.default_response
+
+        return ChatResult(generations = [ChatGeneration(message = AIMessage(content = text))])
@@ -0,0 +1,230 @@
+# PER-STAGE LATENCY SPANS, COUNTERS AND THE PROMETHEUS EXPOSITION
+
+# DEPENDENCIES
+
+import os
+import re
+import sys
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from logger.logger import LoggerSetup
+from logger.logger import request_id_var
+
+# LOGGER SETUP
+metrics_logger = LoggerSetup(logger_name = "metrics.py", log_filename_prefix = "metrics").get_logger()
+
+# SAME DEFAULT BUCKETS AS prometheus_client
+LATENCY_BUCKETS    = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+# SCROLL PAGES AND POINTS TRANSFERRED PER SEARCH
+PAGE_BUCKETS       = (1, 2, 5, 10, 25, 50, 100, 250, 1000)
+POINT_BUCKETS      = (0, 10, 100, 1000, 10000, 100000, 1000000)
+
+# LONGEST CLIENT-SUPPLIED X-Request-ID KEPT
+REQUEST_ID_MAX_LENGTH = 64
+
+
+class _Metric:
+    """
+    Minimal labelled counter / histogram used when `prometheus_client` is not installed.
+    Mirrors the `labels(...).inc()` / `labels(...).observe()` interface and renders the
+    Prometheus text exposition format.
+    """
+
+    def __init__(self, kind : str, name : str, documentation : str, labelnames : tuple = (), buckets : tuple = LATENCY_BUCKETS) -> None:
+        self.kind        = kind
+        self.name        = name
+        self.doc         = documentation
+        self.labelnames  = tuple(labelnames)
+        self.buckets     = tuple(buckets)
+        self._values     = {}
+        self._lock       = threading.Lock()
+
+    def labels(self, *values : str, **keyword_values : str) -> "_Child":
+        values = tuple(keyword_values[name] for name in self.labelnames) if keyword_values else tuple(values)
+
+        return _Child(self, tuple(str(value) for value in values))
+
+    def inc(self, amount : float = 1) -> None:
+        _Child(self, ()).inc(amount)
+
+    def observe(self, value : float) -> None:
+        _Child(self, ()).observe(value)
+
+    def _update(self, key : tuple, value : float) -> None:
+        with self._lock:
+            if self.kind == "counter":
+                self._values[key] = self._values.get(key, 0) + value
+
+                return
+
+            state         = self._values.setdefault(key, {"buckets" : [0] * len(self.buckets), "sum" : 0.0, "count" : 0})
+            state["sum"] += value
+            state["count"] += 1
+
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["buckets"][index] += 1
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                labels = [f'{name}="{label}"' for name, label in zip(self.labelnames, key)]
+
+                if self.kind == "counter":
+                    lines.append(f"{self.name}_total{_format_labels(labels)} {value}")
+
+                    continue
+
+                for bound, count in zip(self.buckets + ("+Inf",), value["buckets"] + [value["count"]]):
+                    bucket_labels = _format_labels(labels + ['le="%s"' % bound])
+                    lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {value['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {value['count']}")
+
+        return "\n".join(lines)
+
+
+class _Child:
+    def __init__(self, metric : _Metric, key : tuple) -> None:
+        self.metric = metric
+        self.key    = key
+
+    def inc(self, amount : float = 1) -> None:
+        self.metric._update(self.key, amount)
+
+    def observe(self, value : float) -> None:
+        self.metric._update(self.key, value)
+
+
+def _format_labels(labels : list) -> str:
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+try:
+    import prometheus_client
+
+    def _counter(name : str, documentation : str, labelnames : tuple = ()) -> object:
+        return prometheus_client.Counter(name, documentation, labelnames)
+
+    def _histogram(name : str, documentation : str, labelnames : tuple = (), buckets : tuple = LATENCY_BUCKETS) -> object:
+        return prometheus_client.Histogram(name, documentation, labelnames, buckets = buckets)
+
+except ImportError:
+    prometheus_client = None
+    _registry         = []
+
+    def _counter(name : str, documentation : str, labelnames : tuple = ()) -> object:
+        metric = _Metric("counter", name, documentation, labelnames)
+        _registry.append(metric)
+
+        return metric
+
+    def _histogram(name : str, documentation : str, labelnames : tuple = (), buckets : tuple = LATENCY_BUCKETS) -> object:
+        metric = _Metric("histogram", name, documentation, labelnames, buckets)
+        _registry.append(metric)
+
+        return metric
+
+
+STAGE_SECONDS        = _histogram("trendsetters_stage_seconds", "Latency of one pipeline stage", ("stage",))
+SCROLL_PAGES         = _histogram("trendsetters_search_scroll_pages", "Qdrant scroll/query pages per search", buckets = PAGE_BUCKETS)
+POINTS_TRANSFERRED   = _histogram("trendsetters_search_points_transferred", "Points transferred from Qdrant per search", buckets = POINT_BUCKETS)
+MOVE_ON              = _counter("trendsetters_move_on", "Extraction results by MOVE_ON value", ("move_on",))
+FALLBACK             = _counter("trendsetters_search_fallback", "Searches answered by a fallback instead of an exact match", ("reason",))
+ERRORS               = _counter("trendsetters_errors", "Errors by pipeline stage", ("stage",))
+
+
+@contextmanager
+def span(stage : str):
+    """
+    Time the enclosed block into `trendsetters_stage_seconds{stage=...}`; exceptions are
+    counted in `trendsetters_errors{stage=...}` and re-raised.
+    """
+
+    started_at = time.perf_counter()
+
+    try:
+        yield
+
+    except Exception:
+        ERRORS.labels(stage).inc()
+
+        raise
+
+    finally:
+        elapsed = time.perf_counter() - started_at
+        STAGE_SECONDS.labels(stage).observe(elapsed)
+
+        metrics_logger.debug(f"Stage {stage} took {elapsed * 1000:.1f}ms")
+
+
+def record_scroll(pages : int, points : int) -> None:
+    """
+    Record how many pages and points one search pulled from Qdrant.
+    """
+
+    SCROLL_PAGES.observe(pages)
+    POINTS_TRANSFERRED.observe(points)
+
+
+def record_fallback(reason : str) -> None:
+    """
+    Count a search answered by a fallback: "no_filter" (popular sample), "relaxed" (some
+    filters dropped) or "no_match" (nothing matched even after relaxing).
+    """
+
+    FALLBACK.labels(reason).inc()
+
+
+def record_move_on(move_on : bool) -> None:
+    MOVE_ON.labels(str(bool(move_on)).lower()).inc()
+
+
+def set_request_id(request_id : str = None) -> str:
+    """
+    Bind a request ID (the incoming one, or a new one) to the current context so every
+    log line of the request carries it.
+
+    The incoming ID comes from a client header, so it is reduced to letters, digits, ".",
+    "_" and "-" and capped at REQUEST_ID_MAX_LENGTH characters: it cannot forge log lines
+    or response headers. An ID with nothing left is replaced by a new one.
+    """
+
+    request_id = re.sub(r"[^A-Za-z0-9._\-]", "", request_id or "")[:REQUEST_ID_MAX_LENGTH] or uuid.uuid4().hex[:16]
+    request_id_var.set(request_id)
+
+    return request_id
+
+
+def render_metrics() -> tuple:
+    """
+    With `PROMETHEUS_MULTIPROC_DIR` set in the environment (as gunicorn.conf.py does), the
+    values written by every worker process are aggregated, whichever worker serves the scrape.
+    Without `prometheus_client` the values are those of the serving process only.
+
+    Returns
+
+        - tuple
+            (body bytes, content type) of the Prometheus text exposition.
+    """
+
+    if prometheus_client is not None and os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+
+        return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+    if prometheus_client is not None:
+        return prometheus_client.generate_latest(), prometheus_client.CONTENT_TYPE_LATEST
+
+    return ("\n".join(metric.render() for metric in _registry) + "\n").encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
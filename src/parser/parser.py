@@ -18,7 +18,8 @@ def parser(response : str) -> str:
     This function processes the raw text output from the `extractor` function (or LLM)
     and extracts predefined keys (Category, Individual_category, category_by_Gender,
     colour, MOVE_ON, FOLLOW_UP_MESSAGE). It ensures missing fields are defaulted to "NA",
-    and converts the `MOVE_ON` field into a boolean.
+    and converts the `MOVE_ON` field into a boolean. Lines that do not start with a known
+    key, including ones that contain a colon, continue the value of the previous key.
 
     Arguments:
 
@@ -62,7 +63,9 @@ def parser(response : str) -> str:
                     parsed_data[key] = value
                     current_key      = key
 
-            elif current_key:
+                    continue
+
+            if current_key:
                 parsed_data[current_key] += ' ' + line.strip('"')
 
         parser_logger.debug(f"Parsed data before MOVE_ON conversion: {parsed_data}")
@@ -76,4 +79,171 @@ def parser(response : str) -> str:
     except Exception as e:
         parser_logger.error(f"Error parsing LLM response: {repr(e)}")
         
-        raise e
\ No newline at end of file
+        raise e
+
+class IncrementalParser:
+    """
+    Line-by-line parser for a streamed LLM response in the `extractor` output format.
+
+    Chunks of text are fed as they arrive. A key's value is final once the next known key
+    starts (values may continue on following lines) or when the stream ends; keys that have
+    not appeared yet are only finalized, as "NA", at the end, whatever order the LLM uses.
+    A key that appears again is reopened and takes its new value, like in `parser()`. Text of
+    FOLLOW_UP_MESSAGE is additionally emitted as deltas while it is being generated.
+    Slot parsing matches `parser()`, except that blank lines are ignored.
+    """
+
+    KEYS                = ["Category", "Individual_category", "category_by_Gender", "colour", "MOVE_ON", "FOLLOW_UP_MESSAGE"]
+    SEARCH_KEYS         = ["Category", "Individual_category", "category_by_Gender", "colour", "MOVE_ON"]
+
+    def __init__(self) -> None:
+        self.parsed_data      = {"Category"             : "NA", 
+                                 "Individual_category"  : "NA", 
+                                 "category_by_Gender"   : "NA", 
+                                 "colour"               : "NA", 
+                                 "MOVE_ON"              : "false", 
+                                 "FOLLOW_UP_MESSAGE"    : "NA"
+                                 }
+        self.final_keys       = set()
+        self.current_key      = None
+
+        self._buffer          = ""
+        self._follow_up_sent  = 0
+
+    def feed(self, chunk : str) -> list:
+        """
+        Consume a chunk of streamed text.
+
+        Arguments:
+
+            - `chunk`             {str}        : The next piece of the LLM response.
+
+        Returns:
+
+            - list
+                Events produced by this chunk, each a tuple:
+                - ("slot", key, value)     when a key's value becomes final
+                - ("follow_up", delta)     for newly generated FOLLOW_UP_MESSAGE text
+        """
+
+        events        = []
+        self._buffer += chunk
+
+        while '\n' in self._buffer:
+            line, self._buffer = self._buffer.split('\n', 1)
+            events.extend(self._process_line(line))
+
+        # A KEY STARTING ON THE UNTERMINATED LINE ALREADY MAKES THE PREVIOUS KEY FINAL
+        if ':' in self._buffer:
+            key           = self._buffer.split(':', 1)[0].strip()
+
+            if key in self.parsed_data:
+                events.extend(self._finalize_current())
+
+        events.extend(self._follow_up_delta())
+
+        return events
+
+    def finish(self) -> list:
+        """
+        Flush the remaining buffer at the end of the stream and finalize every key.
+
+        Returns:
+
+            - list
+                The remaining events, in the same format as `feed()`.
+        """
+
+        events        = []
+
+        if self._buffer:
+            events.extend(self._process_line(self._buffer))
+            self._buffer = ""
+            events.extend(self._follow_up_delta())
+
+        for key in self.KEYS:
+            if key not in self.final_keys:
+                events.extend(self._finalize(key))
+
+        return events
+
+    def search_ready(self) -> bool:
+        """
+        True once every slot needed for the catalog search (including MOVE_ON) is final.
+        """
+
+        return all(key in self.final_keys for key in self.SEARCH_KEYS)
+
+    def result(self) -> dict:
+        """
+        The parsed data in the same shape as `parser()`, with MOVE_ON converted to a boolean.
+        """
+
+        parsed_data             = dict(self.parsed_data)
+        parsed_data["MOVE_ON"]  = str(parsed_data["MOVE_ON"]).lower() == "true"
+
+        return parsed_data
+
+    def _process_line(self, line : str) -> list:
+        events                   = []
+        line                     = line.strip()
+
+        if ':' in line:
+            key, value           = line.split(':', 1)
+            key                  = key.strip()
+            value                = value.strip().strip('"')
+
+            if key in self.parsed_data:
+                events.extend(self._finalize_current())
+
+                # A REPEATED KEY OVERWRITES ITS VALUE, SO IT IS NOT FINAL UNTIL THE NEXT KEY STARTS AGAIN
+                self.final_keys.discard(key)
+
+                self.parsed_data[key] = value
+                self.current_key      = key
+
+                return events
+
+        if self.current_key and line:
+            self.parsed_data[self.current_key] += ' ' + line.strip('"')
+
+        return events
+
+    def _finalize_current(self) -> list:
+        if self.current_key is None or self.current_key in self.final_keys:
+            return []
+
+        return self._finalize(self.current_key)
+
+    def _finalize(self, key : str) -> list:
+        self.final_keys.add(key)
+
+        return [("slot", key, self.parsed_data[key])]
+
+    def _follow_up_delta(self) -> list:
+        """
+        Emit newly generated FOLLOW_UP_MESSAGE text, including the not yet terminated line.
+        """
+
+        if self.current_key != "FOLLOW_UP_MESSAGE" and not self._buffer.lstrip().startswith("FOLLOW_UP_MESSAGE"):
+            return []
+
+        text      = self.parsed_data["FOLLOW_UP_MESSAGE"] if self.current_key == "FOLLOW_UP_MESSAGE" else ""
+        partial   = self._buffer.strip()
+
+        if partial.startswith("FOLLOW_UP_MESSAGE"):
+            text  = partial.split(':', 1)[1].strip().lstrip('"') if ':' in partial else ""
+
+        elif partial:
+            text += ' ' + partial.strip('"')
+
+        # HOLD BACK A TRAILING QUOTE, IT IS MOST LIKELY THE CLOSING QUOTE OF THE VALUE
+        text      = text.rstrip('"')
+
+        if len(text) <= self._follow_up_sent:
+            return []
+
+        delta                 = text[self._follow_up_sent:]
+        self._follow_up_sent  = len(text)
+
+        return [("follow_up", delta)]
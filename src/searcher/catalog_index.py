@@ -0,0 +1,445 @@
+# IN-PROCESS ATTRIBUTE INDEX FOR THE CATALOG
+
+# DEPENDENCIES
+
+import os
+import sys
+import time
+import heapq
+import threading
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from logger.logger import LoggerSetup
+from src.metrics.metrics import record_fallback
+from src.searcher.searcher import RANKINGS
+from src.searcher.searcher import rank_score
+from src.searcher.searcher import cursor_kind
+from src.searcher.searcher import FILTER_FIELDS
+from src.searcher.searcher import FULL_PAYLOAD
+from src.searcher.searcher import decode_cursor
+from src.searcher.searcher import encode_cursor
+from src.searcher.searcher import DISPLAY_FIELDS
+from src.searcher.searcher import relaxed_search
+from src.searcher.searcher import popular_payloads
+
+# LOGGER SETUP
+catalog_index_logger = LoggerSetup(logger_name = "catalog_index.py", log_filename_prefix = "catalog_index").get_logger()
+
+
+class _IndexSnapshot:
+    """
+    Immutable view of the catalog at one point in time: payloads plus packed posting bitmaps.
+    """
+
+    def __init__(self, payloads : list, postings : dict, version : object, loaded_at : float) -> None:
+        self.payloads   = payloads
+        self.postings   = postings
+        self.version    = version
+        self.loaded_at  = loaded_at
+
+
+class CatalogIndex:
+    """
+    In-memory catalog engine serving attribute filter queries without a Qdrant round trip.
+
+    The collection is loaded once and, for every value of colour, Individual_category,
+    Category and category_by_Gender, a posting list is kept as a packed NumPy bitmap
+    (one bit per product). A multi-attribute query is a vectorized bitwise AND of the
+    relevant bitmaps. Refreshes build a new snapshot off to the side and swap it in
+    atomically, so readers never block; age-based refreshes run on a background thread.
+    """
+
+    def __init__(self, client : object, collection_name : str, refresh_interval : float = None, page_size : int = 1000) -> None:
+        """
+        Initialize the catalog index. Nothing is loaded until `refresh()` or the first query.
+
+        Arguments:
+
+            - `client`                   {QdrantClient}          : The Qdrant client used to load the collection.
+
+            - `collection_name`              {str}               : Name of the collection to index.
+
+            - `refresh_interval`    {float, optional, default = None} : Seconds after which a query triggers a reload.
+                                                                     None disables age-based refreshes.
+
+            - `page_size`             {int, default = 1000}       : Scroll page size used while loading.
+        """
+
+        self.client            = client
+        self.collection_name   = collection_name
+        self.refresh_interval  = refresh_interval
+        self.page_size         = page_size
+
+        self._snapshot         = None
+        self._refresh_lock     = threading.Lock()
+        self._stop_event       = threading.Event()
+        self._refresh_thread   = None
+
+    def refresh(self, version : object = None) -> None:
+        """
+        Reload the collection and rebuild every posting bitmap.
+
+        Arguments:
+
+            - `version`         {object, optional}       : Catalog version stamp the new snapshot corresponds to.
+        """
+
+        with self._refresh_lock:
+            self._load(version = version)
+
+    def _load(self, version : object = None) -> None:
+        """
+        Scroll the collection and swap in a new snapshot. Callers hold `_refresh_lock`.
+        """
+
+        started_at           = time.perf_counter()
+
+        payloads             = []
+        next_page            = None
+
+        while True:
+            response, next_page  = self.client.scroll(collection_name  = self.collection_name,
+                                                      limit            = self.page_size,
+                                                      offset           = next_page,
+                                                      with_payload     = FULL_PAYLOAD,
+                                                      with_vectors     = False
+                                                      )
+            payloads.extend(point.payload for point in response)
+
+            if not next_page:
+                break
+
+        postings             = {field: {} for field in FILTER_FIELDS}
+
+        for field in FILTER_FIELDS:
+            values           = np.array([payload.get(field) for payload in payloads], dtype = object)
+
+            for value in set(values.tolist()):
+                if value is None:
+                    continue
+
+                postings[field][value] = np.packbits(values == value)
+
+        self._snapshot       = _IndexSnapshot(payloads   = payloads,
+                                              postings   = postings,
+                                              version    = version,
+                                              loaded_at  = time.monotonic()
+                                              )
+
+        catalog_index_logger.info(f"Catalog index loaded {len(payloads)} products from {self.collection_name} in {time.perf_counter() - started_at:.2f}s")
+
+    def _is_outdated(self, snapshot : _IndexSnapshot, version : object) -> bool:
+        return snapshot is None or (version is not None and version != snapshot.version)
+
+    def _is_expired(self, snapshot : _IndexSnapshot) -> bool:
+        return self.refresh_interval is not None and time.monotonic() - snapshot.loaded_at > self.refresh_interval
+
+    def _refresh_in_background(self, version : object) -> None:
+        """
+        Body of the one-off background refresh started by `refresh_if_stale`, which already holds `_refresh_lock`.
+        """
+
+        try:
+            self._load(version = version)
+
+        except Exception as e:
+            catalog_index_logger.error(f"Background catalog index refresh failed: {repr(e)}")
+
+        finally:
+            self._refresh_lock.release()
+
+    def refresh_if_stale(self, version : object = None) -> bool:
+        """
+        Reload the index if it was never loaded or if `version` differs from the loaded catalog
+        version; start a background reload if it is older than `refresh_interval`.
+
+        The first two cases block, since the current snapshot cannot be served; the check is
+        repeated under the refresh lock, so concurrent callers reload only once. An expired
+        snapshot keeps serving queries while the new one is built on another thread.
+
+        Arguments:
+
+            - `version`         {object, optional}       : Current catalog version stamp. None skips the version check.
+
+        Returns
+
+            - `refreshed`             {bool}             : True if a reload happened or was started in the background.
+        """
+
+        if self._is_outdated(self._snapshot, version):
+            with self._refresh_lock:
+                snapshot = self._snapshot
+
+                # ANOTHER THREAD MAY HAVE RELOADED WHILE THIS ONE WAITED FOR THE LOCK
+                if not self._is_outdated(snapshot, version):
+                    return False
+
+                self._load(version = version if version is not None else getattr(snapshot, "version", None))
+
+                return True
+
+        if not self._is_expired(self._snapshot) or not self._refresh_lock.acquire(blocking = False):
+            return False
+
+        snapshot = self._snapshot
+
+        if not self._is_expired(snapshot):
+            self._refresh_lock.release()
+
+            return False
+
+        threading.Thread(target  = self._refresh_in_background,
+                         args    = (snapshot.version,),
+                         name    = "catalog-index-refresh-once",
+                         daemon  = True
+                         ).start()
+
+        return True
+
+    def start_auto_refresh(self) -> None:
+        """
+        Start a daemon thread that reloads the index every `refresh_interval` seconds.
+        """
+
+        if not self.refresh_interval:
+            raise ValueError("refresh_interval must be set to enable periodic refreshes.")
+
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+
+        def _loop():
+            while not self._stop_event.wait(self.refresh_interval):
+                try:
+                    self.refresh(version = getattr(self._snapshot, "version", None))
+
+                except Exception as e:
+                    catalog_index_logger.error(f"Periodic catalog index refresh failed: {repr(e)}")
+
+        self._stop_event.clear()
+        self._refresh_thread = threading.Thread(target = _loop, name = "catalog-index-refresh", daemon = True)
+        self._refresh_thread.start()
+
+    def stop_auto_refresh(self) -> None:
+        """
+        Stop the periodic refresh thread, if running.
+        """
+
+        self._stop_event.set()
+
+    def match_ids(self,
+                  colour               : str = "NA",
+                  individual_category  : str = "NA",
+                  category             : str = "NA",
+                  category_by_gender   : str = "NA",
+                  version              : object = None
+                  ) -> tuple:
+        """
+        Return the row positions of all products matching the given attributes, together
+        with the snapshot they index into (a refresh may swap in a new one at any time).
+
+        Arguments:
+
+            - `colour`, `individual_category`, `category`, `category_by_gender`  {str} : Attribute values;
+                                                                                         "NA" ignores the attribute.
+
+            - `version`         {object, optional}       : Current catalog version stamp (see `get_catalog_version`);
+                                                           a different stamp than the loaded one reloads the index.
+
+        Returns
+
+            - tuple
+                (snapshot, positions): positions into `snapshot.payloads` as an np.ndarray, or None when
+                no attribute filter was given.
+        """
+
+        self.refresh_if_stale(version = version)
+
+        snapshot   = self._snapshot
+        attributes = {"colour"               : colour,
+                      "Individual_category"  : individual_category,
+                      "Category"             : category,
+                      "category_by_Gender"   : category_by_gender
+                      }
+
+        bitmaps    = []
+
+        for field, value in attributes.items():
+            if value == "NA":
+                continue
+
+            bitmap = snapshot.postings[field].get(value)
+
+            if bitmap is None:
+                return snapshot, np.empty(0, dtype = np.int64)
+
+            bitmaps.append(bitmap)
+
+        if not bitmaps:
+            return snapshot, None
+
+        combined   = np.bitwise_and.reduce(bitmaps) if len(bitmaps) > 1 else bitmaps[0]
+
+        return snapshot, np.flatnonzero(np.unpackbits(combined, count = len(snapshot.payloads)))
+
+    def search(self,
+               colour               : str = "NA",
+               individual_category  : str = "NA",
+               category             : str = "NA",
+               category_by_gender   : str = "NA",
+               version              : object = None,
+               relaxed              : list = None
+               ) -> list:
+        """
+        In-memory counterpart of `search_collection` with the same result semantics.
+
+        Matching payloads are returned for the given attributes. If no filters are provided,
+        10 popular items are returned; if the filters match nothing, they are relaxed through
+        Qdrant (see `relaxed_search`).
+
+        Arguments:
+
+            - `version`         {object, optional}       : Current catalog version stamp, see `match_ids`.
+
+            - `relaxed`           {list, optional}       : Receives the filter fields dropped to find results.
+
+        Returns
+
+            - `results`                   {list}           : A list of payload dictionaries.
+        """
+
+        try:
+
+            snapshot, positions = self.match_ids(colour               = colour,
+                                                 individual_category  = individual_category,
+                                                 category             = category,
+                                                 category_by_gender   = category_by_gender,
+                                                 version              = version
+                                                 )
+
+            if positions is None:
+                results    = popular_payloads(client = self.client, collection_name = self.collection_name)
+
+                record_fallback("no_filter")
+
+                catalog_index_logger.info(f"No filters applied. Selected {len(results)} popular points.")
+
+                return results
+
+            catalog_index_logger.info(f"Number of points after applying filters: {len(positions)}")
+
+            if len(positions):
+                return [snapshot.payloads[position] for position in positions]
+
+            results, dropped   = relaxed_search(client               = self.client,
+                                                collection_name      = self.collection_name,
+                                                colour               = colour,
+                                                individual_category  = individual_category,
+                                                category             = category,
+                                                category_by_gender   = category_by_gender
+                                                )
+
+            if relaxed is not None:
+                relaxed.extend(dropped)
+
+            return results
+
+        except Exception as e:
+            catalog_index_logger.error(f"Error in searching the catalog index: {repr(e)}")
+
+            return []
+
+    def search_page(self,
+                    colour               : str = "NA",
+                    individual_category  : str = "NA",
+                    category             : str = "NA",
+                    category_by_gender   : str = "NA",
+                    limit                : int = 10,
+                    cursor               : str = None,
+                    rank_by              : str = None,
+                    fields               : list = None,
+                    version              : object = None
+                    ) -> dict:
+        """
+        In-memory counterpart of `search_page` with the same pagination, ranking, projection
+        and fallback semantics; unranked pages follow catalog order and their cursor is an offset.
+
+        Arguments:
+
+            - `version`         {object, optional}       : Current catalog version stamp, see `match_ids`.
+
+        Returns
+
+            - dict
+                {"results": list of projected payloads, "next_cursor": str or None,
+                 "relaxed": list of filter fields dropped to find results}, plus "popular": True
+                when the results are a random sample of popular items.
+
+        Raises
+
+            - `ValueError`                             : If `rank_by` is unknown or `cursor` is invalid for this ranking.
+        """
+
+        if rank_by is not None and rank_by not in RANKINGS:
+            raise ValueError(f"Unknown ranking: {rank_by}. Choose one of {list(RANKINGS)}.")
+
+        kind                 = cursor_kind(rank_by = rank_by, index = True)
+        position             = decode_cursor(cursor, kind) if cursor else None
+        fields               = fields or DISPLAY_FIELDS
+
+        try:
+
+            snapshot, positions = self.match_ids(colour               = colour,
+                                                 individual_category  = individual_category,
+                                                 category             = category,
+                                                 category_by_gender   = category_by_gender,
+                                                 version              = version
+                                                 )
+
+            if positions is None:
+                results      = popular_payloads(client = self.client, collection_name = self.collection_name, count = limit, fields = fields)
+
+                record_fallback("no_filter")
+
+                catalog_index_logger.info(f"No filters applied. Selected {len(results)} popular points.")
+
+                return {"results": results, "next_cursor": None, "relaxed": [], "popular": True}
+
+            payloads         = snapshot.payloads
+            offset           = position or 0
+
+            if rank_by is not None:
+                _, descending = RANKINGS[rank_by]
+                select       = heapq.nlargest if descending else heapq.nsmallest
+
+                # ONE EXTRA ELEMENT TELLS WHETHER ANOTHER PAGE EXISTS
+                positions    = select(offset + limit + 1, positions.tolist(), key = lambda row: rank_score(payloads[row], rank_by))
+
+            results          = [{field : payloads[row].get(field) for field in fields} for row in positions[offset:offset + limit]]
+            next_cursor      = encode_cursor(offset + limit, kind) if len(positions) > offset + limit else None
+
+            catalog_index_logger.info(f"Number of points returned in page: {len(results)}")
+
+            if not results and position is None:
+                results, relaxed = relaxed_search(client               = self.client,
+                                                  collection_name      = self.collection_name,
+                                                  colour               = colour,
+                                                  individual_category  = individual_category,
+                                                  category             = category,
+                                                  category_by_gender   = category_by_gender,
+                                                  limit                = limit,
+                                                  fields               = fields
+                                                  )
+
+                # ONLY THE POPULAR-ITEMS FALLBACK RELAXES EVERY GIVEN FILTER
+                given        = [value for value in (colour, individual_category, category, category_by_gender) if value != "NA"]
+
+                return {"results": results, "next_cursor": None, "relaxed": relaxed, "popular": len(relaxed) == len(given)}
+
+            return {"results": results, "next_cursor": next_cursor, "relaxed": []}
+
+        except Exception as e:
+            catalog_index_logger.error(f"Error in searching the catalog index page: {repr(e)}")
+
+            return {"results": [], "next_cursor": None, "relaxed": []}
@@ -0,0 +1,472 @@
+# PROCESS-WIDE QUERY ENCODER FOR SEMANTIC RETRIEVAL
+
+# DEPENDENCIES
+
+import os
+import re
+import sys
+import json
+import queue
+import hashlib
+import threading
+import time
+import atexit
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import Future
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from config import config
+from logger.logger import LoggerSetup
+
+# LOGGER SETUP
+encoder_logger = LoggerSetup(logger_name = "encoder.py", log_filename_prefix = "encoder").get_logger()
+
+try:
+    import fcntl
+
+except ImportError:
+    fcntl = None
+
+# SAME MODEL THE CATALOG WAS EMBEDDED WITH IN THE NOTEBOOK
+DEFAULT_ENCODER_MODEL  = "all-MiniLM-L6-v2"
+
+# SUPPORTED BACKENDS: PLAIN PYTORCH, ONNX RUNTIME, OR PYTORCH WITH INT8 DYNAMIC QUANTIZATION (CPU)
+ENCODER_BACKENDS       = ["torch", "onnx", "quantized"]
+
+_encoders              = {}
+_encoders_lock         = threading.Lock()
+
+
+def load_encoder(model_name : str = DEFAULT_ENCODER_MODEL, backend : str = "torch") -> object:
+    """
+    Load a SentenceTransformer encoder for the given backend.
+
+    Arguments:
+
+        - `model_name`     {str, default = "all-MiniLM-L6-v2"}  : Sentence-Transformers model name or path.
+
+        - `backend`             {str, default = "torch"}        : "torch", "onnx" (ONNX Runtime, requires
+                                                                  sentence-transformers >= 3.2 with the `onnx` extra)
+                                                                  or "quantized" (int8 dynamic quantization of the
+                                                                  Linear layers, CPU only).
+
+    Returns
+
+        - `encoder`            {SentenceTransformer}            : The loaded encoder.
+
+    Raises
+
+        - `ValueError`                                          : If the backend is unknown.
+    """
+
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown encoder backend: {backend}. Choose one of {ENCODER_BACKENDS}.")
+
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "onnx":
+        encoder = SentenceTransformer(model_name, backend = "onnx", device = "cpu")
+
+    elif backend == "quantized":
+        import torch
+
+        encoder = SentenceTransformer(model_name, device = "cpu")
+        encoder = torch.quantization.quantize_dynamic(encoder, {torch.nn.Linear}, dtype = torch.qint8)
+
+    else:
+        encoder = SentenceTransformer(model_name)
+
+    encoder_logger.info(f"Encoder {model_name} loaded with backend: {backend}")
+
+    return encoder
+
+
+def get_encoder(model_name : str = DEFAULT_ENCODER_MODEL, backend : str = "torch") -> object:
+    """
+    Return the process-wide encoder for (model_name, backend), loading it on first use.
+
+    Loading takes seconds and hundreds of MB, so every caller in the process shares one
+    instance per configuration.
+    """
+
+    key = (model_name, backend)
+
+    if key not in _encoders:
+        with _encoders_lock:
+            if key not in _encoders:
+                _encoders[key] = load_encoder(model_name = model_name, backend = backend)
+
+    return _encoders[key]
+
+
+def normalize_query(text : str) -> str:
+    """
+    Normalize query text for the embedding cache: lower-case with collapsed whitespace.
+    """
+
+    return re.sub(r"\s+", " ", text.strip().lower())
+
+
+def _key_hash(key : str) -> int:
+    """
+    64-bit hash of a cache key stored with its row; 0 marks a row holding no valid vector.
+    """
+
+    return max(1, int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size = 8).digest(), "little"))
+
+
+class EmbeddingCache:
+    """
+    LRU cache of query embeddings with a size cap in bytes.
+
+    Vectors are stored as float32 rows of one preallocated matrix. With `path` set, the
+    matrix is a memory-mapped file and the key to row mapping is saved next to it on
+    `flush()` (at exit and from the batching thread), so the cache survives restarts
+    without re-encoding.
+
+    Every row also stores a hash of its key (in `path + ".hashes"`). Rows are rewritten as
+    soon as a key is evicted, so after an unclean exit the last flushed index can point at
+    rows that now hold other queries; `get()` only returns a row whose hash matches the key.
+
+    Only one process owns the file: the first to take an exclusive lock on `path + ".lock"`.
+    Other processes sharing the path (e.g. gunicorn workers) keep a private in-memory
+    cache, so no two processes write rows of the same file.
+    """
+
+    def __init__(self, max_bytes : int = 16 * 1024 * 1024, path : str = None, flush_interval : float = 60) -> None:
+        """
+        Arguments:
+
+            - `max_bytes`        {int, default = 16 MiB}      : Upper bound on the vector storage in bytes.
+
+            - `path`               {str, optional}          : Path of the float32 memory-mapped vector file. The key
+                                                              index is stored at `path + ".keys.json"` and the row key
+                                                              hashes at `path + ".hashes"`.
+
+            - `flush_interval`    {float, default = 60}     : Minimum seconds between two `flush_if_due()` writes.
+        """
+
+        self.max_bytes       = max_bytes
+        self.hits            = 0
+        self.misses          = 0
+        self.flush_interval  = flush_interval
+
+        self._rows           = OrderedDict()
+        self._free_rows      = []
+        self._vectors        = None
+        self._hashes         = None
+        self._lock           = threading.Lock()
+        self._lock_file      = None
+        self._dirty          = False
+        self._last_flush     = time.monotonic()
+        self._pid            = os.getpid()
+
+        self.path            = path if path and self._acquire_file(path) else None
+
+        if self.path is None:
+            return
+
+        atexit.register(self.flush)
+
+        if os.path.exists(path) and os.path.exists(path + ".keys.json"):
+            with open(path + ".keys.json", encoding = "utf-8") as keys_file:
+                index        = json.load(keys_file)
+
+            # A FILE OF ANOTHER SIZE IS RECREATED EMPTY, SO ITS INDEX NO LONGER APPLIES
+            if not self._allocate(index["dim"]):
+                encoder_logger.warning(f"Embedding cache {path} does not match EMBEDDING_CACHE_BYTES, starting empty")
+
+                return
+
+            # ROWS REWRITTEN AFTER THE INDEX WAS LAST FLUSHED NO LONGER HOLD THEIR KEY'S VECTOR
+            self._rows.update((key, row) for key, row in index["rows"] if self._hashes[row] == _key_hash(key))
+
+            used             = set(self._rows.values())
+            self._free_rows  = [row for row in range(len(self._vectors) - 1, -1, -1) if row not in used]
+
+            encoder_logger.info(f"Embedding cache loaded {len(self._rows)} of {len(index['rows'])} indexed vectors from {path}")
+
+    def _acquire_file(self, path : str) -> bool:
+        """
+        Take the exclusive lock of the cache file, returning False if another process holds it.
+        """
+
+        if fcntl is None:
+            return True
+
+        lock_file = open(path + ".lock", "a")
+
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        except OSError:
+            lock_file.close()
+
+            encoder_logger.info(f"Embedding cache {path} is owned by another process, using an in-memory cache")
+
+            return False
+
+        self._lock_file = lock_file
+
+        return True
+
+    def _allocate(self, dim : int) -> bool:
+        """
+        Allocate the vector matrix for `dim`-dimensional vectors.
+
+        Returns
+
+            - `reused`                    {bool}          : True if an existing file of the right size was mapped,
+                                                            False if the storage starts empty.
+        """
+
+        capacity          = max(1, self.max_bytes // (dim * 4))
+        reused            = False
+
+        if self.path:
+            reused        = (os.path.exists(self.path) and os.path.getsize(self.path) == capacity * dim * 4
+                             and os.path.exists(self.path + ".hashes") and os.path.getsize(self.path + ".hashes") == capacity * 8
+                             )
+            mode          = "r+" if reused else "w+"
+            self._vectors = np.memmap(self.path, dtype = np.float32, mode = mode, shape = (capacity, dim))
+            self._hashes  = np.memmap(self.path + ".hashes", dtype = np.uint64, mode = mode, shape = (capacity,))
+
+        else:
+            self._vectors = np.empty((capacity, dim), dtype = np.float32)
+            self._hashes  = np.zeros(capacity, dtype = np.uint64)
+
+        self._free_rows   = list(range(capacity - 1, -1, -1))
+
+        return reused
+
+    def get(self, key : str) -> np.ndarray:
+        """
+        Return a copy of the cached vector for `key`, or None.
+        """
+
+        with self._lock:
+            row = self._rows.get(key)
+
+            if row is not None and self._hashes[row] != _key_hash(key):
+                del self._rows[key]
+                self._free_rows.append(row)
+
+                row = None
+
+            if row is None:
+                self.misses += 1
+
+                return None
+
+            self._rows.move_to_end(key)
+            self.hits += 1
+
+            return np.array(self._vectors[row])
+
+    def set(self, key : str, vector : np.ndarray) -> None:
+        """
+        Store `vector` under `key`, evicting least recently used vectors when the byte cap is reached.
+        """
+
+        vector = np.asarray(vector, dtype = np.float32)
+
+        with self._lock:
+            if self._vectors is None:
+                self._allocate(vector.shape[-1])
+
+            row = self._rows.get(key)
+
+            if row is None:
+                if not self._free_rows:
+                    _, evicted_row = self._rows.popitem(last = False)
+                    self._free_rows.append(evicted_row)
+
+                row = self._free_rows.pop()
+
+            # THE ROW IS INVALID WHILE ITS VECTOR IS BEING REPLACED
+            self._hashes[row]  = 0
+            self._vectors[row] = vector
+            self._hashes[row]  = _key_hash(key)
+            self._rows[key]    = row
+            self._rows.move_to_end(key)
+            self._dirty        = True
+
+    def flush(self) -> None:
+        """
+        Persist the memory-mapped vectors and the key index (no-op without `path`, or in a
+        forked child, which does not own the file).
+        """
+
+        if not self.path or self._vectors is None or os.getpid() != self._pid:
+            return
+
+        with self._lock:
+            self._vectors.flush()
+            self._hashes.flush()
+
+            # WRITTEN THEN RENAMED, SO A CRASH MID-WRITE NEVER LEAVES A TRUNCATED INDEX
+            with open(self.path + ".keys.json.tmp", "w", encoding = "utf-8") as keys_file:
+                json.dump({"dim" : self._vectors.shape[1], "rows" : list(self._rows.items())}, keys_file)
+
+            os.replace(self.path + ".keys.json.tmp", self.path + ".keys.json")
+
+            self._dirty       = False
+            self._last_flush  = time.monotonic()
+
+    def flush_if_due(self) -> None:
+        """
+        `flush()` if vectors were added and `flush_interval` seconds passed since the last flush.
+        """
+
+        if self._dirty and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+
+class BatchingEncoder:
+    """
+    Micro-batches concurrent `encode` calls into one `encoder.encode()` call.
+
+    The first request of a batch waits at most `window_ms` for others to join, up to
+    `max_batch_size` texts. Sentence encoders are far more efficient per item at batch
+    size 32 than at batch size 1 on CPU.
+
+    `after_batch`, if given, is called on the batching thread after every batch, off the
+    request path (used to persist the embedding cache periodically).
+    """
+
+    def __init__(self, encoder : object, window_ms : float = 5, max_batch_size : int = 32, after_batch : callable = None) -> None:
+        self.encoder         = encoder
+        self.window          = window_ms / 1000
+        self.max_batch_size  = max_batch_size
+        self.after_batch     = after_batch
+
+        self._queue          = queue.Queue()
+        self._worker         = threading.Thread(target = self._run, name = "embedding-batcher", daemon = True)
+        self._worker.start()
+
+    def encode(self, text : str) -> np.ndarray:
+        """
+        Encode one text, blocking until its batch has been processed.
+        """
+
+        future = Future()
+        self._queue.put((text, future))
+
+        return future.result()
+
+    def _run(self) -> None:
+        while True:
+            batch         = [self._queue.get()]
+            deadline      = time.monotonic() + self.window
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+
+                if remaining <= 0:
+                    break
+
+                try:
+                    batch.append(self._queue.get(timeout = remaining))
+
+                except queue.Empty:
+                    break
+
+            texts         = [text for text, _ in batch]
+
+            try:
+                vectors   = self.encoder.encode(texts, batch_size = len(texts))
+
+                for (_, future), vector in zip(batch, vectors):
+                    future.set_result(np.asarray(vector, dtype = np.float32))
+
+            except Exception as e:
+                encoder_logger.error(f"Batched encoding failed: {repr(e)}")
+
+                for _, future in batch:
+                    future.set_exception(e)
+
+            if self.after_batch is not None:
+                try:
+                    self.after_batch()
+
+                except Exception as e:
+                    encoder_logger.error(f"Post-batch hook failed: {repr(e)}")
+
+
+class QueryEmbedder:
+    """
+    Query embedding front end: normalized-text cache in front of a micro-batching encoder.
+    """
+
+    def __init__(self, encoder : object, cache : EmbeddingCache, window_ms : float = 5, max_batch_size : int = 32) -> None:
+        self.cache    = cache
+        self.batcher  = BatchingEncoder(encoder = encoder, window_ms = window_ms, max_batch_size = max_batch_size, after_batch = cache.flush_if_due)
+
+    def embed(self, text : str) -> np.ndarray:
+        """
+        Return the embedding of `text`, encoding it only on a cache miss.
+        """
+
+        key    = normalize_query(text)
+        vector = self.cache.get(key)
+
+        if vector is None:
+            vector = self.batcher.encode(key)
+            self.cache.set(key, vector)
+
+        return vector
+
+
+_embedders             = {}
+
+# THE BATCHING THREAD DOES NOT SURVIVE fork(): A FORKED WORKER BUILDS ITS OWN EMBEDDERS
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child = _embedders.clear)
+
+
+def get_query_embedder(model_name : str = DEFAULT_ENCODER_MODEL, backend : str = "torch") -> QueryEmbedder:
+    """
+    Return the process-wide `QueryEmbedder` for (model_name, backend), configured from
+    EMBEDDING_CACHE_* and EMBEDDING_* batching settings.
+    """
+
+    key = (model_name, backend)
+
+    if key not in _embedders:
+        encoder = get_encoder(model_name = model_name, backend = backend)
+
+        with _encoders_lock:
+            if key not in _embedders:
+                cache             = EmbeddingCache(max_bytes       = config.EMBEDDING_CACHE_BYTES,
+                                                   path            = config.EMBEDDING_CACHE_PATH,
+                                                   flush_interval  = config.EMBEDDING_CACHE_FLUSH_INTERVAL
+                                                   )
+                _embedders[key]   = QueryEmbedder(encoder         = encoder,
+                                                  cache           = cache,
+                                                  window_ms       = config.EMBEDDING_BATCH_WINDOW_MS,
+                                                  max_batch_size  = config.EMBEDDING_MAX_BATCH_SIZE
+                                                  )
+
+    return _embedders[key]
+
+
+def encode_query(text : str, model_name : str = DEFAULT_ENCODER_MODEL, backend : str = "torch") -> list:
+    """
+    Embed a query string with the process-wide encoder.
+
+    Repeated queries (after normalization) are served from the embedding cache, and
+    concurrent misses are micro-batched into one `encode()` call.
+
+    Arguments:
+
+        - `text`                       {str}            : The query text.
+
+        - `model_name`, `backend`      {str}            : Encoder selection, see `load_encoder`.
+
+    Returns
+
+        - `vector`                    {list}            : The embedding as a list of floats.
+    """
+
+    return get_query_embedder(model_name = model_name, backend = backend).embed(text).tolist()
@@ -0,0 +1,265 @@
+# SEARCH RESULT CACHE KEYED ON THE SLOT TUPLE, INVALIDATED BY THE CATALOG VERSION
+
+# DEPENDENCIES
+
+import os
+import sys
+import json
+import time
+import uuid
+import hashlib
+import threading
+from collections import OrderedDict
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from config import config
+from logger.logger import LoggerSetup
+
+# LOGGER SETUP
+result_cache_logger = LoggerSetup(logger_name = "result_cache.py", log_filename_prefix = "result_cache").get_logger()
+
+# COLLECTION METADATA KEY HOLDING THE CATALOG VERSION STAMP
+CATALOG_VERSION_KEY    = "catalog_version"
+
+# CATALOG VERSION PER COLLECTION AS LAST READ BY THIS PROCESS: (READ AT, VERSION)
+_catalog_versions      = {}
+
+
+def _fresh_catalog_version(collection_name : str, max_age : float = None) -> str:
+    max_age  = config.CATALOG_VERSION_CHECK_INTERVAL if max_age is None else max_age
+    entry    = _catalog_versions.get(collection_name)
+
+    return entry[1] if entry is not None and time.monotonic() - entry[0] < max_age else None
+
+
+def _remember_catalog_version(collection_name : str, collection_info : object = None, error : Exception = None) -> str:
+    if error is None:
+        version  = str((collection_info.config.metadata or {}).get(CATALOG_VERSION_KEY, "0"))
+
+    else:
+        result_cache_logger.warning(f"Could not read the catalog version of {collection_name}: {repr(error)}")
+
+        entry    = _catalog_versions.get(collection_name)
+        version  = entry[1] if entry is not None else "0"
+
+    _catalog_versions[collection_name] = (time.monotonic(), version)
+
+    return version
+
+
+def get_catalog_version(client : object, collection_name : str, max_age : float = None) -> str:
+    """
+    Return the catalog version stamp of a collection, reading it from Qdrant at most once
+    every `max_age` seconds (defaults to `CATALOG_VERSION_CHECK_INTERVAL`).
+
+    Returns
+
+        - `version`                    {str}           : The stamp written by `bump_catalog_version`, or "0" if the
+                                                         collection has none or its metadata cannot be read.
+    """
+
+    version = _fresh_catalog_version(collection_name, max_age)
+
+    if version is not None:
+        return version
+
+    try:
+        return _remember_catalog_version(collection_name, collection_info = client.get_collection(collection_name))
+
+    except Exception as e:
+        return _remember_catalog_version(collection_name, error = e)
+
+
+async def aget_catalog_version(client : object, collection_name : str, max_age : float = None) -> str:
+    """
+    Asynchronous counterpart of `get_catalog_version` for an `AsyncQdrantClient`; both share the same per-process record.
+    """
+
+    version = _fresh_catalog_version(collection_name, max_age)
+
+    if version is not None:
+        return version
+
+    try:
+        return _remember_catalog_version(collection_name, collection_info = await client.get_collection(collection_name))
+
+    except Exception as e:
+        return _remember_catalog_version(collection_name, error = e)
+
+
+def bump_catalog_version(client : object, collection_name : str) -> str:
+    """
+    Write a new catalog version stamp into the collection metadata, so every server drops
+    its cached search results for the collection within `CATALOG_VERSION_CHECK_INTERVAL`.
+
+    Returns
+
+        - `version`                    {str}           : The new version stamp.
+    """
+
+    version = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+
+    client.update_collection(collection_name = collection_name, metadata = {CATALOG_VERSION_KEY : version})
+
+    _catalog_versions.pop(collection_name, None)
+
+    result_cache_logger.info(f"Catalog version of {collection_name} bumped to {version}")
+
+    return version
+
+
+class SearchResultCache:
+    """
+    Bounded LRU cache with TTL of search pages, keyed on the catalog version and the search
+    arguments (slot tuple, page size, cursor and ranking).
+
+    A new catalog version changes every key, so stale pages are never served and simply
+    age out of the LRU.
+    """
+
+    def __init__(self, max_size : int = 2048, ttl : float = 300) -> None:
+        """
+        Arguments:
+
+            - `max_size`          {int, default = 2048}     : Maximum number of cached pages.
+
+            - `ttl`               {float, default = 300}    : Seconds a page stays valid. None disables expiry.
+        """
+
+        self.max_size   = max_size
+        self.ttl        = ttl
+        self.hits       = 0
+        self.misses     = 0
+
+        self._entries   = OrderedDict()
+        self._lock      = threading.Lock()
+
+    @staticmethod
+    def make_key(catalog_version : str, collection_name : str, **search_arguments) -> str:
+        """
+        Build the cache key (also used as the ETag) from the catalog version and the search arguments.
+        """
+
+        raw = json.dumps([catalog_version, collection_name, search_arguments], sort_keys = True, default = str)
+
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key : str) -> dict:
+        """
+        Return the cached page for `key`, or None on a miss or an expired entry.
+        """
+
+        with self._lock:
+            entry          = self._entries.get(key)
+
+            if entry is not None and (entry[1] is None or entry[1] > time.time()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+
+                return entry[0]
+
+            if entry is not None:
+                del self._entries[key]
+
+            self.misses   += 1
+
+            return None
+
+    def contains(self, key : str) -> bool:
+        """
+        Whether an unexpired page is cached under `key`, without touching the LRU order or the counters.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            return entry is not None and (entry[1] is None or entry[1] > time.time())
+
+    def set(self, key : str, page : dict) -> None:
+        """
+        Store `page` under `key`, evicting the least recently used entry when full.
+        """
+
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+
+        with self._lock:
+            self._entries[key] = (page, expires_at)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last = False)
+
+    def stats(self) -> dict:
+        """
+        Return hit/miss counters and the current size.
+        """
+
+        total = self.hits + self.misses
+
+        return {"hits"      : self.hits,
+                "misses"    : self.misses,
+                "hit_rate"  : self.hits / total if total else 0.0,
+                "size"      : len(self._entries)
+                }
+
+
+def search_cache_key(client : object, collection_name : str, **search_arguments) -> str:
+    """
+    Cache key of a search under the collection's current catalog version. Also used as the
+    ETag of the `/search` response, so it can be checked before any search runs.
+    """
+
+    return SearchResultCache.make_key(get_catalog_version(client, collection_name), collection_name, **search_arguments)
+
+
+async def asearch_cache_key(client : object, collection_name : str, **search_arguments) -> str:
+    """
+    Asynchronous counterpart of `search_cache_key` for an `AsyncQdrantClient`.
+    """
+
+    return SearchResultCache.make_key(await aget_catalog_version(client, collection_name), collection_name, **search_arguments)
+
+
+def is_cacheable(page : dict) -> bool:
+    """
+    Whether a search page is fully determined by its key: not empty because the search
+    failed, and not a random sample of popular items.
+    """
+
+    return bool(page["results"] or page.get("next_cursor") is not None) and not page.get("popular", False)
+
+
+def cached_search(cache : SearchResultCache, key : str, search : callable) -> dict:
+    """
+    Return the page cached under `key`, or run `search()` and cache its page if `is_cacheable`.
+    """
+
+    page = cache.get(key)
+
+    if page is not None:
+        return page
+
+    page = search()
+
+    if is_cacheable(page):
+        cache.set(key, page)
+
+    return page
+
+
+async def acached_search(cache : SearchResultCache, key : str, search : callable) -> dict:
+    """
+    Asynchronous counterpart of `cached_search`: `search()` returns an awaitable page.
+    """
+
+    page = cache.get(key)
+
+    if page is not None:
+        return page
+
+    page = await search()
+
+    if is_cacheable(page):
+        cache.set(key, page)
+
+    return page
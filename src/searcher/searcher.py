@@ -4,36 +4,425 @@
 
 import os
 import sys
+import json
+import math
+import time
+import heapq
+import base64
 import random
-from math import e
-from re import search
-from pathlib import Path
+from qdrant_client.http import models
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
 import warnings
 warnings.filterwarnings(action = "ignore")
 
+from config import config
 from logger.logger import LoggerSetup
+from src.metrics.metrics import record_scroll
+from src.metrics.metrics import record_fallback
 
 # LOGGER SETUP
 searcher_logger = LoggerSetup(logger_name = "searcher.py", log_filename_prefix = "searcher").get_logger()
 
+# PAYLOAD FIELDS USED FOR ATTRIBUTE FILTERING
+FILTER_FIELDS          = ["colour", "Individual_category", "Category", "category_by_Gender"]
+
+# PAYLOAD FIELDS RENDERED BY THE FRONTEND RESULT CARDS
+DISPLAY_FIELDS         = ["name", "img", "price", "avg_rating", "ratingCount"]
+
+# PAYLOAD FIELDS WRITTEN BY INGEST FOR CHANGE DETECTION; NEVER RETURNED TO CALLERS
+INTERNAL_FIELDS        = ["text_hash", "content_hash"]
+
+# PAYLOAD SELECTOR FOR SEARCHES THAT RETURN THE FULL PAYLOAD
+FULL_PAYLOAD           = models.PayloadSelectorExclude(exclude = INTERNAL_FIELDS)
+
+# RANKING OPTIONS: PAYLOAD FIELDS NEEDED TO SCORE A POINT, AND WHETHER HIGHER SCORES RANK FIRST
+RANKINGS               = {"rating"      : (["avg_rating", "ratingCount"], True),
+                          "price_asc"   : (["price"], False),
+                          "price_desc"  : (["price"], True)
+                          }
+
+# BAYESIAN PRIOR FOR THE RATING RANKING: A PRODUCT NEEDS ABOUT THIS MANY RATINGS TO OUTWEIGH THE PRIOR MEAN
+RATING_PRIOR_COUNT     = 50
+RATING_PRIOR_MEAN      = 3.5
+
+# COLLECTIONS WHOSE KEYWORD PAYLOAD INDEXES HAVE ALREADY BEEN CREATED BY THIS PROCESS
+_indexed_collections   = set()
+
+# POPULAR-ITEMS POOL PER COLLECTION: (FETCHED AT, PAYLOADS)
+_popular_pools         = {}
+
+
+def build_filter(colour               : str = "NA",
+                 individual_category  : str = "NA",
+                 category             : str = "NA",
+                 category_by_gender   : str = "NA"
+                 ) -> models.Filter:
+    """
+    Build a Qdrant payload filter from the extracted product attributes.
+
+    Every attribute that is not "NA" becomes an exact keyword match condition and all
+    conditions are combined with AND, mirroring the client-side filter semantics.
+
+    Arguments:
+
+        - `colour`                {str, optional}      : Value for the `colour` payload field.
+
+        - `individual_category`   {str, optional}      : Value for the `Individual_category` payload field.
+
+        - `category`              {str, optional}      : Value for the `Category` payload field.
+
+        - `category_by_gender`    {str, optional}      : Value for the `category_by_Gender` payload field.
+
+    Returns
+
+        - `query_filter`      {models.Filter}          : The combined filter, or None if every attribute is "NA".
+    """
+
+    attributes      = {"colour"               : colour,
+                       "Individual_category"  : individual_category,
+                       "Category"             : category,
+                       "category_by_Gender"   : category_by_gender
+                       }
+
+    conditions      = [models.FieldCondition(key    = field,
+                                             match  = models.MatchValue(value = value)
+                                             )
+                       for field, value in attributes.items() if value != "NA"
+                       ]
+
+    if not conditions:
+        return None
+
+    return models.Filter(must = conditions)
+
+
+# ------------------------------
+# SEARCH PLANS
+#-------------------------------
+#
+# THE SEARCH LOGIC IS WRITTEN ONCE AS GENERATORS ("PLANS") THAT YIELD (CLIENT METHOD NAME, KEYWORD ARGUMENTS)
+# FOR EVERY QDRANT CALL THEY NEED AND RECEIVE ITS RESPONSE. `run_plan` EXECUTES A PLAN WITH A QdrantClient,
+# `arun_plan` WITH AN AsyncQdrantClient, SO EVERY SYNCHRONOUS FUNCTION AND ITS ASYNCHRONOUS TWIN SHARE ONE BODY.
+
+
+def run_plan(client : object, plan : object) -> object:
+    """
+    Execute a search plan with a synchronous `QdrantClient` and return the plan's result.
+
+    A failing client call is raised inside the plan, so plans handle Qdrant errors with
+    ordinary `try` / `except` blocks.
+    """
+
+    try:
+        request = next(plan)
+
+        while True:
+            method, arguments = request
+
+            try:
+                response = getattr(client, method)(**arguments)
+
+            except Exception as e:
+                request  = plan.throw(e)
+
+            else:
+                request  = plan.send(response)
+
+    except StopIteration as stop:
+        return stop.value
+
+
+async def arun_plan(client : object, plan : object) -> object:
+    """
+    Execute a search plan with an `AsyncQdrantClient`; see `run_plan`.
+    """
+
+    try:
+        request = next(plan)
+
+        while True:
+            method, arguments = request
+
+            try:
+                response = await getattr(client, method)(**arguments)
+
+            except Exception as e:
+                request  = plan.throw(e)
+
+            else:
+                request  = plan.send(response)
+
+    except StopIteration as stop:
+        return stop.value
+
+
+def _ensure_indexes_plan(collection_name : str):
+    if collection_name in _indexed_collections:
+        return
+
+    for field in FILTER_FIELDS:
+        yield "create_payload_index", dict(collection_name  = collection_name,
+                                           field_name       = field,
+                                           field_schema     = models.PayloadSchemaType.KEYWORD
+                                           )
+
+    # THE POPULAR-ITEMS POOL ORDERS BY ratingCount, WHICH NEEDS A NUMERIC INDEX
+    yield "create_payload_index", dict(collection_name  = collection_name,
+                                       field_name       = "ratingCount",
+                                       field_schema     = models.PayloadSchemaType.FLOAT
+                                       )
+
+    _indexed_collections.add(collection_name)
+
+    searcher_logger.info(f"Payload indexes ensured on {collection_name} for fields: {FILTER_FIELDS + ['ratingCount']}")
+
+
+def ensure_payload_indexes(client : object, collection_name : str) -> None:
+    """
+    Create keyword payload indexes for the filter fields, and the float `ratingCount` index
+    the popular-items pool orders by, once per collection and process.
+
+    Qdrant treats index creation on an existing index as a no-op, so this is safe to call
+    from every request; after the first successful call it returns immediately.
+
+    Arguments:
+
+        - `client`                {QdrantClient}       : The Qdrant client instance.
+
+        - `collection_name`           {str}            : Name of the collection to index.
+    """
+
+    run_plan(client, _ensure_indexes_plan(collection_name))
+
+
+async def aensure_payload_indexes(client : object, collection_name : str) -> None:
+    """
+    Asynchronous counterpart of `ensure_payload_indexes`; both share the same per-process record.
+    """
+
+    await arun_plan(client, _ensure_indexes_plan(collection_name))
+
+
+def _project(payloads : list, fields : list = None) -> list:
+    return [{field : payload.get(field) for field in fields} for payload in payloads] if fields else payloads
+
+
+def _popular_pool_plan(collection_name : str):
+    """
+    The collection's most-rated products, fetched once and refreshed every POPULAR_REFRESH_INTERVAL seconds.
+
+    Falls back to a server-side random sample when ordering by `ratingCount` is not possible.
+    """
+
+    fetched_at, pool = _popular_pools.get(collection_name, (0.0, None))
+
+    if pool is not None and time.monotonic() - fetched_at < config.POPULAR_REFRESH_INTERVAL:
+        return pool
+
+    try:
+        yield from _ensure_indexes_plan(collection_name)
+
+        points, _ = yield "scroll", dict(collection_name  = collection_name,
+                                         limit            = config.POPULAR_POOL_SIZE,
+                                         order_by         = models.OrderBy(key = "ratingCount", direction = models.Direction.DESC),
+                                         with_payload     = FULL_PAYLOAD,
+                                         with_vectors     = False
+                                         )
+
+    except Exception as e:
+        searcher_logger.warning(f"Could not order by ratingCount, using a random pool: {repr(e)}")
+
+        response  = yield "query_points", dict(collection_name  = collection_name,
+                                               query            = models.SampleQuery(sample = models.Sample.RANDOM),
+                                               limit            = config.POPULAR_POOL_SIZE,
+                                               with_payload     = FULL_PAYLOAD
+                                               )
+        points    = response.points
+
+    pool          = [point.payload for point in points]
+    _popular_pools[collection_name] = (time.monotonic(), pool)
+
+    searcher_logger.info(f"Popular items pool refreshed for {collection_name}: {len(pool)} items")
+
+    return pool
+
+
+def _popular_plan(collection_name : str, count : int = 10, fields : list = None):
+    pool = yield from _popular_pool_plan(collection_name)
+
+    return _project(random.sample(pool, min(count, len(pool))), fields)
+
+
+def popular_payloads(client : object, collection_name : str, count : int = 10, fields : list = None) -> list:
+    """
+    Return `count` products sampled from the periodically refreshed popular-items pool.
+    Used for unfiltered queries and when nothing matches even after relaxing filters.
+    """
+
+    return run_plan(client, _popular_plan(collection_name, count = count, fields = fields))
+
+
+async def apopular_payloads(client : object, collection_name : str, count : int = 10, fields : list = None) -> list:
+    """
+    Asynchronous counterpart of `popular_payloads`.
+    """
+
+    return await arun_plan(client, _popular_plan(collection_name, count = count, fields = fields))
+
+
+def relaxation_tiers(colour               : str = "NA",
+                     individual_category  : str = "NA",
+                     category             : str = "NA",
+                     category_by_gender   : str = "NA",
+                     order                : list = None
+                     ) -> list:
+    """
+    Progressively relaxed filters for a query that matched nothing.
+
+    Filters are dropped cumulatively in `order` (default FALLBACK_RELAX_ORDER); attributes that
+    are already "NA" are skipped, and tiers that would leave no filter at all are not produced.
+
+    Returns
+
+        - list
+            [(relaxed field names, models.Filter), ...] from least to most relaxed.
+    """
+
+    attributes  = dict(zip(FILTER_FIELDS, [colour, individual_category, category, category_by_gender]))
+    relaxed     = []
+    tiers       = []
+
+    for field in order or config.FALLBACK_RELAX_ORDER:
+        if attributes.get(field, "NA") == "NA":
+            continue
+
+        attributes[field] = "NA"
+        relaxed           = relaxed + [field]
+        query_filter      = build_filter(colour               = attributes["colour"],
+                                         individual_category  = attributes["Individual_category"],
+                                         category             = attributes["Category"],
+                                         category_by_gender   = attributes["category_by_Gender"]
+                                         )
+
+        if query_filter is None:
+            break
+
+        tiers.append((relaxed, query_filter))
+
+    return tiers
+
+
+def _relaxed_plan(collection_name      : str,
+                  colour               : str = "NA",
+                  individual_category  : str = "NA",
+                  category             : str = "NA",
+                  category_by_gender   : str = "NA",
+                  limit                : int = 10,
+                  fields               : list = None,
+                  query_vector         : list = None
+                  ):
+    tiers     = relaxation_tiers(colour, individual_category, category, category_by_gender)
+
+    if tiers:
+        responses = yield "query_batch_points", dict(collection_name = collection_name, requests = _tier_requests(tiers, limit, fields, query_vector))
+        match     = _first_nonempty_tier(tiers, responses)
+
+        if match is not None:
+            return match
+
+    record_fallback("no_match")
+
+    searcher_logger.info("No points matched even after relaxing filters. Returning popular items.")
+
+    results   = yield from _popular_plan(collection_name, count = limit, fields = fields)
+
+    return results, _given_fields(colour, individual_category, category, category_by_gender)
+
+
+def relaxed_search(client               : object,
+                   collection_name      : str,
+                   colour               : str = "NA",
+                   individual_category  : str = "NA",
+                   category             : str = "NA",
+                   category_by_gender   : str = "NA",
+                   limit                : int = 10,
+                   fields               : list = None,
+                   query_vector         : list = None
+                   ) -> tuple:
+    """
+    Fallback for a filter combination that matched nothing.
+
+    Every relaxation tier is evaluated in one `query_batch_points` request and the least
+    relaxed non-empty tier wins. With a `query_vector` each tier is a nearest-neighbour
+    query, so its results stay in similarity order. If every tier is empty, popular products
+    are returned and all given filters count as relaxed.
+
+    Returns
+
+        - tuple
+            (list of payloads, list of relaxed filter fields)
+    """
+
+    return run_plan(client, _relaxed_plan(collection_name, colour, individual_category, category, category_by_gender, limit, fields, query_vector))
+
+
+async def arelaxed_search(client               : object,
+                          collection_name      : str,
+                          colour               : str = "NA",
+                          individual_category  : str = "NA",
+                          category             : str = "NA",
+                          category_by_gender   : str = "NA",
+                          limit                : int = 10,
+                          fields               : list = None,
+                          query_vector         : list = None
+                          ) -> tuple:
+    """
+    Asynchronous counterpart of `relaxed_search`.
+    """
+
+    return await arun_plan(client, _relaxed_plan(collection_name, colour, individual_category, category, category_by_gender, limit, fields, query_vector))
+
+
+def _tier_requests(tiers : list, limit : int, fields : list, query_vector : list = None) -> list:
+    return [models.QueryRequest(query = query_vector, filter = query_filter, limit = limit, with_payload = fields or FULL_PAYLOAD) for _, query_filter in tiers]
+
+
+def _first_nonempty_tier(tiers : list, responses : list) -> tuple:
+    for (relaxed, _), response in zip(tiers, responses):
+        if response.points:
+            record_fallback("relaxed")
+
+            searcher_logger.info(f"No exact match; relaxed filters {relaxed} returned {len(response.points)} points")
+
+            return [point.payload for point in response.points], relaxed
+
+    return None
+
+
+def _given_fields(*values : str) -> list:
+    return [field for field, value in zip(FILTER_FIELDS, values) if value != "NA"]
+
+
 def search_collection(client               : object,
                       collection_name      :str, 
                       colour               : str = "NA",
                       individual_category  : str = "NA",
                       category             : str = "NA",
-                      category_by_gender   : str = "NA"
+                      category_by_gender   : str = "NA",
+                      server_side_filter   : bool = True,
+                      relaxed              : list = None
                       ) -> list:
     """
     Search and retrieve items from a Qdrant collection based on optional filtering attributes.
 
-    This function scrolls through all points in the specified Qdrant collection and
-    applies dynamic filters (colour, individual_category, category, category_by_gender).
-    If filters are provided, only matching items are returned. If no filters are provided,
-    10 random items are sampled and returned. If filters yield no results, 10 random
-    items are returned as a fallback.
+    By default the attribute filters are pushed down to Qdrant as a keyword payload filter,
+    so only matching points are transferred. With `server_side_filter = False` the legacy
+    behaviour is used: every point is scrolled and the filters are applied in Python.
+    In server-side mode, 10 popular items are returned when no filters are provided, and
+    filters that yield no results are relaxed (see `relaxed_search`). The legacy mode keeps
+    its 10 random items for both cases.
 
     Arguments:
 
@@ -49,6 +438,12 @@ def search_collection(client               : object,
         - `category_by_gender`    {str, optional}      : Filter results by the `category_by_Gender` attribute.
                                                          If "NA", this filter is ignored.
 
+        - `server_side_filter`    {bool, default = True} : Push the filters down to Qdrant instead of scrolling
+                                                           the whole collection and filtering in Python.
+
+        - `relaxed`                 {list, optional}     : Receives the filter fields dropped to find results
+                                                           (server-side mode).
+
     Returns
 
         - `results`                   {list}           : A list of payload dictionaries representing the filtered or
@@ -57,6 +452,17 @@ def search_collection(client               : object,
 
     try:
 
+        searcher_logger.info(f"Searching the collection with filters - colour: {colour}, individual_category: {individual_category}, category: {category}")
+
+        if server_side_filter:
+            return run_plan(client, _collection_plan(collection_name      = collection_name,
+                                                     colour               = colour,
+                                                     individual_category  = individual_category,
+                                                     category             = category,
+                                                     category_by_gender   = category_by_gender,
+                                                     relaxed              = relaxed
+                                                     ))
+
         # CONSTRUCT FILTER LOGIC BASED ON THE ATTRIBUTES
         filters                  = []
 
@@ -75,19 +481,22 @@ def search_collection(client               : object,
         # RETRIEVE AND FILTER POINTS
         all_points               = []
         next_page                = None
-
-        searcher_logger.info(f"Searching the collection with filters - colour: {colour}, individual_category: {individual_category}, category: {category}")
+        pages                    = 0
 
         while True:
             response, next_page  = client.scroll(collection_name  = collection_name,
                                                 limit            = 1000,
-                                                offset           = next_page
+                                                offset           = next_page,
+                                                with_payload     = FULL_PAYLOAD
                                                 )
             all_points.extend(response)
+            pages               += 1
 
             if not next_page:
                 break
 
+        record_scroll(pages = pages, points = len(all_points))
+
         # FILTERED POINTS
         if filters:
             filtered_points = [point for point in all_points
@@ -100,6 +509,8 @@ def search_collection(client               : object,
         else:
             filtered_points = random.sample(all_points, min(10, len(all_points)))
 
+            record_fallback("no_filter")
+
             searcher_logger.info(f"No filters applied. Randomly selected {len(filtered_points)} points.")
 
         # OUTPUT OF THE RESULTS
@@ -112,6 +523,8 @@ def search_collection(client               : object,
             random_points   = random.sample(all_points, min(10, len(all_points)))
             results         = [point.payload for point in random_points]
 
+            record_fallback("no_match")
+
             searcher_logger.info(f"No points matched the filters. Randomly selected {len(results)} points as fallback.")
 
         return results
@@ -119,4 +532,675 @@ def search_collection(client               : object,
     except Exception as e:
         searcher_logger.error(f"Error in searching the collection: {repr(e)}")
         
-        return []
\ No newline at end of file
+        return []
+
+
+def _collection_plan(collection_name      : str,
+                     colour               : str,
+                     individual_category  : str,
+                     category             : str,
+                     category_by_gender   : str,
+                     relaxed              : list = None
+                     ):
+    """
+    Server-side variant of `search_collection`: only points matching the Qdrant filter are scrolled.
+    """
+
+    query_filter             = build_filter(colour               = colour,
+                                            individual_category  = individual_category,
+                                            category             = category,
+                                            category_by_gender   = category_by_gender
+                                            )
+
+    # POPULAR 10 POINTS IF NO FILTERS IS APPLIED
+    if query_filter is None:
+        results              = yield from _popular_plan(collection_name)
+
+        record_fallback("no_filter")
+
+        searcher_logger.info(f"No filters applied. Selected {len(results)} popular points.")
+
+        return results
+
+    yield from _ensure_indexes_plan(collection_name)
+
+    # RETRIEVE ONLY THE MATCHING POINTS
+    results                  = []
+    next_page                = None
+    pages                    = 0
+
+    while True:
+        response, next_page  = yield "scroll", dict(collection_name  = collection_name,
+                                                    scroll_filter    = query_filter,
+                                                    limit            = 1000,
+                                                    offset           = next_page,
+                                                    with_payload     = FULL_PAYLOAD,
+                                                    with_vectors     = False
+                                                    )
+        results.extend(point.payload for point in response)
+        pages               += 1
+
+        if not next_page:
+            break
+
+    record_scroll(pages = pages, points = len(results))
+
+    searcher_logger.info(f"Number of points after applying filters: {len(results)}")
+
+    # RELAX THE FILTERS IF NOTHING MATCHED
+    if not results:
+        results, dropped     = yield from _relaxed_plan(collection_name      = collection_name,
+                                                        colour               = colour,
+                                                        individual_category  = individual_category,
+                                                        category             = category,
+                                                        category_by_gender   = category_by_gender
+                                                        )
+
+        if relaxed is not None:
+            relaxed.extend(dropped)
+
+    return results
+
+
+async def asearch_collection(client               : object,
+                             collection_name      : str,
+                             colour               : str = "NA",
+                             individual_category  : str = "NA",
+                             category             : str = "NA",
+                             category_by_gender   : str = "NA",
+                             relaxed              : list = None
+                             ) -> list:
+    """
+    Asynchronous counterpart of `search_collection` for an `AsyncQdrantClient`.
+
+    Filters are always pushed down to Qdrant. Result semantics match the synchronous
+    server-side mode: matching payloads, 10 popular items when no filter is given, or the
+    relaxed-filter fallback when nothing matches.
+
+    Arguments:
+
+        - `client`             {AsyncQdrantClient}     : The asynchronous Qdrant client instance.
+
+        - `collection_name`           {str}            : Name of the collection to search.
+
+        - `colour`, `individual_category`, `category`, `category_by_gender`  {str, optional} : Attribute filters;
+                                                                                              "NA" ignores the attribute.
+
+        - `relaxed`                 {list, optional}     : Receives the filter fields dropped to find results.
+
+    Returns
+
+        - `results`                   {list}           : A list of payload dictionaries.
+    """
+
+    try:
+
+        searcher_logger.info(f"Searching the collection asynchronously with filters - colour: {colour}, individual_category: {individual_category}, category: {category}")
+
+        return await arun_plan(client, _collection_plan(collection_name      = collection_name,
+                                                        colour               = colour,
+                                                        individual_category  = individual_category,
+                                                        category             = category,
+                                                        category_by_gender   = category_by_gender,
+                                                        relaxed              = relaxed
+                                                        ))
+
+    except Exception as e:
+        searcher_logger.error(f"Error in searching the collection: {repr(e)}")
+        
+        return []
+
+
+def _to_float(value : object, default : float = 0.0) -> float:
+    try:
+        number = float(value)
+
+        return number if math.isfinite(number) else default
+
+    except (TypeError, ValueError):
+        return default
+
+
+def rank_score(payload : dict, rank_by : str) -> float:
+    """
+    Score a payload for ranking.
+
+    "rating" is a Bayesian average: avg_rating shrunk towards RATING_PRIOR_MEAN for products
+    with few ratings, so a 5.0 from 2 reviews does not beat a 4.6 from 2,000. The price
+    rankings score by price.
+
+    Arguments:
+
+        - `payload`                   {dict}           : The (projected) point payload.
+
+        - `rank_by`                   {str}            : One of the keys of RANKINGS.
+
+    Returns
+
+        - `score`                    {float}           : The ranking score.
+    """
+
+    if rank_by == "rating":
+        count  = _to_float(payload.get("ratingCount"))
+        rating = _to_float(payload.get("avg_rating"), RATING_PRIOR_MEAN)
+
+        return (count * rating + RATING_PRIOR_COUNT * RATING_PRIOR_MEAN) / (count + RATING_PRIOR_COUNT)
+
+    return _to_float(payload.get("price"), math.inf if rank_by == "price_asc" else -math.inf)
+
+
+def cursor_kind(rank_by : str = None, semantic : bool = False, index : bool = False) -> str:
+    """
+    The kind of search a cursor belongs to: "semantic", "rank:<rank_by>", "index" (unranked
+    catalog index pages) or "scroll".
+
+    A cursor only wraps a position (a point ID or an offset), which means something else
+    in every other kind of search, so cursors carry their kind and are rejected elsewhere.
+    """
+
+    if semantic:
+        return "semantic"
+
+    if rank_by is not None:
+        return f"rank:{rank_by}"
+
+    return "index" if index else "scroll"
+
+
+def encode_cursor(position : object, kind : str) -> str:
+    """
+    Encode a pagination position (a Qdrant point ID or a ranked offset) of a `kind` search as an opaque cursor.
+    """
+
+    return base64.urlsafe_b64encode(json.dumps([kind, position]).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor : str, kind : str) -> object:
+    """
+    Decode a cursor produced by `encode_cursor` for a `kind` search.
+
+    Raises
+
+        - `ValueError`                                 : If the cursor is malformed or belongs to another kind of search.
+    """
+
+    try:
+        cursor_of, position = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    if cursor_of != kind:
+        raise ValueError(f"Cursor of a {cursor_of} search cannot continue a {kind} search")
+
+    return position
+
+
+def parse_limit(value : object, default : int, maximum : int) -> int:
+    """
+    Validate a requested result count: missing means `default`, larger values are capped at `maximum`.
+
+    Raises
+
+        - `ValueError`                                 : If the value is not a positive integer.
+    """
+
+    if value is None or value == "":
+        return default
+
+    try:
+        limit = int(value)
+
+    except (TypeError, ValueError):
+        raise ValueError(f"limit must be a positive integer, got {value!r}")
+
+    if isinstance(value, bool) or isinstance(value, float) and value != limit or limit < 1:
+        raise ValueError(f"limit must be a positive integer, got {value!r}")
+
+    return min(limit, maximum)
+
+
+def page_arguments(data : dict) -> dict:
+    """
+    Validated pagination and ranking options (`limit`, `cursor`, `rank_by`) of a search request,
+    with the page size capped at `SEARCH_MAX_PAGE_SIZE`.
+
+    Raises
+
+        - `ValueError`                                 : If an option is invalid, or the cursor belongs to another
+                                                         search mode or ranking; servers answer 400.
+    """
+
+    cursor  = data.get('cursor') or None
+    rank_by = data.get('rank_by') or None
+
+    if rank_by is not None and rank_by not in RANKINGS:
+        raise ValueError(f"Unknown ranking: {rank_by}. Choose one of {list(RANKINGS)}.")
+
+    if cursor is not None:
+        decode_cursor(cursor, cursor_kind(rank_by = rank_by, semantic = config.SEARCH_MODE == "semantic", index = config.SEARCH_MODE == "index"))
+
+    return {"limit"    : parse_limit(data.get('limit'), default = config.SEARCH_PAGE_SIZE, maximum = config.SEARCH_MAX_PAGE_SIZE),
+            "cursor"   : cursor,
+            "rank_by"  : rank_by
+            }
+
+
+def _page_plan(collection_name      : str,
+               colour               : str,
+               individual_category  : str,
+               category             : str,
+               category_by_gender   : str,
+               limit                : int,
+               position             : object,
+               rank_by              : str,
+               fields               : list
+               ):
+    query_filter             = build_filter(colour               = colour,
+                                            individual_category  = individual_category,
+                                            category             = category,
+                                            category_by_gender   = category_by_gender
+                                            )
+
+    if query_filter is None:
+        results              = yield from _popular_plan(collection_name, count = limit, fields = fields)
+
+        record_fallback("no_filter")
+
+        searcher_logger.info(f"No filters applied. Selected {len(results)} popular points.")
+
+        return {"results": results, "next_cursor": None, "relaxed": [], "popular": True}
+
+    yield from _ensure_indexes_plan(collection_name)
+
+    if rank_by is None:
+        response, next_page  = yield "scroll", dict(collection_name  = collection_name,
+                                                    scroll_filter    = query_filter,
+                                                    limit            = limit,
+                                                    offset           = position,
+                                                    with_payload     = fields,
+                                                    with_vectors     = False
+                                                    )
+        results              = [point.payload for point in response]
+        next_cursor          = encode_cursor(next_page, cursor_kind()) if next_page is not None else None
+
+        record_scroll(pages = 1, points = len(results))
+
+    else:
+        offset               = position or 0
+        rank_fields, descending = RANKINGS[rank_by]
+        select               = heapq.nlargest if descending else heapq.nsmallest
+        scored               = []
+        next_page            = None
+        pages                = 0
+        scanned              = 0
+
+        while True:
+            response, next_page = yield "scroll", dict(collection_name  = collection_name,
+                                                       scroll_filter    = query_filter,
+                                                       limit            = 1000,
+                                                       offset           = next_page,
+                                                       with_payload     = rank_fields,
+                                                       with_vectors     = False
+                                                       )
+            pages           += 1
+            scanned         += len(response)
+
+            # KEEP ONLY THE BEST offset + limit + 1 SO MEMORY STAYS BOUNDED; THE EXTRA ONE TELLS WHETHER ANOTHER PAGE EXISTS
+            scored           = select(offset + limit + 1, scored + [(rank_score(point.payload, rank_by), point.id) for point in response], key = lambda item: item[0])
+
+            if not next_page:
+                break
+
+        page_ids             = [point_id for _, point_id in scored[offset:offset + limit]]
+
+        records              = yield "retrieve", dict(collection_name  = collection_name,
+                                                      ids              = page_ids,
+                                                      with_payload     = fields,
+                                                      with_vectors     = False
+                                                      )
+        payloads_by_id       = {record.id: record.payload for record in records}
+        results              = [payloads_by_id[point_id] for point_id in page_ids if point_id in payloads_by_id]
+        next_cursor          = encode_cursor(offset + limit, cursor_kind(rank_by)) if len(scored) > offset + limit else None
+
+        record_scroll(pages = pages + 1, points = scanned + len(records))
+
+    searcher_logger.info(f"Number of points returned in page: {len(results)}")
+
+    if not results and position is None:
+        results, relaxed     = yield from _relaxed_plan(collection_name      = collection_name,
+                                                        colour               = colour,
+                                                        individual_category  = individual_category,
+                                                        category             = category,
+                                                        category_by_gender   = category_by_gender,
+                                                        limit                = limit,
+                                                        fields               = fields
+                                                        )
+
+        # ONLY THE POPULAR-ITEMS FALLBACK RELAXES EVERY GIVEN FILTER
+        popular              = relaxed == _given_fields(colour, individual_category, category, category_by_gender)
+
+        return {"results": results, "next_cursor": None, "relaxed": relaxed, "popular": popular}
+
+    return {"results": results, "next_cursor": next_cursor, "relaxed": []}
+
+
+def _checked_page_position(cursor : str, rank_by : str) -> object:
+    if rank_by is not None and rank_by not in RANKINGS:
+        raise ValueError(f"Unknown ranking: {rank_by}. Choose one of {list(RANKINGS)}.")
+
+    return decode_cursor(cursor, cursor_kind(rank_by)) if cursor else None
+
+
+def search_page(client               : object,
+                collection_name      : str,
+                colour               : str = "NA",
+                individual_category  : str = "NA",
+                category             : str = "NA",
+                category_by_gender   : str = "NA",
+                limit                : int = 10,
+                cursor               : str = None,
+                rank_by              : str = None,
+                fields               : list = None
+                ) -> dict:
+    """
+    Return one page of matching products, optionally ranked, with only the requested payload fields.
+
+    Without `rank_by`, Qdrant's own scroll order is used and the cursor wraps the next point
+    ID, so each page costs one request of `limit` points. With `rank_by`, the matching points
+    are scanned with only the ranking fields projected, the best `offset + limit` are kept in
+    a bounded heap, and the display fields are fetched for the page's point IDs only.
+    If no filters are provided, `limit` popular items are returned. If the filters match
+    nothing, they are relaxed (see `relaxed_search`). Neither case has a next page.
+
+    Arguments:
+
+        - `colour`, `individual_category`, `category`, `category_by_gender`  {str, optional} : Attribute filters;
+                                                                                              "NA" ignores the attribute.
+
+        - `limit`                   {int, default = 10}       : Page size.
+
+        - `cursor`                    {str, optional}         : Cursor returned as `next_cursor` by the previous page.
+
+        - `rank_by`                   {str, optional}         : "rating", "price_asc" or "price_desc".
+
+        - `fields`              {list, default = DISPLAY_FIELDS} : Payload fields to fetch and return.
+
+    Returns
+
+        - dict
+            {"results": list of projected payloads, "next_cursor": str or None,
+             "relaxed": list of filter fields dropped to find results}, plus "popular": True
+            when the results are a random sample of popular items.
+
+    Raises
+
+        - `ValueError`                                 : If `rank_by` is unknown or `cursor` is invalid for this ranking.
+    """
+
+    position = _checked_page_position(cursor, rank_by)
+
+    try:
+        return run_plan(client, _page_plan(collection_name, colour, individual_category, category, category_by_gender, limit, position, rank_by, fields or DISPLAY_FIELDS))
+
+    except Exception as e:
+        searcher_logger.error(f"Error in searching the collection page: {repr(e)}")
+
+        return {"results": [], "next_cursor": None, "relaxed": []}
+
+
+async def asearch_page(client               : object,
+                       collection_name      : str,
+                       colour               : str = "NA",
+                       individual_category  : str = "NA",
+                       category             : str = "NA",
+                       category_by_gender   : str = "NA",
+                       limit                : int = 10,
+                       cursor               : str = None,
+                       rank_by              : str = None,
+                       fields               : list = None
+                       ) -> dict:
+    """
+    Asynchronous counterpart of `search_page` for an `AsyncQdrantClient`, with the same
+    pagination, ranking, projection and fallback semantics.
+    """
+
+    position = _checked_page_position(cursor, rank_by)
+
+    try:
+        return await arun_plan(client, _page_plan(collection_name, colour, individual_category, category, category_by_gender, limit, position, rank_by, fields or DISPLAY_FIELDS))
+
+    except Exception as e:
+        searcher_logger.error(f"Error in searching the collection page: {repr(e)}")
+
+        return {"results": [], "next_cursor": None, "relaxed": []}
+
+
+def iter_search_pages(client               : object,
+                      collection_name      : str,
+                      colour               : str = "NA",
+                      individual_category  : str = "NA",
+                      category             : str = "NA",
+                      category_by_gender   : str = "NA",
+                      limit                : int = 1000,
+                      page_size            : int = 100,
+                      fields               : list = None,
+                      relaxed              : list = None
+                      ):
+    """
+    Yield the matching products scroll page by scroll page, so a caller can write each page
+    out before the next one is fetched and the full result list is never held in memory.
+
+    The fallbacks match `search_page`: popular items without filters, relaxed filters when
+    nothing matches. Fields dropped by the relaxation are appended to `relaxed` if given.
+
+    Arguments:
+
+        - `colour`, `individual_category`, `category`, `category_by_gender`  {str, optional} : Attribute filters;
+                                                                                              "NA" ignores the attribute.
+
+        - `limit`                  {int, default = 1000}      : Maximum number of products in total.
+
+        - `page_size`               {int, default = 100}      : Points per scroll request.
+
+        - `fields`              {list, default = DISPLAY_FIELDS} : Payload fields to fetch and return.
+
+        - `relaxed`                  {list, optional}         : Receives the relaxed filter fields.
+
+    Yields
+
+        - list
+            Projected payloads of one scroll page.
+    """
+
+    fields        = fields or DISPLAY_FIELDS
+    query_filter  = build_filter(colour               = colour,
+                                 individual_category  = individual_category,
+                                 category             = category,
+                                 category_by_gender   = category_by_gender
+                                 )
+
+    if query_filter is None:
+        record_fallback("no_filter")
+
+        yield popular_payloads(client = client, collection_name = collection_name, count = limit, fields = fields)
+
+        return
+
+    ensure_payload_indexes(client = client, collection_name = collection_name)
+
+    next_page     = None
+    returned      = 0
+    pages         = 0
+
+    try:
+        while returned < limit:
+            response, next_page = client.scroll(collection_name  = collection_name,
+                                                scroll_filter    = query_filter,
+                                                limit            = min(page_size, limit - returned),
+                                                offset           = next_page,
+                                                with_payload     = fields,
+                                                with_vectors     = False
+                                                )
+            pages        += 1
+            returned     += len(response)
+
+            if response:
+                yield [point.payload for point in response]
+
+            if next_page is None:
+                break
+
+    finally:
+        record_scroll(pages = pages, points = returned)
+
+    searcher_logger.info(f"Streamed {returned} points in {pages} scroll pages")
+
+    if not returned:
+        results, dropped = relaxed_search(client               = client,
+                                          collection_name      = collection_name,
+                                          colour               = colour,
+                                          individual_category  = individual_category,
+                                          category             = category,
+                                          category_by_gender   = category_by_gender,
+                                          limit                = min(limit, config.SEARCH_MAX_PAGE_SIZE),
+                                          fields               = fields
+                                          )
+
+        if relaxed is not None:
+            relaxed.extend(dropped)
+
+        yield results
+
+
+def _semantic_plan(collection_name      : str,
+                   query_vector         : list,
+                   colour               : str,
+                   individual_category  : str,
+                   category             : str,
+                   category_by_gender   : str,
+                   limit                : int,
+                   offset               : int,
+                   fields               : list
+                   ):
+    query_filter             = build_filter(colour               = colour,
+                                            individual_category  = individual_category,
+                                            category             = category,
+                                            category_by_gender   = category_by_gender
+                                            )
+
+    if query_filter is not None:
+        yield from _ensure_indexes_plan(collection_name)
+
+    response                 = yield "query_points", dict(collection_name  = collection_name,
+                                                          query            = query_vector,
+                                                          query_filter     = query_filter,
+                                                          limit            = limit + 1,
+                                                          offset           = offset,
+                                                          with_payload     = fields
+                                                          )
+
+    points                   = response.points
+    results                  = [point.payload for point in points[:limit]]
+    next_cursor              = encode_cursor(offset + limit, cursor_kind(semantic = True)) if len(points) > limit else None
+
+    record_scroll(pages = 1, points = len(points))
+
+    searcher_logger.info(f"Semantic search returned {len(results)} points")
+
+    if not results and query_filter is not None and offset == 0:
+        results, relaxed     = yield from _relaxed_plan(collection_name      = collection_name,
+                                                        colour               = colour,
+                                                        individual_category  = individual_category,
+                                                        category             = category,
+                                                        category_by_gender   = category_by_gender,
+                                                        limit                = limit,
+                                                        fields               = fields,
+                                                        query_vector         = query_vector
+                                                        )
+
+        return {"results": results, "next_cursor": None, "relaxed": relaxed}
+
+    return {"results": results, "next_cursor": next_cursor, "relaxed": []}
+
+
+def semantic_search(client               : object,
+                    collection_name      : str,
+                    query_vector         : list,
+                    colour               : str = "NA",
+                    individual_category  : str = "NA",
+                    category             : str = "NA",
+                    category_by_gender   : str = "NA",
+                    limit                : int = 10,
+                    cursor               : str = None,
+                    fields               : list = None
+                    ) -> dict:
+    """
+    Approximate nearest-neighbour search over the stored product embeddings, constrained by
+    whichever attributes were extracted.
+
+    The collection's COSINE vectors (MiniLM embeddings of name, size, categories, gender and
+    brand) are searched with the query embedding in one indexed lookup. Attributes that are
+    not "NA" become a payload filter, so partial or misspelled queries still get the top-k
+    most similar products within the known slots. If the filters match nothing, they are
+    relaxed like in `search_page` (see `relaxed_search`), ranking each tier by similarity.
+
+    Arguments:
+
+        - `query_vector`               {list}                 : Embedding of the user request (see `encode_query`).
+
+        - `colour`, `individual_category`, `category`, `category_by_gender`  {str, optional} : Attribute filters;
+                                                                                              "NA" ignores the attribute.
+
+        - `limit`                   {int, default = 10}       : Page size.
+
+        - `cursor`                    {str, optional}         : Cursor returned as `next_cursor` by the previous page.
+
+        - `fields`              {list, default = DISPLAY_FIELDS} : Payload fields to return.
+
+    Returns
+
+        - dict
+            {"results": list of projected payloads in similarity order, "next_cursor": str or None,
+             "relaxed": list of filter fields dropped to find results}
+
+    Raises
+
+        - `ValueError`                                 : If `cursor` is not a semantic search cursor.
+    """
+
+    offset = decode_cursor(cursor, cursor_kind(semantic = True)) if cursor else 0
+
+    try:
+        return run_plan(client, _semantic_plan(collection_name, query_vector, colour, individual_category, category, category_by_gender, limit, offset, fields or DISPLAY_FIELDS))
+
+    except Exception as e:
+        searcher_logger.error(f"Error in semantic search: {repr(e)}")
+
+        return {"results": [], "next_cursor": None, "relaxed": []}
+
+
+async def asemantic_search(client               : object,
+                           collection_name      : str,
+                           query_vector         : list,
+                           colour               : str = "NA",
+                           individual_category  : str = "NA",
+                           category             : str = "NA",
+                           category_by_gender   : str = "NA",
+                           limit                : int = 10,
+                           cursor               : str = None,
+                           fields               : list = None
+                           ) -> dict:
+    """
+    Asynchronous counterpart of `semantic_search` for an `AsyncQdrantClient`.
+    """
+
+    offset = decode_cursor(cursor, cursor_kind(semantic = True)) if cursor else 0
+
+    try:
+        return await arun_plan(client, _semantic_plan(collection_name, query_vector, colour, individual_category, category, category_by_gender, limit, offset, fields or DISPLAY_FIELDS))
+
+    except Exception as e:
+        searcher_logger.error(f"Error in semantic search: {repr(e)}")
+
+        return {"results": [], "next_cursor": None, "relaxed": []}
@@ -4,129 +4,670 @@
 
 import os
 import sys
-from dotenv import load_dotenv
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from flask import Flask
 from flask import request
 from flask import jsonify
+from flask import Response
+from flask import Blueprint
+from flask import current_app
 from flask import render_template
-from huggingface_hub import login
-from qdrant_client import QdrantClient
+from flask import stream_with_context
 
+from config import config
 from src.parser.parser import parser
+from src.parser.parser import IncrementalParser
 from src.extractor.extractor import extractor
-# from src.llm.llm_builder import initialize_hf_llm
-from src.searcher.searcher import search_collection
-from src.llm.llm_builder import initialize_chatgroq_llm
+from src.extractor.extractor import stream_extractor
+from src.extractor.cache import ExtractionCache
+from src.extractor.session import end_turn
+from src.extractor.session import begin_turn
+from src.extractor.session import merge_slots
+from src.extractor.session import build_session_store
+from src.extractor.gazetteer import gazetteer_extract
+from src.extractor.structured import structured_extractor
+from src.searcher.searcher import search_page
+from src.searcher.encoder import encode_query
+from src.searcher.searcher import semantic_search
+from src.searcher.searcher import parse_limit
+from src.searcher.searcher import page_arguments
+from src.searcher.searcher import iter_search_pages
+from src.searcher.searcher import popular_payloads
+from src.searcher.searcher import ensure_payload_indexes
+from src.searcher.catalog_index import CatalogIndex
+from src.searcher.result_cache import is_cacheable
+from src.searcher.result_cache import cached_search
+from src.searcher.result_cache import get_catalog_version
+from src.searcher.result_cache import SearchResultCache
+from src.extractor.extractor import build_extractor_prompt
+from src.clients.client_builder import build_service_clients
+from src.metrics.metrics import span
+from src.metrics.metrics import ERRORS
+from src.metrics.metrics import record_move_on
+from src.metrics.metrics import render_metrics
+from src.metrics.metrics import set_request_id
+from web.encoding import sse_event
+from web.http_cache import etag_matches
+from web.http_cache import cache_headers
+from web.http_cache import search_arguments
+from web.http_cache import result_cache_key
+from web.encoding import encode_body
+from web.encoding import compress_stream
+from web.encoding import get_json_encoder
+from web.encoding import negotiate_encoding
 
 import warnings
 warnings.filterwarnings(action = "ignore")
 
-# LOADING ENVIRONMENT VARIABLES
-load_dotenv()
-
-GROQ_API_KEY                = os.environ.get('GROQ_API_KEY')
-LLM_MODEL_NAME              = os.environ.get('LLM_MODEL_NAME')
-QDRANT_API_KEY              = os.environ.get('QDRANT_API_KEY')
-QDRANT_CLUSTER_URL          = os.environ.get('QDRANT_CLUSTER_URL')
-QDRANT_COLLECTION_NAME      = os.environ.get('QDRANT_COLLECTION_NAME')
-HF_LLM_MODEL_NAME           = os.environ.get('HF_LLM_MODEL_NAME')
-HUGGINGFACE_LOGIN_TOKEN     = os.environ.get('HUGGINGFACE_LOGIN_TOKEN')
-
 from logger.logger import LoggerSetup
 
 # LOGGER SETUP
 app_logger                 = LoggerSetup(logger_name = "app.py", log_filename_prefix = "app").get_logger()
 
-app                        = Flask(__name__, static_folder = 'static', template_folder = 'templates')
+views                      = Blueprint('views', __name__)
+
+
+def create_app(clients : object = None, defer_clients : bool = False) -> Flask:
+    """
+    Application factory for the Flask server.
+
+    The Qdrant client and the LLM are created once per worker process and reused by every
+    request through their keep-alive connection pools.
+
+    Arguments:
+
+        - `clients`        {ServiceClients, optional}  : Pre-built clients. If None, they are built from the
+                                                         project configuration via `build_service_clients`.
+
+        - `defer_clients`    {bool, default = False}   : Only build the application. Clients, caches and the
+                                                         search executor are created later by `init_worker`,
+                                                         after the pre-forking server has forked the worker.
+
+    Returns
+
+        - `app`                     {Flask}            : The configured Flask application.
+    """
+
+    app                                     = Flask(__name__, static_folder = 'static', template_folder = 'templates')
+
+    # SET ONCE THE WORKER HAS ITS CLIENTS AND HAS WARMED UP
+    app.extensions["ready"]                 = threading.Event()
+
+    if not defer_clients:
+        init_worker(app, clients = clients)
+
+    app.register_blueprint(views)
+
+    return app
+
+
+def init_worker(app : Flask, clients : object = None) -> None:
+    """
+    Create the per-process state of a worker and warm it up.
+
+    Sockets, SQLite connections and threads must not be shared across fork(), so a
+    pre-forking server calls this in each worker after forking (see gunicorn.conf.py).
+
+    Arguments:
+
+        - `app`                       {Flask}          : The application built by `create_app`.
+
+        - `clients`        {ServiceClients, optional}  : Pre-built clients, otherwise built from the configuration.
+    """
+
+    # INITIALIZING THE LONG-LIVED QDRANT CLIENT AND LLM
+    app.extensions["service_clients"]       = clients or build_service_clients()
+
+    app_logger.info("Service clients initialized successfully")
+
+    # CACHE OF EXTRACTOR RESPONSES SHARED BY ALL REQUESTS OF THIS WORKER
+    app.extensions["extraction_cache"]      = ExtractionCache(max_size   = config.EXTRACTION_CACHE_SIZE,
+                                                              ttl        = config.EXTRACTION_CACHE_TTL,
+                                                              disk_path  = config.EXTRACTION_CACHE_PATH
+                                                              )
+
+    # SEARCH PAGES PER (CATALOG VERSION, SLOTS, PAGE), SHARED BY ALL REQUESTS OF THIS WORKER
+    app.extensions["result_cache"]          = SearchResultCache(max_size = config.SEARCH_CACHE_SIZE, ttl = config.SEARCH_CACHE_TTL) if config.SEARCH_CACHE_SIZE else None
+
+    # IN-PROCESS ATTRIBUTE INDEX THAT SERVES FILTER QUERIES IN "index" SEARCH MODE
+    app.extensions["catalog_index"]         = CatalogIndex(client            = app.extensions["service_clients"].qdrant,
+                                                           collection_name   = app.extensions["service_clients"].collection_name,
+                                                           refresh_interval  = config.CATALOG_INDEX_REFRESH_INTERVAL
+                                                           ) if config.SEARCH_MODE == "index" else None
+
+    # SLOTS OF EACH CONVERSATION, SO A TURN ONLY SENDS ITS NEW MESSAGE TO THE LLM
+    app.extensions["session_store"]         = build_session_store()
+
+    # THREADS THAT RUN THE CATALOG SEARCH WHILE THE LLM IS STILL STREAMING
+    app.extensions["search_executor"]       = ThreadPoolExecutor(max_workers = config.SEARCH_EXECUTOR_WORKERS)
+
+    warm_up(app)
+
+
+def warm_up(app : Flask) -> bool:
+    """
+    Pay the cold-start costs before the first request: connect to Qdrant, create the payload
+    indexes, prime the popular-items pool and the prompt token counter, load the catalog index
+    in "index" search mode, and load the query encoder when semantic search (or WARMUP_ENCODER) is on.
+
+    Returns
+
+        - `ready`                     {bool}           : True if the worker is warm and its clients are healthy.
+    """
+
+    clients         = app.extensions["service_clients"]
+
+    try:
+        status      = clients.health_check()
+
+        if not status["healthy"]:
+            app_logger.error(f"Warmup failed, clients are not healthy: {status}")
+
+            return False
+
+        ensure_payload_indexes(client = clients.qdrant, collection_name = clients.collection_name)
+        popular_payloads(client = clients.qdrant, collection_name = clients.collection_name)
+        build_extractor_prompt("warmup", token_budget = config.EXTRACTOR_TOKEN_BUDGET)
+
+        if app.extensions["catalog_index"] is not None:
+            app.extensions["catalog_index"].refresh_if_stale(version = get_catalog_version(clients.qdrant, clients.collection_name))
+
+        if config.SEARCH_MODE == "semantic" or config.WARMUP_ENCODER:
+            encode_query("warmup", model_name = config.ENCODER_MODEL_NAME, backend = config.ENCODER_BACKEND)
+
+    except Exception as e:
+        app_logger.error(f"Warmup failed: {repr(e)}")
+
+        return False
+
+    app.extensions["ready"].set()
+
+    app_logger.info("Worker warmed up and ready")
+
+    return True
+
+
+def get_service_clients() -> object:
+    """
+    Return the clients created by the application factory for the current app.
+    """
+
+    return current_app.extensions["service_clients"]
+
+
+# EVERY LOG LINE OF A REQUEST CARRIES ITS ID (TAKEN FROM X-Request-ID WHEN THE PROXY SETS ONE)
+@views.before_app_request
+def bind_request_id():
+    request.environ["request_id"] = set_request_id(request.headers.get("X-Request-ID"))
+
+@views.after_app_request
+def expose_request_id(response : Response) -> Response:
+    response.headers["X-Request-ID"] = request.environ.get("request_id", "-")
+
+    return response
 
 # RENDERING THE HOME PAGE
-@app.route('/')
+@views.route('/')
 def home():
     return render_template('index_home.html')
 
 # RENDERING THE CHATBOT PAGE
-@app.route('/chatbot')
+@views.route('/chatbot')
 def chatbot():
     return render_template('index.html')
 
-@app.route('/search', methods=['POST'])
-def search():
+# HEALTH CHECK FOR THE QDRANT CLIENT AND LLM
+@views.route('/healthz')
+def healthz():
+    if "service_clients" not in current_app.extensions:
+        return jsonify({"healthy": False, "ready": False}), 503
 
-    try:
+    status          = get_service_clients().health_check()
+    status["ready"] = current_app.extensions["ready"].is_set()
 
-        # Get the query from the request
-        data                    = request.json
-        conversation_history    = data.get('query', '')
+    return jsonify(status), (200 if status["healthy"] and status["ready"] else 503)
 
-        # INITIALIZING THE QDRANT CLIENT
-        client                  = QdrantClient(url      = QDRANT_CLUSTER_URL, 
-                                               api_key  = QDRANT_API_KEY
-                                               )
+# READINESS PROBE: 200 ONLY ONCE THE WORKER HAS WARMED UP (A FAILED WARMUP IS RETRIED HERE)
+@views.route('/readyz')
+def readyz():
+    ready = current_app.extensions["ready"].is_set()
 
-        app_logger.info("Qdrant client initialized successfully")
+    if not ready and "service_clients" in current_app.extensions:
+        ready = warm_up(current_app)
 
-        app_logger.info(f"GROQ_API_KEY : {'Present' if GROQ_API_KEY else 'Not Present'}")
-        app_logger.info(f"LLM_MODEL_NAME : {LLM_MODEL_NAME if LLM_MODEL_NAME else 'Not Present'}")
+    return jsonify({"ready": ready}), (200 if ready else 503)
 
-        # INITIALIZING THE CHATGROQ LLM
-        llm                     = initialize_chatgroq_llm(temperature   = 0.5, 
-                                                          groq_api_key  = GROQ_API_KEY, 
-                                                          model_name    = LLM_MODEL_NAME
-                                                          )
-        
-        app_logger.info("ChatGroq LLM initialized successfully")
+# PROMETHEUS SCRAPE ENDPOINT: STAGE LATENCY HISTOGRAMS AND COUNTERS
+@views.route('/metrics')
+def metrics():
+    body, content_type = render_metrics()
+
+    return Response(body, content_type = content_type)
+
+# FORGET THE SLOTS OF A CONVERSATION (E.G. WHEN THE USER STARTS A NEW CHAT)
+@views.route('/session/<session_id>', methods=['DELETE'])
+def delete_session(session_id : str):
+    current_app.extensions["session_store"].delete(session_id)
+
+    return "", 204
+
+def run_search(clients : object, slots : dict, conversation_history : str, pagination : dict, result_cache : object = None, cache_key : str = None, catalog_index : object = None) -> dict:
+    """
+    Run the configured search mode for the extracted slots.
+
+    In "semantic" mode the conversation is embedded and searched with ANN over the stored
+    product vectors, constrained by the extracted slots; otherwise the slots are matched
+    exactly with `search_page`, or with the in-process `catalog_index` when one is given,
+    through `result_cache` when a `cache_key` is given.
+    """
 
-        # login(HUGGINGFACE_LOGIN_TOKEN)
+    if config.SEARCH_MODE == "semantic":
+        with span("encode_query"):
+            query_vector = encode_query(conversation_history, model_name = config.ENCODER_MODEL_NAME, backend = config.ENCODER_BACKEND)
 
-        # app_logger.info(f"HuggingFace login successful: {'Yes' if HUGGINGFACE_LOGIN_TOKEN else 'No'}")
+        with span("search"):
+            return semantic_search(client               = clients.qdrant,
+                                   collection_name      = clients.collection_name,
+                                   query_vector         = query_vector,
+                                   colour               = slots["colour"],
+                                   individual_category  = slots["Individual_category"],
+                                   category             = slots["Category"],
+                                   limit                = pagination["limit"],
+                                   cursor               = pagination["cursor"]
+                                   )
 
-        # # INITIALIZING THE HUGGING FACE LARGE LANGUGAGE MODEL
-        # llm                     = initialize_hf_llm(hf_llm_model_name   = HF_LLM_MODEL_NAME, 
-        #                                             temperature         = 0.5, 
-        #                                             max_new_tokens      = 512, 
-        #                                             do_sample           = True,
-        #                                             use_lora            = True,
-        #                                             lora_r              = 8,
-        #                                             lora_alpha          = 16,
-        #                                             lora_dropout        = 0.05,
-        #                                             lora_target_modules = ["q_proj", "v_proj"]
-        #                                             )
+    def search() -> dict:
+        if catalog_index is not None:
+            return catalog_index.search_page(version = get_catalog_version(clients.qdrant, clients.collection_name), **search_arguments(slots, pagination))
 
-        # app_logger.info("Fine-Tuned LLM initialized successfully")
+        return search_page(client = clients.qdrant, collection_name = clients.collection_name, **search_arguments(slots, pagination))
 
-        extractor_response      = extractor(llm                   = llm, 
-                                            conversation_history  = conversation_history
+    with span("search"):
+        if result_cache is not None and cache_key is not None:
+            return cached_search(result_cache, cache_key, search)
+
+        return search()
+
+def extract_slots(clients : object, conversation_history : str) -> dict:
+    """
+    Extract the slots of a chat turn: gazetteer fast path, then the configured LLM extraction mode.
+
+    Returns
+
+        - dict
+            The same dictionary shape as `parser()`.
+    """
+
+    # UNAMBIGUOUS QUERIES ARE ANSWERED WITHOUT AN LLM ROUND TRIP
+    with span("gazetteer"):
+        response                = gazetteer_extract(conversation_history) if config.GAZETTEER_FAST_PATH else None
+
+    if response is None and config.EXTRACTION_MODE == "structured":
+        with span("structured_extractor"):
+            response            = structured_extractor(llm                   = clients.llm, 
+                                                       conversation_history  = conversation_history,
+                                                       cache                 = current_app.extensions["extraction_cache"]
+                                                       )
+
+    if response is None:
+        with span("extractor"):
+            extractor_response  = extractor(llm                   = clients.llm, 
+                                            conversation_history  = conversation_history,
+                                            cache                 = current_app.extensions["extraction_cache"]
                                             )
 
-        app_logger.info(f"Extractor response: {extractor_response}")
+        # LAZY %-FORMATTING: THE RESPONSE IS ONLY RENDERED WHEN DEBUG LOGGING IS ON
+        app_logger.debug("Extractor response: %s", extractor_response)
+
+        with span("parser"):
+            response            = parser(response = extractor_response)
+
+    return response
+
+def json_response(body : object, status : int = 200, headers : dict = None) -> Response:
+    """
+    JSON response serialized by the configured encoder (orjson by default) and compressed
+    with gzip or brotli when the client's Accept-Encoding allows it.
+    """
+
+    with span("encode_response"):
+        data, encoding_headers = encode_body(body, accept_encoding = request.headers.get("Accept-Encoding"))
+
+    return Response(data, status = status, headers = {**encoding_headers, **(headers or {})})
+
+@views.route('/search', methods=['POST'])
+def search():
+
+    try:
+
+        # Get the query from the request
+        data                    = request.json
+
+        try:
+            pagination          = page_arguments(data)
+
+        except ValueError as e:
+            return json_response({"error": str(e)}, status = 400)
 
-        response                = parser(response = extractor_response)
+        session_id              = data.get('session_id')
+        session_store           = current_app.extensions["session_store"]
+
+        # WITH A SESSION THE EXTRACTOR ONLY SEES THE NEW MESSAGE AND THE SLOTS KNOWN SO FAR
+        conversation_history, session = begin_turn(store = session_store, session_id = session_id, message = data.get('query', ''))
+
+        clients                 = get_service_clients()
+        response                = extract_slots(clients = clients, conversation_history = conversation_history)
+
+        response                = end_turn(store = session_store, session_id = session_id, state = session, response = response)
+
+        record_move_on(response["MOVE_ON"])
 
         if response["MOVE_ON"]:
 
-            search_results      = search_collection(client               = client, 
-                                                    collection_name      = QDRANT_COLLECTION_NAME, 
-                                                    colour               = response["colour"], 
-                                                    individual_category  = response["Individual_category"], 
-                                                    category             = response["Category"],
-                                                    )
+            result_cache        = current_app.extensions["result_cache"]
+            cache_key           = result_cache_key(clients = clients, result_cache = result_cache, slots = response, pagination = pagination)
+
+            # A CACHED PAGE IS FULLY DETERMINED BY THE KEY, SO A CLIENT HOLDING IT NEEDS NO SEARCH AT ALL
+            if cache_key is not None and etag_matches(request.headers.get("If-None-Match"), cache_key) and result_cache.contains(cache_key):
+                return Response(status = 304, headers = cache_headers(cache_key))
+
+            page                = run_search(clients               = clients,
+                                             slots                 = response,
+                                             conversation_history  = conversation_history,
+                                             pagination            = pagination,
+                                             result_cache          = result_cache,
+                                             cache_key             = cache_key,
+                                             catalog_index         = current_app.extensions["catalog_index"]
+                                             )
             app_logger.info("Search completed successfully")
-            app_logger.info(f"Search results: {len(search_results)}")
+            app_logger.info(f"Search results: {len(page['results'])}")
+
+            body                = {"results": page["results"], "next_cursor": page["next_cursor"], "relaxed": page.get("relaxed", []), "message": "Search results for your query"}
 
-            return jsonify({"results": search_results, "message": "Search results for your query"})
+            # ERROR PAGES AND RANDOM POPULAR FALLBACKS ARE NOT CACHED, SO THEY GET NO ETAG
+            if cache_key is not None and is_cacheable(page):
+                return json_response(body, headers = cache_headers(cache_key))
         
+        elif config.SEARCH_MODE == "semantic":
+            # PARTIAL QUERIES STILL GET THE MOST SIMILAR PRODUCTS WITHIN THE KNOWN SLOTS
+            page                = run_search(clients               = clients,
+                                             slots                 = response,
+                                             conversation_history  = conversation_history,
+                                             pagination            = pagination
+                                             )
+
+            body                = {"results": page["results"], "next_cursor": page["next_cursor"], "relaxed": page.get("relaxed", []), "message": response["FOLLOW_UP_MESSAGE"]}
+
         else:
             app_logger.info("Insufficient information to perform search")
             
-            return jsonify({"results": [], "message": response["FOLLOW_UP_MESSAGE"]})
+            body                = {"results": [], "message": response["FOLLOW_UP_MESSAGE"]}
+
+        return json_response(body)
 
     except Exception as e:
+        ERRORS.labels("search_request").inc()
+
+        return json_response({"error": repr(e)}, status = 500)
+
+
+@views.route('/search/ndjson', methods=['POST'])
+def search_ndjson():
+    """
+    NDJSON variant of `/search` for large result sets.
+
+    Each scroll page is encoded and written (compressed per chunk when accepted) as soon as
+    Qdrant returns it, so the full result list is never materialized; in "index" search mode
+    the matches are already in memory and are split into lines of NDJSON_PAGE_SIZE. Lines, one JSON object
+    each: `{"type": "slots", ...}`, then `{"type": "results", "results": [...]}` per page, then
+    `{"type": "done", "count", "relaxed", "message"}` (or `{"type": "error", "error"}`).
+    """
+
+    data                    = request.json or {}
+
+    try:
+        limit               = parse_limit(data.get('limit'), default = config.NDJSON_MAX_RESULTS, maximum = config.NDJSON_MAX_RESULTS)
+
+    except ValueError as e:
+        return json_response({"error": str(e)}, status = 400)
+
+    session_id              = data.get('session_id')
+    session_store           = current_app.extensions["session_store"]
+
+    conversation_history, session = begin_turn(store = session_store, session_id = session_id, message = data.get('query', ''))
+
+    clients                 = get_service_clients()
+    catalog_index           = current_app.extensions["catalog_index"]
+
+    try:
+        response            = extract_slots(clients = clients, conversation_history = conversation_history)
+        response            = end_turn(store = session_store, session_id = session_id, state = session, response = response)
+
+    except Exception as e:
+        ERRORS.labels("search_ndjson").inc()
+
+        return json_response({"error": repr(e)}, status = 500)
+
+    record_move_on(response["MOVE_ON"])
+
+    encode                  = get_json_encoder()
+    encoding                = negotiate_encoding(request.headers.get("Accept-Encoding"))
+
+    def generate():
+
+        try:
+
+            yield encode({"type": "slots", **{key: value for key, value in response.items() if key != "FOLLOW_UP_MESSAGE"}}) + b"\n"
+
+            message         = "Search results for your query" if response["MOVE_ON"] else response["FOLLOW_UP_MESSAGE"]
+            count           = 0
+            relaxed         = []
+
+            if response["MOVE_ON"] and catalog_index is not None:
+                page        = catalog_index.search_page(colour               = response["colour"],
+                                                        individual_category  = response["Individual_category"],
+                                                        category             = response["Category"],
+                                                        limit                = limit,
+                                                        version              = get_catalog_version(clients.qdrant, clients.collection_name)
+                                                        )
+                count       = len(page["results"])
+                relaxed     = page["relaxed"]
+
+                for start in range(0, count, config.NDJSON_PAGE_SIZE):
+                    yield encode({"type": "results", "results": page["results"][start:start + config.NDJSON_PAGE_SIZE]}) + b"\n"
+
+            elif response["MOVE_ON"] and config.SEARCH_MODE != "semantic":
+                for results in iter_search_pages(client               = clients.qdrant,
+                                                 collection_name      = clients.collection_name,
+                                                 colour               = response["colour"],
+                                                 individual_category  = response["Individual_category"],
+                                                 category             = response["Category"],
+                                                 limit                = limit,
+                                                 page_size            = config.NDJSON_PAGE_SIZE,
+                                                 relaxed              = relaxed
+                                                 ):
+                    count  += len(results)
+
+                    yield encode({"type": "results", "results": results}) + b"\n"
+
+            elif response["MOVE_ON"] or config.SEARCH_MODE == "semantic":
+                page        = run_search(clients               = clients,
+                                         slots                 = response,
+                                         conversation_history  = conversation_history,
+                                         pagination            = {"limit": min(limit, config.SEARCH_MAX_PAGE_SIZE), "cursor": None, "rank_by": None}
+                                         )
+                count       = len(page["results"])
+                relaxed     = page.get("relaxed", [])
+
+                yield encode({"type": "results", "results": page["results"]}) + b"\n"
+
+            app_logger.info(f"Streamed {count} results as NDJSON")
+
+            yield encode({"type": "done", "count": count, "relaxed": relaxed, "message": message}) + b"\n"
+
+        except Exception as e:
+            app_logger.error(f"Error in NDJSON search: {repr(e)}")
+
+            ERRORS.labels("search_ndjson").inc()
+
+            yield encode({"type": "error", "error": repr(e)}) + b"\n"
+
+    headers                 = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "Vary": "Accept-Encoding"}
+
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+
+    return Response(stream_with_context(compress_stream(generate(), encoding)),
+                    mimetype  = 'application/x-ndjson',
+                    headers   = headers
+                    )
+
+
+@views.route('/search/stream', methods=['POST'])
+def search_stream():
+    """
+    Streaming variant of `/search` using Server-Sent Events.
+
+    LLM tokens are parsed line by line as they arrive. As soon as Category,
+    Individual_category, category_by_Gender, colour and MOVE_ON are final, the catalog
+    search starts in a background thread while FOLLOW_UP_MESSAGE is still being generated.
+
+    Events: `slots`, `follow_up` (text deltas), `results`, `message`, `done` and `error`.
+    """
+
+    data                    = request.json or {}
+    session_id              = data.get('session_id')
+    session_store           = current_app.extensions["session_store"]
+
+    conversation_history, session = begin_turn(store = session_store, session_id = session_id, message = data.get('query', ''))
+    previous_slots          = session["slots"] if session else {}
+
+    clients                 = get_service_clients()
+    extraction_cache        = current_app.extensions["extraction_cache"]
+    result_cache            = current_app.extensions["result_cache"]
+    catalog_index           = current_app.extensions["catalog_index"]
+    search_executor         = current_app.extensions["search_executor"]
+
+    try:
+        pagination          = page_arguments(data)
+
+    except ValueError as e:
+        return json_response({"error": str(e)}, status = 400)
+
+    def start_search(slots : dict) -> object:
+        # THE WORKER THREAD INHERITS THE REQUEST ID FOR ITS LOG LINES
+        return search_executor.submit(contextvars.copy_context().run,
+                                      run_search,
+                                      clients               = clients,
+                                      slots                 = slots,
+                                      conversation_history  = conversation_history,
+                                      pagination            = pagination,
+                                      result_cache          = result_cache,
+                                      cache_key             = result_cache_key(clients = clients, result_cache = result_cache, slots = slots, pagination = pagination),
+                                      catalog_index         = catalog_index
+                                      )
+
+    def generate():
+
+        try:
+
+            # UNAMBIGUOUS QUERIES ARE ANSWERED WITHOUT AN LLM ROUND TRIP
+            with span("gazetteer"):
+                response           = gazetteer_extract(conversation_history) if config.GAZETTEER_FAST_PATH else None
+
+            search_future          = None
+            slots_sent             = False
+
+            # TOOL-CALL OUTPUT ARRIVES AS ONE VALIDATED OBJECT, SO IT IS SENT LIKE A GAZETTEER ANSWER
+            if response is None and config.EXTRACTION_MODE == "structured":
+                with span("structured_extractor"):
+                    response       = structured_extractor(llm = clients.llm, conversation_history = conversation_history, cache = extraction_cache)
+
+            if response is None:
+                incremental        = IncrementalParser()
+
+                for chunk in stream_extractor(llm = clients.llm, conversation_history = conversation_history, cache = extraction_cache):
+                    for event in incremental.feed(chunk):
+                        if event[0] == "follow_up":
+                            yield sse_event("follow_up", {"delta": event[1]})
+
+                    if not slots_sent and incremental.search_ready():
+                        response    = merge_slots(previous_slots, incremental.result())
+                        slots_sent  = True
+                        early_slots = response
+
+                        yield sse_event("slots", {key: value for key, value in response.items() if key != "FOLLOW_UP_MESSAGE"})
+
+                        if response["MOVE_ON"] or config.SEARCH_MODE == "semantic":
+                            search_future = start_search(response)
+
+                            app_logger.info("Search started before the LLM finished streaming")
+
+                for event in incremental.finish():
+                    if event[0] == "follow_up":
+                        yield sse_event("follow_up", {"delta": event[1]})
+
+                response           = merge_slots(previous_slots, incremental.result())
+
+                # A KEY REPEATED AFTER THE EARLY SEARCH STARTED CAN STILL CHANGE A SLOT: RESEND THE SLOTS AND SEARCH AGAIN
+                if slots_sent and any(response[key] != early_slots[key] for key in IncrementalParser.SEARCH_KEYS):
+                    slots_sent     = False
+
+                    if search_future is not None:
+                        search_future.cancel()
+                        search_future = None
+
+                if not slots_sent:
+                    yield sse_event("slots", {key: value for key, value in response.items() if key != "FOLLOW_UP_MESSAGE"})
+
+            else:
+                yield sse_event("slots", {key: value for key, value in response.items() if key != "FOLLOW_UP_MESSAGE"})
+                yield sse_event("follow_up", {"delta": response["FOLLOW_UP_MESSAGE"]})
+
+            response               = end_turn(store = session_store, session_id = session_id, state = session, response = response)
+
+            record_move_on(response["MOVE_ON"])
+
+            if response["MOVE_ON"]:
+                search_future      = search_future or start_search(response)
+                page               = search_future.result()
+
+                app_logger.info(f"Search results: {len(page['results'])}")
+
+                yield sse_event("results", {"results": page["results"], "next_cursor": page["next_cursor"], "relaxed": page.get("relaxed", []), "message": "Search results for your query"})
+
+            elif config.SEARCH_MODE == "semantic":
+                # PARTIAL QUERIES STILL GET THE MOST SIMILAR PRODUCTS WITHIN THE KNOWN SLOTS
+                search_future      = search_future or start_search(response)
+                page               = search_future.result()
+
+                yield sse_event("results", {"results": page["results"], "next_cursor": page["next_cursor"], "relaxed": page.get("relaxed", []), "message": response["FOLLOW_UP_MESSAGE"]})
+                yield sse_event("message", {"message": response["FOLLOW_UP_MESSAGE"]})
+
+            else:
+                app_logger.info("Insufficient information to perform search")
+
+                yield sse_event("message", {"message": response["FOLLOW_UP_MESSAGE"]})
+
+            yield sse_event("done", {})
+
+        except Exception as e:
+            app_logger.error(f"Error in streaming search: {repr(e)}")
+
+            ERRORS.labels("search_stream").inc()
+
+            yield sse_event("error", {"error": repr(e)})
 
-        return jsonify({"error": repr(e)}), 500
+    return Response(stream_with_context(generate()), 
+                    mimetype  = 'text/event-stream', 
+                    headers   = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+                    )
 
 
 
 if __name__ == '__main__':
-    app.run(debug = True)
\ No newline at end of file
+    create_app().run(debug = True)
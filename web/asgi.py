@@ -0,0 +1,573 @@
+# ASGI SERVER WITH AN ASYNC /search PIPELINE
+
+# DEPENDENCIES
+
+import os
+import sys
+import asyncio
+from contextlib import asynccontextmanager
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from starlette.routing import Route
+from starlette.routing import Mount
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.responses import StreamingResponse
+from starlette.staticfiles import StaticFiles
+from starlette.templating import Jinja2Templates
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.concurrency import run_in_threadpool
+
+from config import config
+from src.parser.parser import parser
+from src.parser.parser import IncrementalParser
+from src.extractor.extractor import aextractor
+from src.extractor.extractor import astream_extractor
+from src.extractor.cache import ExtractionCache
+from src.extractor.session import end_turn
+from src.extractor.session import begin_turn
+from src.extractor.session import merge_slots
+from src.extractor.session import build_session_store
+from src.searcher.searcher import asearch_page
+from src.searcher.encoder import encode_query
+from src.searcher.searcher import asemantic_search
+from src.searcher.searcher import page_arguments
+from src.searcher.searcher import apopular_payloads
+from src.searcher.searcher import aensure_payload_indexes
+from src.searcher.result_cache import is_cacheable
+from src.searcher.result_cache import acached_search
+from src.searcher.result_cache import SearchResultCache
+from src.extractor.extractor import build_extractor_prompt
+from src.extractor.gazetteer import gazetteer_extract
+from src.extractor.structured import astructured_extractor
+from src.clients.client_builder import build_async_service_clients
+from src.metrics.metrics import span
+from src.metrics.metrics import ERRORS
+from src.metrics.metrics import record_move_on
+from src.metrics.metrics import render_metrics
+from src.metrics.metrics import set_request_id
+from web.encoding import sse_event
+from web.encoding import encode_body
+from web.http_cache import etag_matches
+from web.http_cache import cache_headers
+from web.http_cache import search_arguments
+from web.http_cache import aresult_cache_key
+
+import warnings
+warnings.filterwarnings(action = "ignore")
+
+from logger.logger import LoggerSetup
+
+# LOGGER SETUP
+asgi_logger                = LoggerSetup(logger_name = "asgi.py", log_filename_prefix = "asgi").get_logger()
+
+WEB_DIR                    = os.path.dirname(os.path.abspath(__file__))
+
+templates                  = Jinja2Templates(directory = os.path.join(WEB_DIR, 'templates'))
+
+# THE TEMPLATES USE FLASK'S url_for('static', filename = ...) SIGNATURE
+templates.env.globals["url_for"] = lambda endpoint, filename: f"/{endpoint}/{filename}"
+
+
+class ClientDisconnected(Exception):
+    """
+    Raised when the client goes away before the response is ready.
+    """
+
+
+async def run_until_disconnect(request : Request, coroutine : object) -> object:
+    """
+    Await `coroutine`, cancelling it as soon as the client disconnects.
+
+    Arguments:
+
+        - `request`              {Request}          : The incoming request whose connection is watched.
+
+        - `coroutine`           {coroutine}         : The work to run on behalf of the request.
+
+    Returns
+
+        - `result`               {object}           : The coroutine's result.
+
+    Raises
+
+        - `ClientDisconnected`                      : If the client disconnected first; the work is cancelled.
+    """
+
+    task = asyncio.ensure_future(coroutine)
+
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout = config.DISCONNECT_POLL_INTERVAL)
+
+            if done:
+                return task.result()
+
+            if await request.is_disconnected():
+                task.cancel()
+
+                raise ClientDisconnected()
+
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+class RequestIdMiddleware(BaseHTTPMiddleware):
+    """
+    Binds a request ID (X-Request-ID or a new one) to the request's context, so the log lines
+    of every task spawned for it carry the ID, and echoes it in the response.
+    """
+
+    async def dispatch(self, request : Request, call_next : object) -> Response:
+        request_id                        = set_request_id(request.headers.get("X-Request-ID"))
+        response                          = await call_next(request)
+        response.headers["X-Request-ID"]  = request_id
+
+        return response
+
+
+async def home(request : Request) -> Response:
+    return templates.TemplateResponse(request, 'index_home.html')
+
+
+async def chatbot(request : Request) -> Response:
+    return templates.TemplateResponse(request, 'index.html')
+
+
+async def healthz(request : Request) -> Response:
+    status = await request.app.state.clients.health_check()
+
+    return JSONResponse(status, status_code = 200 if status["healthy"] else 503)
+
+
+async def warm_up(state : object) -> bool:
+    """
+    Asynchronous warmup: connect to Qdrant, ensure the payload indexes, prime the popular-items
+    pool and the prompt token counter, and load the query encoder when semantic search (or
+    WARMUP_ENCODER) is on, so the first requests do not pay cold-start costs.
+    """
+
+    try:
+        status          = await state.clients.health_check()
+
+        if not status["healthy"]:
+            asgi_logger.error(f"Warmup failed, clients are not healthy: {status}")
+
+            return False
+
+        await aensure_payload_indexes(client = state.clients.qdrant, collection_name = state.clients.collection_name)
+        await apopular_payloads(client = state.clients.qdrant, collection_name = state.clients.collection_name)
+        build_extractor_prompt("warmup", token_budget = config.EXTRACTOR_TOKEN_BUDGET)
+
+        if config.SEARCH_MODE == "semantic" or config.WARMUP_ENCODER:
+            await run_in_threadpool(encode_query, "warmup", model_name = config.ENCODER_MODEL_NAME, backend = config.ENCODER_BACKEND)
+
+    except Exception as e:
+        asgi_logger.error(f"Warmup failed: {repr(e)}")
+
+        return False
+
+    state.ready = True
+
+    return True
+
+
+async def readyz(request : Request) -> Response:
+    ready = request.app.state.ready or await warm_up(request.app.state)
+
+    return JSONResponse({"ready": ready}, status_code = 200 if ready else 503)
+
+
+async def metrics(request : Request) -> Response:
+    body, content_type = render_metrics()
+
+    return Response(body, headers = {"Content-Type": content_type})
+
+
+async def run_search(state : object, slots : dict, conversation_history : str, pagination : dict, cache_key : str = None) -> dict:
+    """
+    Run the configured search mode for the extracted slots, like the Flask `run_search`.
+
+    In "semantic" mode the conversation is embedded on a worker thread, since the encoder
+    is CPU-bound, and searched with ANN constrained by the extracted slots; otherwise the
+    slots are matched exactly with `asearch_page`, through the result cache when a
+    `cache_key` is given.
+    """
+
+    clients                 = state.clients
+
+    if config.SEARCH_MODE == "semantic":
+        with span("encode_query"):
+            query_vector    = await run_in_threadpool(encode_query, conversation_history, model_name = config.ENCODER_MODEL_NAME, backend = config.ENCODER_BACKEND)
+
+        with span("search"):
+            return await asemantic_search(client               = clients.qdrant,
+                                          collection_name      = clients.collection_name,
+                                          query_vector         = query_vector,
+                                          colour               = slots["colour"],
+                                          individual_category  = slots["Individual_category"],
+                                          category             = slots["Category"],
+                                          limit                = pagination["limit"],
+                                          cursor               = pagination["cursor"]
+                                          )
+
+    async def search() -> dict:
+        return await asearch_page(client = clients.qdrant, collection_name = clients.collection_name, **search_arguments(slots, pagination))
+
+    with span("search"):
+        if state.result_cache is not None and cache_key is not None:
+            return await acached_search(state.result_cache, cache_key, search)
+
+        return await search()
+
+
+async def search_pipeline(state : object, conversation_history : str, pagination : dict, session_id : str = None, session : dict = None, if_none_match : str = None) -> tuple:
+    """
+    Asynchronous extraction, parsing and search for one chat turn.
+
+    Arguments:
+
+        - `state`                    {State}          : The application state holding the clients and the cache.
+
+        - `conversation_history`      {str}           : The conversation text sent by the browser, or the new message
+                                                        with the session's slot summary from `begin_turn`.
+
+        - `pagination`                {dict}           : Validated `limit`, `cursor` and `rank_by` from `page_arguments`.
+
+        - `session_id`              {str, optional}    : Session whose slots are merged with this turn's and stored.
+
+        - `session`                 {dict, optional}   : The session state loaded by `begin_turn`.
+
+        - `if_none_match`           {str, optional}    : The request's If-None-Match header.
+
+    Returns
+
+        - tuple
+            (body, cache_key): the JSON body returned by `/search`, or None when the client's
+            cached copy is still valid (304), and the key to send as ETag, or None when the
+            page is not cacheable.
+    """
+
+    clients                 = state.clients
+
+    # UNAMBIGUOUS QUERIES ARE ANSWERED WITHOUT AN LLM ROUND TRIP
+    with span("gazetteer"):
+        response            = gazetteer_extract(conversation_history) if config.GAZETTEER_FAST_PATH else None
+
+    if response is None and config.EXTRACTION_MODE == "structured":
+        with span("structured_extractor"):
+            response        = await astructured_extractor(llm                   = clients.llm,
+                                                         conversation_history  = conversation_history,
+                                                         cache                 = state.extraction_cache
+                                                         )
+
+    if response is None:
+        with span("extractor"):
+            extractor_response  = await aextractor(llm                   = clients.llm,
+                                                   conversation_history  = conversation_history,
+                                                   cache                 = state.extraction_cache
+                                                   )
+
+        with span("parser"):
+            response        = parser(response = extractor_response)
+
+    response                = await run_in_threadpool(end_turn, store = state.session_store, session_id = session_id, state = session, response = response)
+
+    record_move_on(response["MOVE_ON"])
+
+    if response["MOVE_ON"]:
+        cache_key           = await aresult_cache_key(clients = clients, result_cache = state.result_cache, slots = response, pagination = pagination)
+
+        # A CACHED PAGE IS FULLY DETERMINED BY THE KEY, SO A CLIENT HOLDING IT NEEDS NO SEARCH AT ALL
+        if cache_key is not None and etag_matches(if_none_match, cache_key) and state.result_cache.contains(cache_key):
+            return None, cache_key
+
+        page                = await run_search(state, slots = response, conversation_history = conversation_history, pagination = pagination, cache_key = cache_key)
+
+        asgi_logger.info(f"Search results: {len(page['results'])}")
+
+        body                = {"results": page["results"], "next_cursor": page["next_cursor"], "relaxed": page["relaxed"], "message": "Search results for your query"}
+
+        # ERROR PAGES AND RANDOM POPULAR FALLBACKS ARE NOT CACHED, SO THEY GET NO ETAG
+        return body, (cache_key if cache_key is not None and is_cacheable(page) else None)
+
+    if config.SEARCH_MODE == "semantic":
+        # PARTIAL QUERIES STILL GET THE MOST SIMILAR PRODUCTS WITHIN THE KNOWN SLOTS
+        page                = await run_search(state, slots = response, conversation_history = conversation_history, pagination = pagination)
+
+        return {"results": page["results"], "next_cursor": page["next_cursor"], "relaxed": page["relaxed"], "message": response["FOLLOW_UP_MESSAGE"]}, None
+
+    asgi_logger.info("Insufficient information to perform search")
+
+    return {"results": [], "message": response["FOLLOW_UP_MESSAGE"]}, None
+
+
+async def search(request : Request) -> Response:
+
+    try:
+
+        data                    = await request.json()
+
+        try:
+            pagination          = page_arguments(data)
+
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code = 400)
+
+        session_id              = data.get('session_id')
+
+        # WITH A SESSION THE EXTRACTOR ONLY SEES THE NEW MESSAGE AND THE SLOTS KNOWN SO FAR
+        # SESSION STORES MAY BE SQLITE-BACKED, SO THEIR I/O RUNS ON THE THREADPOOL INSTEAD OF THE EVENT LOOP
+        conversation_history, session = await run_in_threadpool(begin_turn, store = request.app.state.session_store, session_id = session_id, message = data.get('query', ''))
+
+        body, cache_key         = await run_until_disconnect(request, search_pipeline(request.app.state,
+                                                                                      conversation_history,
+                                                                                      pagination,
+                                                                                      session_id     = session_id,
+                                                                                      session        = session,
+                                                                                      if_none_match  = request.headers.get("if-none-match")
+                                                                                      ))
+
+        if body is None:
+            return Response(status_code = 304, headers = cache_headers(cache_key))
+
+        with span("encode_response"):
+            content, headers = encode_body(body, accept_encoding = request.headers.get("accept-encoding"))
+
+        if cache_key is not None:
+            headers = {**headers, **cache_headers(cache_key)}
+
+        return Response(content, headers = headers)
+
+    except ClientDisconnected:
+        asgi_logger.info("Client disconnected, cancelled the in-flight search")
+
+        return Response(status_code = 499)
+
+    except Exception as e:
+        ERRORS.labels("search_request").inc()
+
+        return JSONResponse({"error": repr(e)}, status_code = 500)
+
+
+async def search_stream(request : Request) -> Response:
+    """
+    Streaming variant of `/search` using Server-Sent Events, with the events of the Flask
+    `/search/stream`: `slots`, `follow_up` (text deltas), `results`, `message`, `done` and `error`.
+
+    LLM chunks are parsed as they arrive. As soon as the search slots are final, the catalog
+    search runs as a task on the event loop while FOLLOW_UP_MESSAGE is still being generated.
+    When the client disconnects the stream is cancelled, and the search task with it.
+    """
+
+    try:
+        state                   = request.app.state
+        data                    = await request.json()
+
+        try:
+            pagination          = page_arguments(data)
+
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code = 400)
+
+        session_id              = data.get('session_id')
+
+        conversation_history, session = await run_in_threadpool(begin_turn, store = state.session_store, session_id = session_id, message = data.get('query', ''))
+        previous_slots          = session["slots"] if session else {}
+
+    except Exception as e:
+        ERRORS.labels("search_stream").inc()
+
+        return JSONResponse({"error": repr(e)}, status_code = 500)
+
+    async def cached_search(slots : dict) -> dict:
+        cache_key = await aresult_cache_key(clients = state.clients, result_cache = state.result_cache, slots = slots, pagination = pagination)
+
+        return await run_search(state, slots = slots, conversation_history = conversation_history, pagination = pagination, cache_key = cache_key)
+
+    def start_search(slots : dict) -> asyncio.Task:
+        # THE TASK COPIES THE CONTEXT, SO ITS LOG LINES CARRY THE REQUEST ID
+        return asyncio.ensure_future(cached_search(slots))
+
+    async def generate():
+
+        search_task                = None
+
+        try:
+
+            # UNAMBIGUOUS QUERIES ARE ANSWERED WITHOUT AN LLM ROUND TRIP
+            with span("gazetteer"):
+                response           = gazetteer_extract(conversation_history) if config.GAZETTEER_FAST_PATH else None
+
+            slots_sent             = False
+
+            # TOOL-CALL OUTPUT ARRIVES AS ONE VALIDATED OBJECT, SO IT IS SENT LIKE A GAZETTEER ANSWER
+            if response is None and config.EXTRACTION_MODE == "structured":
+                with span("structured_extractor"):
+                    response       = await astructured_extractor(llm = state.clients.llm, conversation_history = conversation_history, cache = state.extraction_cache)
+
+            if response is None:
+                incremental        = IncrementalParser()
+
+                async for chunk in astream_extractor(llm = state.clients.llm, conversation_history = conversation_history, cache = state.extraction_cache):
+                    for event in incremental.feed(chunk):
+                        if event[0] == "follow_up":
+                            yield sse_event("follow_up", {"delta": event[1]})
+
+                    if not slots_sent and incremental.search_ready():
+                        response    = merge_slots(previous_slots, incremental.result())
+                        slots_sent  = True
+                        early_slots = response
+
+                        yield sse_event("slots", {key: value for key, value in response.items() if key != "FOLLOW_UP_MESSAGE"})
+
+                        if response["MOVE_ON"] or config.SEARCH_MODE == "semantic":
+                            search_task = start_search(response)
+
+                            asgi_logger.info("Search started before the LLM finished streaming")
+
+                for event in incremental.finish():
+                    if event[0] == "follow_up":
+                        yield sse_event("follow_up", {"delta": event[1]})
+
+                response           = merge_slots(previous_slots, incremental.result())
+
+                # A KEY REPEATED AFTER THE EARLY SEARCH STARTED CAN STILL CHANGE A SLOT: RESEND THE SLOTS AND SEARCH AGAIN
+                if slots_sent and any(response[key] != early_slots[key] for key in IncrementalParser.SEARCH_KEYS):
+                    slots_sent     = False
+
+                    if search_task is not None:
+                        search_task.cancel()
+                        search_task = None
+
+                if not slots_sent:
+                    yield sse_event("slots", {key: value for key, value in response.items() if key != "FOLLOW_UP_MESSAGE"})
+
+            else:
+                yield sse_event("slots", {key: value for key, value in response.items() if key != "FOLLOW_UP_MESSAGE"})
+                yield sse_event("follow_up", {"delta": response["FOLLOW_UP_MESSAGE"]})
+
+            response               = await run_in_threadpool(end_turn, store = state.session_store, session_id = session_id, state = session, response = response)
+
+            record_move_on(response["MOVE_ON"])
+
+            if response["MOVE_ON"]:
+                search_task        = search_task or start_search(response)
+                page               = await search_task
+
+                asgi_logger.info(f"Search results: {len(page['results'])}")
+
+                yield sse_event("results", {"results": page["results"], "next_cursor": page["next_cursor"], "relaxed": page["relaxed"], "message": "Search results for your query"})
+
+            elif config.SEARCH_MODE == "semantic":
+                # PARTIAL QUERIES STILL GET THE MOST SIMILAR PRODUCTS WITHIN THE KNOWN SLOTS
+                search_task        = search_task or start_search(response)
+                page               = await search_task
+
+                yield sse_event("results", {"results": page["results"], "next_cursor": page["next_cursor"], "relaxed": page["relaxed"], "message": response["FOLLOW_UP_MESSAGE"]})
+                yield sse_event("message", {"message": response["FOLLOW_UP_MESSAGE"]})
+
+            else:
+                asgi_logger.info("Insufficient information to perform search")
+
+                yield sse_event("message", {"message": response["FOLLOW_UP_MESSAGE"]})
+
+            yield sse_event("done", {})
+
+        except Exception as e:
+            asgi_logger.error(f"Error in streaming search: {repr(e)}")
+
+            ERRORS.labels("search_stream").inc()
+
+            yield sse_event("error", {"error": repr(e)})
+
+        finally:
+            if search_task is not None and not search_task.done():
+                search_task.cancel()
+
+    return StreamingResponse(generate(),
+                             media_type  = 'text/event-stream',
+                             headers     = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+                             )
+
+
+async def delete_session(request : Request) -> Response:
+    await run_in_threadpool(request.app.state.session_store.delete, request.path_params["session_id"])
+
+    return Response(status_code = 204)
+
+
+def create_asgi_app(clients : object = None) -> Starlette:
+    """
+    Application factory for the ASGI server.
+
+    Clients are created once per worker at startup and closed at shutdown. Every request
+    runs on the event loop, so a worker can hold many chats that are waiting on the LLM
+    or on Qdrant at the same time.
+
+    Arguments:
+
+        - `clients`     {AsyncServiceClients, optional}  : Pre-built clients. If None, they are built from the
+                                                           project configuration.
+
+    Returns
+
+        - `app`                   {Starlette}            : The ASGI application.
+
+    Raises
+
+        - `ValueError`                                   : If SEARCH_MODE is "index"; the catalog index loads and
+                                                           refreshes with blocking Qdrant calls, so only the Flask
+                                                           server supports it.
+    """
+
+    if config.SEARCH_MODE == "index":
+        raise ValueError('SEARCH_MODE "index" is only supported by the Flask server (web.app / web.wsgi)')
+
+    @asynccontextmanager
+    async def lifespan(app : Starlette):
+        app.state.clients           = clients or build_async_service_clients()
+        app.state.extraction_cache  = ExtractionCache(max_size   = config.EXTRACTION_CACHE_SIZE,
+                                                      ttl        = config.EXTRACTION_CACHE_TTL,
+                                                      disk_path  = config.EXTRACTION_CACHE_PATH
+                                                      )
+
+        # SEARCH PAGES PER (CATALOG VERSION, SLOTS, PAGE), SHARED BY ALL REQUESTS OF THIS WORKER
+        app.state.result_cache      = SearchResultCache(max_size = config.SEARCH_CACHE_SIZE, ttl = config.SEARCH_CACHE_TTL) if config.SEARCH_CACHE_SIZE else None
+
+        app.state.session_store     = build_session_store()
+
+        asgi_logger.info("Async service clients initialized successfully")
+
+        app.state.ready             = False
+        await warm_up(app.state)
+
+        yield
+
+        await app.state.clients.close()
+
+    routes = [Route('/', home),
+              Route('/chatbot', chatbot),
+              Route('/healthz', healthz),
+              Route('/readyz', readyz),
+              Route('/metrics', metrics),
+              Route('/search', search, methods = ['POST']),
+              Route('/search/stream', search_stream, methods = ['POST']),
+              Route('/session/{session_id}', delete_session, methods = ['DELETE']),
+              Mount('/static', app = StaticFiles(directory = os.path.join(WEB_DIR, 'static')), name = 'static'),
+              ]
+
+    return Starlette(routes = routes, lifespan = lifespan, middleware = [Middleware(RequestIdMiddleware)])
+
+
+app = create_asgi_app()
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run("web.asgi:app", host = "127.0.0.1", port = 8000)
@@ -0,0 +1,186 @@
+# RESPONSE ENCODING: PLUGGABLE JSON ENCODERS, gzip / brotli CONTENT NEGOTIATION AND SERVER-SENT EVENTS
+
+# DEPENDENCIES
+
+import os
+import sys
+import json
+import zlib
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import config
+from logger.logger import LoggerSetup
+
+# LOGGER SETUP
+encoding_logger = LoggerSetup(logger_name = "encoding.py", log_filename_prefix = "encoding").get_logger()
+
+try:
+    import orjson
+
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+
+except ImportError:
+    brotli = None
+
+
+def _json_dumps(body : object) -> bytes:
+    return json.dumps(body, ensure_ascii = False, separators = (",", ":"), default = str).encode("utf-8")
+
+def _orjson_dumps(body : object) -> bytes:
+    return orjson.dumps(body, default = str, option = orjson.OPT_NON_STR_KEYS)
+
+
+# ENCODER NAME -> FUNCTION SERIALIZING A BODY TO UTF-8 JSON BYTES
+JSON_ENCODERS         = {"json" : _json_dumps}
+
+if orjson is not None:
+    JSON_ENCODERS["orjson"] = _orjson_dumps
+
+# CONTENT CODINGS THIS SERVER CAN PRODUCE, IN ORDER OF PREFERENCE ON A TIE
+SUPPORTED_ENCODINGS   = (["br"] if brotli is not None else []) + ["gzip"]
+
+
+def get_json_encoder(name : str = None) -> callable:
+    """
+    Return the JSON encoder `name` (defaults to `RESPONSE_JSON_ENCODER`), falling back to the
+    standard library when it is not installed.
+    """
+
+    name = name or config.RESPONSE_JSON_ENCODER
+
+    if name not in JSON_ENCODERS:
+        encoding_logger.warning(f"JSON encoder {name} is not available, using json")
+
+        JSON_ENCODERS[name] = _json_dumps
+
+    return JSON_ENCODERS[name]
+
+
+def negotiate_encoding(accept_encoding : str) -> str:
+    """
+    Pick the content coding for an `Accept-Encoding` header.
+
+    Codings with q=0 are refused; among the rest the highest q-value wins, and brotli is
+    preferred over gzip on a tie.
+
+    Returns
+
+        - `encoding`                     {str}         : "br", "gzip" or None for an uncompressed response.
+    """
+
+    if not accept_encoding or not config.RESPONSE_COMPRESSION:
+        return None
+
+    weights = {}
+
+    for item in accept_encoding.split(","):
+        coding, _, parameters = item.strip().partition(";")
+        quality               = 1.0
+
+        if parameters.strip().startswith("q="):
+            try:
+                quality       = float(parameters.strip()[2:])
+
+            except ValueError:
+                quality       = 0.0
+
+        weights[coding.strip().lower()] = quality
+
+    candidates = [(weights.get(coding, weights.get("*", 0.0)), -rank, coding) for rank, coding in enumerate(SUPPORTED_ENCODINGS)]
+    best       = max(candidates)
+
+    return best[2] if best[0] > 0 else None
+
+
+def compress(data : bytes, encoding : str) -> bytes:
+    """
+    Compress a whole body with `encoding` ("br" or "gzip").
+    """
+
+    if encoding == "br":
+        return brotli.compress(data, quality = config.RESPONSE_BROTLI_QUALITY)
+
+    compressor = zlib.compressobj(config.RESPONSE_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    return compressor.compress(data) + compressor.flush()
+
+
+def encode_body(body : object, accept_encoding : str = None, encoder : callable = None) -> tuple:
+    """
+    Serialize a response body and compress it when the client accepts it and it is large enough.
+
+    Arguments:
+
+        - `body`                      {object}         : The JSON-serializable response body.
+
+        - `accept_encoding`          {str, optional}   : The request's `Accept-Encoding` header.
+
+        - `encoder`                {callable, optional} : JSON encoder, defaults to `get_json_encoder()`.
+
+    Returns
+
+        - tuple
+            (data bytes, headers dict with Content-Type, Vary and, if compressed, Content-Encoding)
+    """
+
+    data     = (encoder or get_json_encoder())(body)
+    headers  = {"Content-Type" : "application/json", "Vary" : "Accept-Encoding"}
+    encoding = negotiate_encoding(accept_encoding) if len(data) >= config.RESPONSE_COMPRESS_MIN_BYTES else None
+
+    if encoding is not None:
+        data                        = compress(data, encoding)
+        headers["Content-Encoding"] = encoding
+
+    return data, headers
+
+
+def compress_stream(chunks : object, encoding : str) -> object:
+    """
+    Compress a stream chunk by chunk, flushing after each one so the client can decode every
+    chunk as soon as it arrives.
+
+    Arguments:
+
+        - `chunks`                   {iterable}        : Byte chunks of the uncompressed stream.
+
+        - `encoding`                   {str}           : "br", "gzip" or None to pass the chunks through.
+
+    Yields
+
+        - bytes
+            Compressed chunks.
+    """
+
+    if encoding is None:
+        yield from chunks
+
+        return
+
+    if encoding == "br":
+        compressor = brotli.Compressor(quality = config.RESPONSE_BROTLI_QUALITY)
+
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+
+        yield compressor.finish()
+
+        return
+
+    compressor     = zlib.compressobj(config.RESPONSE_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    yield compressor.flush()
+
+
+def sse_event(event : str, data : dict) -> str:
+    """
+    Format one Server-Sent Event.
+    """
+
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
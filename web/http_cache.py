@@ -0,0 +1,74 @@
+# HTTP CACHING OF /search PAGES, SHARED BY THE FLASK AND ASGI SERVERS
+
+# DEPENDENCIES
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import config
+from src.searcher.result_cache import search_cache_key
+from src.searcher.result_cache import asearch_cache_key
+
+
+def search_arguments(slots : dict, pagination : dict) -> dict:
+    """
+    Arguments of `search_page` for the extracted slots; they fully determine the page.
+    """
+
+    return {"colour"               : slots["colour"],
+            "individual_category"  : slots["Individual_category"],
+            "category"             : slots["Category"],
+            **pagination
+            }
+
+
+def result_cache_key(clients : object, result_cache : object, slots : dict, pagination : dict) -> str:
+    """
+    Key of the cached page (and ETag) for a filter-mode search, or None when the result cache
+    does not apply (cache disabled or semantic mode, whose results depend on the whole text).
+    """
+
+    if result_cache is None or config.SEARCH_MODE == "semantic":
+        return None
+
+    return search_cache_key(clients.qdrant, clients.collection_name, **search_arguments(slots, pagination))
+
+
+async def aresult_cache_key(clients : object, result_cache : object, slots : dict, pagination : dict) -> str:
+    """
+    Asynchronous counterpart of `result_cache_key` for the async service clients.
+    """
+
+    if result_cache is None or config.SEARCH_MODE == "semantic":
+        return None
+
+    return await asearch_cache_key(clients.qdrant, clients.collection_name, **search_arguments(slots, pagination))
+
+
+def cache_headers(cache_key : str) -> dict:
+    """
+    Validator headers of a cacheable `/search` response. The ETag is weak because the same
+    page may be sent with different content codings.
+    """
+
+    return {"ETag"           : f'W/"{cache_key}"',
+            "Cache-Control"  : f"private, max-age={int(config.SEARCH_CACHE_TTL)}"
+            }
+
+
+def etag_matches(if_none_match : str, cache_key : str) -> bool:
+    """
+    Whether an If-None-Match header names the ETag of `cache_key` (weak comparison) or is "*".
+    """
+
+    if not if_none_match:
+        return False
+
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+
+        if tag == "*" or tag.removeprefix("W/") == f'"{cache_key}"':
+            return True
+
+    return False
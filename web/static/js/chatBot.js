@@ -5,6 +5,90 @@ document.addEventListener('DOMContentLoaded', function() {
     const responseMessageDiv = document.getElementById('responseMessage');
     const responseContainer = document.getElementById('responseContainer');
 
+    // One server-side session per browser tab: the server keeps the slots gathered so far,
+    // so each turn only sends the new message
+    function newSessionId() {
+        if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+        return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+    }
+
+    let sessionId = sessionStorage.getItem('sessionId');
+    if (!sessionId) {
+        sessionId = newSessionId();
+        sessionStorage.setItem('sessionId', sessionId);
+    }
+
+    function showMessage(text) {
+        responseMessageDiv.textContent = text;
+        responseMessageDiv.style.display = 'block';
+        responseContainer.style.display = 'block';
+    }
+
+    function renderResults(results) {
+        // Limit results to 3
+        const limitedResults = results.slice(0, 3);
+
+        // Create a card for each result
+        const resultsCards = limitedResults.map(result => {
+            return `
+                <div class="card">
+                    <img src="${result.img}" alt="${result.name}" class="card-img">
+                    <div class="card-body">
+                        <h3 class="card-title">${result.name}</h3>
+                        <p class="card-price">$${result.price}</p>
+                        <p class="card-rating">Rating: ${result.avg_rating} (${result.ratingCount} reviews)</p>
+                    </div>
+                </div>
+            `;
+        }).join('');
+
+        resultsDiv.innerHTML = resultsCards;
+    }
+
+    // Handle one Server-Sent Event from /search/stream
+    function handleEvent(event, data) {
+        if (event === 'follow_up') {
+            responseMessageDiv.textContent += data.delta;
+            responseMessageDiv.style.display = 'block';
+            responseContainer.style.display = 'block';
+        } else if (event === 'results') {
+            renderResults(data.results);
+        } else if (event === 'message') {
+            showMessage(data.message);
+        } else if (event === 'error') {
+            showMessage(`Error: ${data.error}`);
+        }
+    }
+
+    // Read the SSE stream of a fetch() response and dispatch its events as they arrive
+    async function consumeStream(response) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const frame = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let event = 'message';
+                let data = '';
+                frame.split('\n').forEach(line => {
+                    if (line.startsWith('event: ')) event = line.slice(7);
+                    else if (line.startsWith('data: ')) data += line.slice(6);
+                });
+
+                handleEvent(event, data ? JSON.parse(data) : {});
+            }
+        }
+    }
+
     form.addEventListener('submit', async function(event) {
         event.preventDefault(); // Prevent the default form submission
 
@@ -17,60 +101,28 @@ document.addEventListener('DOMContentLoaded', function() {
         // Clear the input field
         document.getElementById('query').value = '';
 
+        // Clear previous results
+        resultsDiv.innerHTML = '';
+        responseMessageDiv.innerHTML = '';
+        responseMessageDiv.style.display = 'none';
+
         try {
-            const response = await fetch('/search', {
+            const response = await fetch('/search/stream', {
                 method: 'POST',
                 headers: {
-                    'Content-Type': 'application/json'
+                    'Content-Type': 'application/json',
+                    'Accept': 'text/event-stream'
                 },
-                body: JSON.stringify({ query: query })
+                body: JSON.stringify({ query: query, session_id: sessionId, limit: 3 })
             });
 
-            const data = await response.json();
-
-            if (response.ok) {
-                // Clear previous results
-                resultsDiv.innerHTML = '';
-                responseMessageDiv.innerHTML = '';
-                responseMessageDiv.style.display = 'none';
-
-                if (data.message === "Search results for your query") {
-                    responseMessageDiv.textContent = data.message;
-                    responseMessageDiv.style.display = 'block';
-                    responseContainer.style.display = 'block';
-
-                    // Limit results to 3
-                    const limitedResults = data.results.slice(0, 3);
-
-                    // Create a card for each result
-                    const resultsCards = limitedResults.map(result => {
-                        return `
-                            <div class="card">
-                                <img src="${result.img}" alt="${result.name}" class="card-img">
-                                <div class="card-body">
-                                    <h3 class="card-title">${result.name}</h3>
-                                    <p class="card-price">$${result.price}</p>
-                                    <p class="card-rating">Rating: ${result.avg_rating} (${result.ratingCount} reviews)</p>
-                                </div>
-                            </div>
-                        `;
-                    }).join('');
-
-                    resultsDiv.innerHTML = resultsCards;
-                } else {
-                    responseMessageDiv.textContent = data.message;
-                    responseMessageDiv.style.display = 'block';
-                    responseContainer.style.display = 'block';
-                }
+            if (response.ok && response.body) {
+                await consumeStream(response);
             } else {
-                responseMessageDiv.textContent = `Error: ${data.error}`;
-                responseMessageDiv.style.display = 'block';
-                responseContainer.style.display = 'block';
+                showMessage(`Error: ${response.status} ${response.statusText}`);
             }
         } catch (error) {
-            responseMessageDiv.textContent = `Error: ${error.message}`;
-            responseMessageDiv.style.display = 'block';
-            responseContainer.style.display = 'block';
+            showMessage(`Error: ${error.message}`);
         }
     });
 });
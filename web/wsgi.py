@@ -0,0 +1,13 @@
+# WSGI ENTRY POINT FOR THE PRE-FORKING PRODUCTION SERVER
+
+# DEPENDENCIES
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from web.app import create_app
+
+# APPLICATION CODE IS IMPORTED ONCE IN THE MASTER (preload_app) AND SHARED COPY-ON-WRITE BY THE
+# WORKERS; CLIENTS ARE CREATED PER WORKER BY init_worker IN THE post_fork HOOK (gunicorn.conf.py)
+app = create_app(defer_clients = True)